@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Compare thread-pool `run_codex` with one-event-loop `run_codex_many_async`.
+
+Both drive the same number of cases against a stub `codex` shell script (placed
+first on PATH) that prints a few events and sleeps, at the same concurrency. The
+report gives wall time, cases/s, the peak number of Python threads and peak RSS
+growth for each driver. The thread pool needs a worker plus two pipe readers per
+case in flight; on Python < 3.12 asyncio's default child watcher still parks one
+`waitpid` thread per live child, so the asyncio count tracks the concurrency.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts import run_codex_exec  # noqa: E402
+
+FAKE_CODEX = """#!/bin/sh
+cat > /dev/null
+echo '{{"type":"thread.started"}}'
+echo '{{"type":"item.started","item":{{"id":"item_0","type":"command_execution","command":"ls"}}}}'
+sleep {sleep}
+echo '{{"type":"turn.completed"}}'
+"""
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Threads vs asyncio for concurrent codex runs.")
+    parser.add_argument("--cases", type=int, default=300, help="Cases per driver (default: 300).")
+    parser.add_argument("--concurrency", type=int, default=100, help="Cases in flight (default: 100).")
+    parser.add_argument("--sleep", type=float, default=0.5, help="Seconds each stub run takes (default: 0.5).")
+    return parser.parse_args(argv)
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(label: str, drive: Callable[[], List[Dict[str, Any]]]) -> None:
+    peak_threads = [threading.active_count()]
+    done = threading.Event()
+
+    def sample() -> None:
+        while not done.wait(0.01):
+            peak_threads.append(threading.active_count())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    results = drive()
+    elapsed = time.perf_counter() - start
+    done.set()
+    sampler.join()
+    failures = sum(not result["success"] for result in results)
+    print(
+        f"{label:<8} {elapsed:6.2f}s {len(results) / elapsed:7.1f} cases/s "
+        f"peak threads={max(peak_threads) - 1:4d} rss +{peak_rss_mb() - rss_before:6.1f}MB failures={failures}"
+    )
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        bin_dir = workdir / "bin"
+        bin_dir.mkdir()
+        fake = bin_dir / "codex"
+        fake.write_text(FAKE_CODEX.format(sleep=args.sleep), encoding="utf-8")
+        fake.chmod(0o755)
+        os.environ["PATH"] = f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}"
+        options = {"extra_args": [], "repo_root": workdir, "timeout": 60.0, "working_dir": workdir, "sandbox": None}
+        prompts = [f"case {idx}" for idx in range(args.cases)]
+
+        def threads() -> List[Dict[str, Any]]:
+            with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                return list(pool.map(lambda prompt: run_codex_exec.run_codex(prompt, **options), prompts))
+
+        def event_loop() -> List[Dict[str, Any]]:
+            return asyncio.run(run_codex_exec.run_codex_many_async(prompts, args.concurrency, **options))
+
+        print(f"{args.cases} cases, concurrency {args.concurrency}, {args.sleep}s per run")
+        measure("asyncio", event_loop)
+        measure("threads", threads)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
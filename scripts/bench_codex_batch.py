@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Per-case overhead of the batch runner: one process per case vs in-process calls.
+
+"spawn" reproduces the former runner, which started `python3 run_codex_exec.py
+--output-file ...` for every case; "in-process" calls `run_codex_batch.run_single`,
+which runs `run_codex()` in this interpreter and writes the result itself. Both
+drive a stub `codex` shell script that answers instantly, so the difference is the
+runner's own overhead per case.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts import run_codex_batch  # noqa: E402
+
+FAKE_CODEX = """#!/bin/sh
+cat > /dev/null
+echo '{"type":"thread.started"}'
+echo '{"type":"item.started","item":{"id":"item_0","type":"command_execution","command":"quote-card-trigger"}}'
+echo '{"type":"turn.completed"}'
+"""
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Batch runner overhead per case.")
+    parser.add_argument("--cases", type=int, default=40, help="Cases per mode (default: 40).")
+    return parser.parse_args(argv)
+
+
+def measure(label: str, run_case: Callable[[int], None], cases: int) -> float:
+    samples = []
+    for idx in range(cases):
+        start = time.perf_counter()
+        run_case(idx)
+        samples.append(time.perf_counter() - start)
+    median = statistics.median(samples) * 1e3
+    print(f"{label:<11} median={median:6.1f}ms/case  total={sum(samples):5.2f}s")
+    return median
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        bin_dir = workdir / "bin"
+        bin_dir.mkdir()
+        fake = bin_dir / "codex"
+        fake.write_text(FAKE_CODEX, encoding="utf-8")
+        fake.chmod(0o755)
+        os.environ["PATH"] = f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}"
+        out = workdir / "out"
+        out.mkdir()
+        script = REPO_ROOT / "scripts" / "run_codex_exec.py"
+
+        def spawn(idx: int) -> None:
+            cmd = [sys.executable, str(script), "--text", "ping", "--working-dir", str(workdir)]
+            cmd += ["--output-file", str(out / f"spawn_{idx}.json")]
+            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, cwd=REPO_ROOT)
+
+        def in_process(idx: int) -> None:
+            outcome = run_codex_batch.run_single(
+                idx, {"prompt": "ping"}, out / f"inproc_{idx}.json", 60.0, REPO_ROOT, workdir, None
+            )
+            assert outcome[1], outcome[2]
+
+        spawned = measure("spawn", spawn, args.cases)
+        direct = measure("in-process", in_process, args.cases)
+        print(f"overhead removed: {spawned - direct:.1f}ms/case ({spawned / direct:.1f}x faster)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
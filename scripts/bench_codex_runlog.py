@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Compare pretty JSON and compact `.jsonl.gz` codex runs: bytes on disk and load time.
+
+Measured on the committed trigger fixtures and on one synthetic long run. Load
+time covers a full `load_run`, reading only the header, and scanning events until
+the first `command_execution` (the access pattern of the trigger tests).
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts import codex_runlog  # noqa: E402
+
+FIXTURES = REPO_ROOT / "tests" / "fixtures"
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Size and load-time savings of the compact run format.")
+    parser.add_argument(
+        "--events",
+        type=int,
+        default=20_000,
+        help="Events in the synthetic long run (default: 20000).",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=20,
+        help="Timed loads per file and access pattern (default: 20).",
+    )
+    return parser.parse_args(argv)
+
+
+def synthetic_run(count: int) -> Dict[str, Any]:
+    events: List[Dict[str, Any]] = [{"type": "thread.started", "thread_id": "t-0"}]
+    for idx in range(count):
+        events.append(
+            {
+                "type": "item.completed",
+                "item": {"id": f"item_{idx}", "type": "reasoning", "text": f"**Step {idx}** 检查卡片摘要与标签。"},
+            }
+        )
+    events.append(
+        {"type": "item.started", "item": {"id": "cmd", "type": "command_execution", "command": "create_note.py"}}
+    )
+    return {"command": "codex exec --json", "cwd": "/tmp", "success": True, "exit_code": 0, "events": events}
+
+
+def first_command(path: Path) -> Any:
+    for event in codex_runlog.iter_events(path):
+        item = event.get("item") or {}
+        if item.get("type") == "command_execution":
+            return item
+    return None
+
+
+def timed(func: Callable[[Path], Any], path: Path, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(path)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e3
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    patterns = {"load": codex_runlog.load_run, "header": codex_runlog.read_header, "first_cmd": first_command}
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        sources = sorted(FIXTURES.glob("quote_card_trigger_cases_[0-9][0-9].json"))
+        synthetic = workdir / "synthetic.json"
+        codex_runlog.write_run(synthetic, synthetic_run(args.events))
+        sources.append(synthetic)
+
+        totals = [0, 0]
+        for source in sources:
+            compact = workdir / codex_runlog.compact_path(source).name
+            codex_runlog.write_run(compact, codex_runlog.load_run(source))
+            sizes = (source.stat().st_size, compact.stat().st_size)
+            totals[0] += sizes[0]
+            totals[1] += sizes[1]
+            print(f"{source.name}: {sizes[0]} B -> {sizes[1]} B ({sizes[1] / sizes[0]:.1%})")
+            for label, func in patterns.items():
+                pretty_ms = timed(func, source, args.repeat)
+                compact_ms = timed(func, compact, args.repeat)
+                print(f"  {label:<9} json={pretty_ms:8.3f}ms  jsonl.gz={compact_ms:8.3f}ms")
+        print(f"total: {totals[0]} B -> {totals[1]} B ({totals[1] / totals[0]:.1%})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Cost of handing a case a clean working directory: rebuild vs pool reset.
+
+"rebuild" is what a shared working directory needs for isolation: `rmtree` it and
+copy the template again before every case. "reset" is `SandboxPool.reset`, which
+only removes what the previous case added or changed. Each round simulates a case
+that writes a few notes and edits one template file.
+"""
+
+from __future__ import annotations
+
+import argparse
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts import codex_sandbox  # noqa: E402
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Working-directory reset cost per case.")
+    parser.add_argument("--files", type=int, default=2000, help="Files in the template (default: 2000).")
+    parser.add_argument("--rounds", type=int, default=20, help="Cases per mode (default: 20).")
+    parser.add_argument("--clone", choices=codex_sandbox.CLONE_METHODS, default="auto")
+    return parser.parse_args(argv)
+
+
+def make_template(root: Path, files: int) -> None:
+    for n in range(files):
+        path = root / f"notes/{n % 20:02d}/note_{n}.md"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"# note {n}\n" + "body line\n" * 40, encoding="utf-8")
+
+
+def simulate_case(workdir: Path, round_no: int) -> None:
+    fleeting = workdir / "fleeting"
+    fleeting.mkdir(exist_ok=True)
+    for n in range(3):
+        (fleeting / f"card_{round_no}_{n}.md").write_text("new card\n", encoding="utf-8")
+    edited = workdir / "notes/00/note_0.md"
+    edited.unlink()
+    edited.write_text("rewritten\n", encoding="utf-8")
+
+
+def measure(label: str, prepare: Callable[[], None], workdir: Path, rounds: int) -> float:
+    samples = []
+    for round_no in range(rounds):
+        start = time.perf_counter()
+        prepare()
+        samples.append(time.perf_counter() - start)
+        simulate_case(workdir, round_no)
+    median = statistics.median(samples) * 1e3
+    print(f"{label:<8} median={median:7.2f}ms/case")
+    return median
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        template = Path(tmp) / "template"
+        make_template(template, args.files)
+        shared = Path(tmp) / "shared"
+
+        def rebuild() -> None:
+            if shared.exists():
+                shutil.rmtree(shared)
+            shutil.copytree(template, shared)
+
+        pool = codex_sandbox.SandboxPool(Path(tmp) / "pool", 1, template, args.clone)
+        sandbox = pool.dir / "worker-0"
+
+        rebuilt = measure("rebuild", rebuild, shared, args.rounds)
+        reset = measure("reset", lambda: pool.reset(sandbox), sandbox, args.rounds)
+        print(f"template: {args.files} files, clone method: {pool.method}")
+        print(f"reset is {rebuilt / reset:.1f}x cheaper than rmtree + copy")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Compare create_note.py throughput: one process per card vs `--from-jsonl` batch mode."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, List
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+CREATE_NOTE = REPO_ROOT / "skills" / "add-card" / "scripts" / "create_note.py"
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Measure cards/second for per-card invocations and JSONL batch mode."
+    )
+    parser.add_argument(
+        "--cards",
+        type=int,
+        default=200,
+        help="Number of cards written by each mode (default: 200).",
+    )
+    parser.add_argument(
+        "--per-process-cards",
+        type=int,
+        help="Cap for the one-process-per-card mode, which is much slower (default: --cards).",
+    )
+    return parser.parse_args(argv)
+
+
+def make_records(count: int) -> List[dict[str, Any]]:
+    return [
+        {
+            "title": f"基准卡片 {idx}",
+            "summary": f"第 {idx} 条口述：今天复盘站会，提醒自己周五前完成登录埋点验证。",
+            "tags": ["fleeting", "bench"],
+        }
+        for idx in range(count)
+    ]
+
+
+def bench_per_process(records: List[dict[str, Any]], folder: Path) -> float:
+    start = time.perf_counter()
+    for record in records:
+        subprocess.run(
+            [
+                sys.executable,
+                str(CREATE_NOTE),
+                "--title",
+                record["title"],
+                "--summary",
+                record["summary"],
+                "--folder",
+                str(folder),
+                "--tags",
+                *record["tags"],
+            ],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+    return time.perf_counter() - start
+
+
+def bench_batch(records: List[dict[str, Any]], folder: Path) -> float:
+    payload = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, str(CREATE_NOTE), "--from-jsonl", "-", "--folder", str(folder)],
+        input=payload,
+        text=True,
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - start
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    per_process_count = args.per_process_cards or args.cards
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        per_process = bench_per_process(make_records(per_process_count), tmp_path / "per_process")
+        batch = bench_batch(make_records(args.cards), tmp_path / "batch")
+
+    per_process_rate = per_process_count / per_process
+    batch_rate = args.cards / batch
+    print(f"per-process: {per_process_count} cards in {per_process:.2f}s ({per_process_rate:.1f} cards/s)")
+    print(f"batch:       {args.cards} cards in {batch:.2f}s ({batch_rate:.1f} cards/s)")
+    print(f"speedup:     {batch_rate / per_process_rate:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
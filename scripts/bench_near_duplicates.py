@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Benchmark near-duplicate lookups and writes against a synthetic vault of real notes."""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS_DIR = REPO_ROOT / "skills" / "add-card" / "scripts"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+import create_note  # noqa: E402
+import near_duplicates  # noqa: E402
+from vault_index import VaultIndex  # noqa: E402
+
+
+CJK_POOL = "提醒自己复盘站会登录埋点演示环境测试机器预算表语音识别季度汇报问卷链接补丁计划明天下午完成验证申请整理"
+WORDS = ["demo", "login", "budget", "crash", "review", "patch", "survey", "deploy", "iOS", "metrics"]
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="MinHash LSH lookup/insert latency at vault scale.")
+    parser.add_argument(
+        "--notes",
+        type=int,
+        default=100_000,
+        help="Number of indexed cards (default: 100000).",
+    )
+    parser.add_argument(
+        "--queries",
+        type=int,
+        default=500,
+        help="Lookups and writes to time (default: 500).",
+    )
+    return parser.parse_args(argv)
+
+
+def synthetic_summary(rng: random.Random) -> str:
+    cjk = "".join(rng.choice(CJK_POOL) for _ in range(rng.randint(12, 30)))
+    return f"{cjk} {' '.join(rng.sample(WORDS, 2))}"
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp) / "fleeting"
+        folder.mkdir()
+        summaries = []
+        for idx in range(args.notes):
+            summaries.append(synthetic_summary(rng))
+            content = create_note.build_content(summaries[-1], ["fleeting"])
+            (folder / f"卡片 {idx:06d}.md").write_text(content, encoding="utf-8")
+        vault = VaultIndex(folder)
+        index = near_duplicates.NearDuplicateIndex(folder, vault=vault)
+
+        start = time.perf_counter()
+        indexed = index.rebuild()
+        assert indexed == args.notes, indexed
+        print(f"indexed {indexed} cards from disk in {time.perf_counter() - start:.1f}s")
+
+        opens, lookups, writes, planted, found = [], [], [], 0, 0
+        for idx in range(args.queries):
+            # A card written without --near-duplicates, so the next lookup has to sync it.
+            create_note.create_note(folder, f"新卡片 {idx:06d}", synthetic_summary(rng), ["fleeting"], index=vault)
+            if idx % 2:
+                summary = synthetic_summary(rng)
+                expected = None
+            else:
+                target = rng.randrange(args.notes)
+                summary = summaries[target][2:] + "吧"
+                expected = f"卡片 {target:06d}"
+                planted += 1
+
+            # What every create_note.py --near-duplicates call pays: open the index, sync, look up.
+            start = time.perf_counter()
+            fresh = near_duplicates.NearDuplicateIndex(folder, vault=vault)
+            titles = [match.title for match in fresh.find(summary)]
+            opens.append(time.perf_counter() - start)
+            fresh.close()
+
+            start = time.perf_counter()
+            assert [match.title for match in index.find(summary)] == titles
+            lookups.append(time.perf_counter() - start)
+            if expected is not None:
+                assert expected in titles, (expected, titles)
+                found += 1
+
+            start = time.perf_counter()
+            create_note.create_note(folder, f"查重卡片 {idx:06d}", summary, ["fleeting"], index=vault, duplicates=index)
+            writes.append(time.perf_counter() - start)
+
+        for label, samples in [("open+find", opens), ("find", lookups), ("write", writes)]:
+            print(
+                f"{label:<9} p50={statistics.median(samples) * 1e3:.3f}ms "
+                f"p99={percentile(samples, 0.99) * 1e3:.3f}ms"
+            )
+        print(f"planted duplicates found: {found}/{planted}")
+        index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Per-card latency (p50/p99) of create_note.py vs create_note_client.py + note_daemon.py."""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS_DIR = REPO_ROOT / "skills" / "add-card" / "scripts"
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare per-card latency with and without the note daemon.")
+    parser.add_argument(
+        "--cards",
+        type=int,
+        default=100,
+        help="Cards written per mode (default: 100).",
+    )
+    parser.add_argument(
+        "--existing-notes",
+        type=int,
+        default=10_000,
+        help="Notes pre-populated in the vault so index loading is realistic (default: 10000).",
+    )
+    return parser.parse_args(argv)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def time_cards(cmd: List[str], folder: Path, cards: int, env: dict) -> List[float]:
+    samples = []
+    for idx in range(cards):
+        start = time.perf_counter()
+        subprocess.run(
+            [*cmd, "--title", f"延迟测试 {idx}", "--summary", "提醒自己复盘。", "--folder", str(folder)],
+            check=True,
+            stdout=subprocess.DEVNULL,
+            env=env,
+        )
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def report(label: str, samples: List[float]) -> None:
+    print(
+        f"{label:<16} p50={statistics.median(samples) * 1e3:7.1f}ms "
+        f"p99={percentile(samples, 0.99) * 1e3:7.1f}ms"
+    )
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory(dir="/tmp") as tmp:
+        tmp_path = Path(tmp)
+        folder = tmp_path / "fleeting"
+        folder.mkdir()
+        for idx in range(args.existing_notes):
+            (folder / f"旧卡片 {idx}.md").write_text("---\ntags:\n  - fleeting\n---\n\n旧摘要。\n", encoding="utf-8")
+
+        env = {**os.environ, "CARD_BOX_NOTE_SOCKET": str(tmp_path / "notes.sock")}
+        script = time_cards([sys.executable, str(SCRIPTS_DIR / "create_note.py")], folder, args.cards, env)
+
+        daemon = subprocess.Popen(
+            [sys.executable, str(SCRIPTS_DIR / "note_daemon.py")],
+            stdout=subprocess.PIPE,
+            text=True,
+            env=env,
+        )
+        try:
+            assert daemon.stdout is not None
+            daemon.stdout.readline()  # wait until the socket is listening
+            client_cmd = [sys.executable, str(SCRIPTS_DIR / "create_note_client.py")]
+            client = time_cards(client_cmd, folder, args.cards, env)
+            client_nosite = time_cards([sys.executable, "-S", *client_cmd[1:]], folder, args.cards, env)
+        finally:
+            daemon.terminate()
+            daemon.wait()
+
+    report("script", script)
+    report("client+daemon", client)
+    report("client -S", client_nosite)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Benchmark frontmatter-only scanning vs full reads, with cold and warm page cache."""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, List
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS_DIR = REPO_ROOT / "skills" / "add-card" / "scripts"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+import note_scanner  # noqa: E402
+from create_note import build_content, parse_content  # noqa: E402
+from vault_layout import iter_note_files  # noqa: E402
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Frontmatter scanner benchmark (cold and warm cache).")
+    parser.add_argument("--notes", type=int, default=20_000, help="Synthetic notes (default: 20000).")
+    parser.add_argument(
+        "--body-bytes",
+        type=int,
+        default=16_384,
+        help="Body size per note, to show the cost of reading full files (default: 16384).",
+    )
+    parser.add_argument("--workers", type=int, default=8, help="Scanner threads (default: 8).")
+    parser.add_argument("--vault", help="Scan an existing folder instead of generating one.")
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Also report peak Python allocations (tracemalloc slows every run down).",
+    )
+    return parser.parse_args(argv)
+
+
+def populate(folder: Path, count: int, body_bytes: int) -> None:
+    folder.mkdir(parents=True, exist_ok=True)
+    body = "正文" * (body_bytes // 6)
+    for idx in range(count):
+        (folder / f"卡片 {idx:06d}.md").write_text(
+            build_content(body, ["fleeting", f"topic-{idx % 17}"]), encoding="utf-8"
+        )
+
+
+def drop_cache(folder: Path) -> bool:
+    """Evict the vault's pages from the OS cache; returns False where unsupported."""
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    os.sync()
+    for _, entry in iter_note_files(folder):
+        fd = os.open(entry.path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    return True
+
+
+def full_read(folder: Path) -> int:
+    count = 0
+    for _, entry in iter_note_files(folder):
+        parse_content(Path(entry.path).read_text(encoding="utf-8"))
+        count += 1
+    return count
+
+
+def measure(label: str, fn: Callable[[], int], trace_memory: bool = False) -> None:
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    count = fn()
+    elapsed = time.perf_counter() - start
+    line = f"{label:<28} {elapsed * 1e3:8.0f}ms  {count / elapsed:9.0f} notes/s"
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        line += f"  peak {peak / 1024:7.0f} KiB"
+    print(line)
+
+
+def run(folder: Path, workers: int, trace_memory: bool) -> None:
+    scan = lambda: sum(1 for _ in note_scanner.scan_vault(folder, workers=workers))  # noqa: E731
+    serial = lambda: sum(1 for _ in note_scanner.scan_vault(folder, workers=1))  # noqa: E731
+    cold = drop_cache(folder)
+    measure(f"frontmatter x{workers} ({'cold' if cold else 'cache?'})", scan, trace_memory)
+    measure(f"frontmatter x{workers} (warm)", scan, trace_memory)
+    if cold:
+        drop_cache(folder)
+        measure("frontmatter x1 (cold)", serial, trace_memory)
+    measure("frontmatter x1 (warm)", serial, trace_memory)
+    if cold:
+        drop_cache(folder)
+        measure("full read (cold)", lambda: full_read(folder), trace_memory)
+    measure("full read (warm)", lambda: full_read(folder), trace_memory)
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    if args.vault:
+        run(Path(args.vault), args.workers, args.trace_memory)
+        return 0
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp) / "fleeting"
+        populate(folder, args.notes, args.body_bytes)
+        run(folder, args.workers, args.trace_memory)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
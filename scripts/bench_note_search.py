@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Benchmark note_search index queries against a full scan of a synthetic vault."""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS_DIR = REPO_ROOT / "skills" / "add-card" / "scripts"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+import note_search  # noqa: E402
+from create_note import build_content, parse_content  # noqa: E402
+from vault_layout import iter_note_files  # noqa: E402
+
+
+PHRASES = ["复盘站会", "登录埋点", "演示环境", "测试机器", "预算表", "语音识别", "季度汇报", "问卷链接", "补丁计划"]
+TAGS = ["fleeting", "work", "idea", "literature", "permanent"]
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Inverted index vs full scan on a synthetic vault.")
+    parser.add_argument(
+        "--notes",
+        type=int,
+        default=100_000,
+        help="Number of synthetic notes (default: 100000).",
+    )
+    parser.add_argument(
+        "--queries",
+        type=int,
+        default=20,
+        help="Repetitions per indexed query (default: 20).",
+    )
+    return parser.parse_args(argv)
+
+
+def populate(folder: Path, count: int) -> None:
+    rng = random.Random(42)
+    folder.mkdir(parents=True, exist_ok=True)
+    for idx in range(count):
+        summary = f"第{idx}条：{rng.choice(PHRASES)}，提醒自己{rng.choice(PHRASES)}。"
+        tags = ["fleeting", rng.choice(TAGS)]
+        (folder / f"卡片 {idx:06d}.md").write_text(build_content(summary, tags), encoding="utf-8")
+
+
+def full_scan(folder: Path, tag: str, keyword: str) -> int:
+    hits = 0
+    for _, entry in iter_note_files(folder):
+        tags, summary = parse_content(Path(entry.path).read_text(encoding="utf-8"))
+        if tag in tags and keyword in summary:
+            hits += 1
+    return hits
+
+
+def timed(fn: Callable[[], object]) -> tuple[float, object]:
+    start = time.perf_counter()
+    value = fn()
+    return time.perf_counter() - start, value
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp) / "fleeting"
+        elapsed, _ = timed(lambda: populate(folder, args.notes))
+        print(f"vault: {args.notes} notes generated in {elapsed:.1f}s")
+
+        elapsed, stats = timed(lambda: note_search.update_index(folder))
+        print(f"initial index build: {elapsed:.2f}s {stats}")
+        for path in list(folder.glob("卡片 00000*.md")):
+            os.utime(path)
+        elapsed, stats = timed(lambda: note_search.update_index(folder))
+        print(f"incremental update:  {elapsed * 1e3:.0f}ms {stats}")
+
+        conn = note_search.connect(folder)
+        for label, tags, keyword in [
+            ("tag", ["idea"], None),
+            ("keyword", None, "语音识别"),
+            ("tag+keyword", ["work"], "补丁计划"),
+        ]:
+            samples = []
+            hits = 0
+            for _ in range(args.queries):
+                elapsed, results = timed(lambda: note_search.search(folder, tags, keyword, limit=50, conn=conn))
+                samples.append(elapsed)
+                hits = len(results)
+            print(f"index {label:<12} p50={statistics.median(samples) * 1e3:7.2f}ms ({hits} hits, limit 50)")
+        conn.close()
+
+        elapsed, hits = timed(lambda: full_scan(folder, "work", "补丁计划"))
+        print(f"full scan tag+keyword     {elapsed * 1e3:7.0f}ms ({hits} hits)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""Startup-time budget for the short-lived entry points.
+
+Each entry point is launched with a realistic invocation (writing one card, or
+running one prompt against a stub `codex` executable placed first on PATH):
+
+- cold: bytecode caches are redirected to an empty directory (`PYTHONPYCACHEPREFIX`),
+  so every module, stdlib included, is recompiled as on a fresh install;
+- warm: the cache directory has been primed by an earlier run.
+
+The median warm and cold wall times are compared with a per-entry budget, and one
+extra run with `-X importtime` reports the heaviest top-level imports. The exit
+status is 1 when any budget is exceeded, so the script can gate CI.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS_DIR = REPO_ROOT / "scripts"
+CREATE_NOTE = REPO_ROOT / "skills" / "add-card" / "scripts" / "create_note.py"
+
+# Warm-start budgets in milliseconds; cold budgets are these times --cold-factor.
+DEFAULT_BUDGETS_MS = {
+    "create_note": 80.0,
+    "run_codex_exec": 80.0,
+    "run_codex_batch": 150.0,
+}
+
+FAKE_CODEX = """#!/bin/sh
+cat > /dev/null
+echo '{"type":"thread.started"}'
+echo '{"type":"turn.completed"}'
+"""
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure cold/warm startup of the entry points against a budget.")
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=10,
+        help="Timed runs per entry point and mode (default: 10).",
+    )
+    parser.add_argument(
+        "--budget",
+        action="append",
+        default=[],
+        metavar="ENTRY=MS",
+        help="Override the warm budget of one entry point (repeatable), "
+        f"e.g. --budget create_note=40. Defaults: {DEFAULT_BUDGETS_MS}.",
+    )
+    parser.add_argument(
+        "--cold-factor",
+        type=float,
+        default=5.0,
+        help="Cold budget as a multiple of the warm budget (default: 5).",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=5,
+        help="Number of heaviest imports to report per entry point (default: 5).",
+    )
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    return parser.parse_args(argv)
+
+
+def parse_budgets(overrides: List[str]) -> Dict[str, float]:
+    budgets = dict(DEFAULT_BUDGETS_MS)
+    for item in overrides:
+        name, sep, value = item.partition("=")
+        if not sep or name not in budgets:
+            raise SystemExit(f"Invalid --budget {item!r}; expected one of {sorted(budgets)}=MS.")
+        budgets[name] = float(value)
+    return budgets
+
+
+def entry_points(workdir: Path) -> Dict[str, List[str]]:
+    cases = workdir / "cases.jsonl"
+    cases.write_text(json.dumps({"prompt": "ping"}) + "\n", encoding="utf-8")
+    return {
+        "create_note": [
+            str(CREATE_NOTE),
+            "--title",
+            "启动基准",
+            "--summary",
+            "测量脚本启动时间。",
+            "--folder",
+            str(workdir / "fleeting"),
+        ],
+        "run_codex_exec": [
+            str(SCRIPTS_DIR / "run_codex_exec.py"),
+            "--text",
+            "ping",
+            "--working-dir",
+            str(workdir / "codex"),
+        ],
+        "run_codex_batch": [
+            str(SCRIPTS_DIR / "run_codex_batch.py"),
+            "--input-file",
+            str(cases),
+            "--output-dir",
+            str(workdir / "out"),
+            "--overwrite",
+        ],
+    }
+
+
+def run_once(argv: List[str], env: Dict[str, str], extra: List[str] | None = None) -> tuple[float, str]:
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, *(extra or []), *argv],
+        env=env,
+        cwd=str(REPO_ROOT),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"{argv[0]} exited with {proc.returncode}:\n{proc.stderr}")
+    return elapsed, proc.stderr
+
+
+def top_imports(importtime: str, count: int) -> List[tuple[str, float]]:
+    """Heaviest top-level imports (cumulative ms) from ``-X importtime`` output."""
+    modules = []
+    for line in importtime.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if not cumulative.strip().isdigit() or name.startswith("  "):
+            continue  # header or nested import
+        modules.append((name.strip(), int(cumulative) / 1000))
+    return sorted(modules, key=lambda item: -item[1])[:count]
+
+
+def measure(name: str, argv: List[str], env: Dict[str, str], runs: int, top: int) -> Dict[str, Any]:
+    cold = []
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as cache:
+            cold.append(run_once(argv, {**env, "PYTHONPYCACHEPREFIX": cache})[0])
+    with tempfile.TemporaryDirectory() as cache:
+        warm_env = {**env, "PYTHONPYCACHEPREFIX": cache}
+        run_once(argv, warm_env)
+        warm = [run_once(argv, warm_env)[0] for _ in range(runs)]
+        _, importtime = run_once(argv, warm_env, ["-X", "importtime"])
+    return {
+        "entry": name,
+        "cold_ms": statistics.median(cold) * 1e3,
+        "warm_ms": statistics.median(warm) * 1e3,
+        "top_imports": top_imports(importtime, top),
+    }
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    budgets = parse_budgets(args.budget)
+    failures = []
+    report = []
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        bin_dir = workdir / "bin"
+        bin_dir.mkdir()
+        fake = bin_dir / "codex"
+        fake.write_text(FAKE_CODEX, encoding="utf-8")
+        fake.chmod(0o755)
+        env = {**os.environ, "PATH": f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}"}
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+
+        for name, entry_argv in entry_points(workdir).items():
+            result = measure(name, entry_argv, env, args.runs, args.top)
+            result["warm_budget_ms"] = budgets[name]
+            result["cold_budget_ms"] = budgets[name] * args.cold_factor
+            for mode in ("warm", "cold"):
+                if result[f"{mode}_ms"] > result[f"{mode}_budget_ms"]:
+                    failures.append(
+                        f"{name}: {mode} start {result[f'{mode}_ms']:.1f}ms > budget {result[f'{mode}_budget_ms']:.0f}ms"
+                    )
+            report.append(result)
+
+    if args.json:
+        print(json.dumps({"results": report, "failures": failures}, ensure_ascii=False, indent=2))
+    else:
+        for result in report:
+            print(
+                f"{result['entry']:<16} warm={result['warm_ms']:6.1f}ms (budget {result['warm_budget_ms']:.0f}) "
+                f"cold={result['cold_ms']:6.1f}ms (budget {result['cold_budget_ms']:.0f})"
+            )
+            heaviest = ", ".join(f"{module} {ms:.1f}ms" for module, ms in result["top_imports"])
+            print(f"{'':<16} imports: {heaviest}")
+        for failure in failures:
+            print(f"OVER BUDGET {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
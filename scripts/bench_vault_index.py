@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Benchmark filename collision checks on a synthetic vault: index vs directory listing."""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS_DIR = REPO_ROOT / "skills" / "add-card" / "scripts"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+from vault_index import VaultIndex  # noqa: E402
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Collision-check benchmark on a synthetic vault.")
+    parser.add_argument(
+        "--notes",
+        type=int,
+        default=100_000,
+        help="Number of synthetic notes in the vault (default: 100000).",
+    )
+    parser.add_argument(
+        "--lookups",
+        type=int,
+        default=200,
+        help="Number of collision checks per strategy (default: 200).",
+    )
+    parser.add_argument(
+        "--vault",
+        help="Reuse an existing directory instead of generating a temporary vault.",
+    )
+    return parser.parse_args(argv)
+
+
+def populate(folder: Path, count: int) -> None:
+    folder.mkdir(parents=True, exist_ok=True)
+    for idx in range(count):
+        path = folder / f"卡片 {idx:06d}.md"
+        if not path.exists():
+            with path.open("w", encoding="utf-8") as fh:
+                fh.write("---\ntags:\n  - fleeting\n---\n\n占位摘要。\n")
+
+
+def listing_check(folder: Path, name: str) -> bool:
+    target = f"{name}.md".casefold()
+    return any(entry.casefold() == target for entry in os.listdir(folder))
+
+
+def timed(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def report(label: str, samples: List[float]) -> None:
+    ordered = sorted(samples)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"{label:<22} p50={statistics.median(ordered) * 1e6:10.1f}us p99={p99 * 1e6:10.1f}us")
+
+
+def run(folder: Path, notes: int, lookups: int) -> None:
+    start = time.perf_counter()
+    populate(folder, notes)
+    print(f"vault ready: {notes} notes in {time.perf_counter() - start:.2f}s")
+
+    rebuild = timed(VaultIndex(folder).rebuild)
+    load_start = time.perf_counter()
+    index = VaultIndex(folder)
+    load = time.perf_counter() - load_start
+    print(f"index rebuild: {rebuild * 1e3:.1f}ms, index load: {load * 1e3:.1f}ms")
+
+    names = [f"卡片 {idx * 7 % notes:06d}" for idx in range(lookups)]
+    report("listdir collision", [timed(listing_check, folder, name) for name in names])
+    report("index lookup", [timed(index.__contains__, name) for name in names])
+    report("index reserve+append", [timed(index.reserve, name) for name in names])
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    if args.vault:
+        run(Path(args.vault), args.notes, args.lookups)
+        return 0
+    with tempfile.TemporaryDirectory() as tmp:
+        run(Path(tmp) / "fleeting", args.notes, args.lookups)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,229 @@
+"""Content-addressed cache of codex run results for the batch runner.
+
+A case's key is the sha256 of everything that can change its outcome: the prompt,
+the SKILL.md contents (and declared version) of every skill under `skills/`, the
+sandbox mode, the extra `codex exec` arguments, the stop predicates and the
+working-directory template, if any (codex_sandbox.py). Results are stored once
+per key as compact run logs (`objects/<2 hex>/<key>.jsonl.gz`, see
+codex_runlog.py), and every result file the batch runner writes records its key
+and inputs under ``cache``, so an unchanged case is recognised without rerunning
+it and a changed one can say what changed.
+
+Usage:
+    python scripts/codex_cache.py stats
+    python scripts/codex_cache.py gc --keep tests/fixtures/*.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Sequence
+
+if __package__:
+    from . import codex_runlog
+else:  # run as a script from scripts/
+    import codex_runlog
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_CACHE_DIR = REPO_ROOT / ".codex_cache"
+DEFAULT_SKILLS_DIR = REPO_ROOT / "skills"
+OBJECT_SUFFIX = codex_runlog.COMPACT_SUFFIX
+VERSION_RE = re.compile(r"^\s*version:\s*[\"']?([^\"'\n]+?)[\"']?\s*$", re.MULTILINE)
+
+
+def skill_fingerprints(skills_dir: Path = DEFAULT_SKILLS_DIR) -> Dict[str, Dict[str, Any]]:
+    """``{skill: {"sha256": ..., "version": ...}}`` for every ``<skill>/SKILL.md``."""
+    skills = {}
+    for skill_md in sorted(skills_dir.glob("*/SKILL.md")):
+        data = skill_md.read_bytes()
+        text = data.decode("utf-8", errors="replace")
+        frontmatter = text.split("---", 2)[1] if text.startswith("---") and text.count("---") >= 2 else ""
+        match = VERSION_RE.search(frontmatter)
+        skills[skill_md.parent.name] = {
+            "sha256": hashlib.sha256(data).hexdigest(),
+            "version": match.group(1) if match else None,
+        }
+    return skills
+
+
+def cache_inputs(
+    prompt: str,
+    skills: Dict[str, Dict[str, Any]],
+    sandbox: str | None,
+    codex_args: Sequence[str] = (),
+    stop_on: Sequence[Any] = (),
+    workdir: str | None = None,
+) -> Dict[str, Any]:
+    """The key material of one case; ``stop_on`` holds StopPredicate tuples or specs.
+
+    ``workdir`` is the template fingerprint; it is left out when there is no
+    template so keys of runs in an empty working directory stay unchanged.
+    """
+    inputs = {
+        "prompt_sha256": hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+        "skills": skills,
+        "sandbox": sandbox,
+        "codex_args": list(codex_args),
+        "stop_on": [list(predicate) if isinstance(predicate, tuple) else predicate for predicate in stop_on],
+    }
+    if workdir is not None:
+        inputs["workdir"] = workdir
+    return inputs
+
+
+def cache_key(inputs: Dict[str, Any]) -> str:
+    canonical = json.dumps(inputs, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def explain_miss(previous: Dict[str, Any] | None, inputs: Dict[str, Any]) -> str:
+    """Why a case whose result file recorded ``previous`` inputs has to run again."""
+    if not previous:
+        return "result has no cache key"
+    changed = []
+    if previous.get("prompt_sha256") != inputs["prompt_sha256"]:
+        changed.append("prompt")
+    old_skills, new_skills = previous.get("skills", {}), inputs["skills"]
+    for name in sorted(set(old_skills) | set(new_skills)):
+        if old_skills.get(name) != new_skills.get(name):
+            old_version = (old_skills.get(name) or {}).get("version")
+            new_version = (new_skills.get(name) or {}).get("version")
+            version = f" {old_version} -> {new_version}" if old_version != new_version else ""
+            changed.append(f"skill {name}{version}")
+    for field in ("sandbox", "codex_args", "stop_on"):
+        if previous.get(field) != inputs[field]:
+            changed.append(field.replace("_", " "))
+    if previous.get("workdir") != inputs.get("workdir"):
+        changed.append("workdir template")
+    return "changed: " + ", ".join(changed) if changed else "cached result missing"
+
+
+def recorded_entry(path: Path) -> Dict[str, Any] | None:
+    """The ``cache`` entry (key and inputs) recorded in an existing successful result file.
+
+    Failed results never count: older runs recorded an entry for them too.
+    """
+    try:
+        header = codex_runlog.read_header(path)
+    except (OSError, ValueError):
+        return None
+    entry = header.get("cache")
+    return entry if isinstance(entry, dict) and header.get("success") else None
+
+
+def miss_reason(path: Path, inputs: Dict[str, Any]) -> str:
+    """Why the case whose result file is ``path`` has to run (again)."""
+    if not path.exists():
+        return "no result yet"
+    try:
+        header = codex_runlog.read_header(path)
+    except (OSError, ValueError):
+        return "result unreadable"
+    if not header.get("success"):
+        return "previous run failed"
+    previous = header.get("cache")
+    return explain_miss(previous.get("inputs") if isinstance(previous, dict) else None, inputs)
+
+
+class ResultCache:
+    """Successful run results stored once per cache key."""
+
+    def __init__(self, root: Path = DEFAULT_CACHE_DIR):
+        self.root = root
+
+    def object_path(self, key: str) -> Path:
+        return self.root / "objects" / key[:2] / f"{key}{OBJECT_SUFFIX}"
+
+    def get(self, key: str) -> Path | None:
+        path = self.object_path(key)
+        return path if path.exists() else None
+
+    def put(self, key: str, result: Dict[str, Any]) -> Path:
+        path = self.object_path(key)
+        codex_runlog.write_run(path, result, compact=True)
+        return path
+
+    def restore(self, key: str, output_path: Path) -> bool:
+        """Write the cached result for ``key`` to ``output_path`` (in its format)."""
+        source = self.get(key)
+        if source is None:
+            return False
+        result = codex_runlog.load_run(source)
+        result["digest"] = codex_runlog.run_digest(source)
+        codex_runlog.write_run(output_path, result)
+        return True
+
+    def keys(self) -> Iterator[str]:
+        for path in sorted((self.root / "objects").glob(f"*/*{OBJECT_SUFFIX}")):
+            yield path.name[: -len(OBJECT_SUFFIX)]
+
+    def remove(self, key: str) -> int:
+        """Delete the entry and its digest sidecar; returns the bytes freed."""
+        path = self.object_path(key)
+        freed = 0
+        for candidate in (path, codex_runlog.digest_path(path)):
+            try:
+                freed += candidate.stat().st_size
+                candidate.unlink()
+            except FileNotFoundError:
+                pass
+        try:
+            path.parent.rmdir()
+        except OSError:
+            pass
+        return freed
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Inspect or garbage-collect the codex result cache.")
+    parser.add_argument(
+        "--cache-dir",
+        default=str(DEFAULT_CACHE_DIR),
+        help=f"Cache directory (default: {DEFAULT_CACHE_DIR.relative_to(REPO_ROOT)}).",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("stats", help="Print the number and size of cached results.")
+    gc = subparsers.add_parser("gc", help="Delete entries no result file refers to.")
+    gc.add_argument(
+        "--keep",
+        nargs="+",
+        required=True,
+        metavar="RESULT",
+        help="Result files whose recorded cache keys stay live (all other entries are orphans).",
+    )
+    gc.add_argument("--dry-run", action="store_true", help="Only list the orphaned entries.")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    cache = ResultCache(Path(args.cache_dir))
+    if args.command == "stats":
+        keys = list(cache.keys())
+        size = sum(cache.object_path(key).stat().st_size for key in keys)
+        print(f"{len(keys)} cached results, {size} B in {cache.root}")
+        return 0
+    live = set()
+    for name in args.keep:
+        entry = recorded_entry(Path(name))
+        if entry is not None and entry.get("key"):
+            live.add(entry["key"])
+    orphans = [key for key in cache.keys() if key not in live]
+    freed = 0
+    for key in orphans:
+        print(f"{'would remove' if args.dry_run else 'removed'} {key}")
+        if not args.dry_run:
+            freed += cache.remove(key)
+    outcome = "found" if args.dry_run else f"removed, {freed} B freed"
+    print(f"{len(orphans)} orphaned entries {outcome}; {len(live)} live keys")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
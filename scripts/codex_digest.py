@@ -0,0 +1,136 @@
+"""Digest of a codex run: the facts the evaluation tests look up in its events.
+
+A digest is built event by event while the run streams (see `EventSink` in
+`run_codex_exec.py`), so it also covers events trimmed by `--max-events`. It holds:
+
+- ``commands``: executed shell commands in start order, with their exit codes;
+- ``trigger_fired``: whether a ``quote-card-trigger`` command was started;
+- ``reasoning``: reasoning texts in order;
+- ``cards``: parsed ``card_json`` blocks printed by `create_note.py`;
+- ``usage``: token usage of the last completed turn, ``tokens``: the numeric
+  usage fields summed over every completed turn, and ``event_count``.
+
+`codex_runlog.write_run` stores it beside the run as ``<stem>.digest.json``;
+`codex_runlog.run_digest` reads it back, or rebuilds it from the events when the
+sidecar is missing or belongs to another file.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, Iterable, List
+
+
+DIGEST_VERSION = 2
+TRIGGER_MARKER = "quote-card-trigger"
+CREATE_NOTE_MARKER = "skills/add-card/scripts/create_note.py"
+CARD_JSON_RE = re.compile(r"```card_json\s*(.*?)\s*```", re.DOTALL)
+
+
+def parse_cards(output: str) -> List[Dict[str, Any]]:
+    """Every JSON object found in ``card_json`` fenced blocks of ``output``."""
+    import json
+
+    cards = []
+    for block in CARD_JSON_RE.findall(output):
+        try:
+            card = json.loads(block)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(card, dict):
+            cards.append(card)
+    return cards
+
+
+class RunDigest:
+    """Accumulates a digest from events fed one at a time through :meth:`add`."""
+
+    def __init__(self) -> None:
+        self.event_count = 0
+        self.commands: List[Dict[str, Any]] = []
+        self.trigger_fired = False
+        self.reasoning: List[str] = []
+        self.cards: List[Dict[str, Any]] = []
+        self.usage: Dict[str, Any] | None = None
+        self.tokens: Dict[str, float] = {}
+        self._commands_by_id: Dict[Any, Dict[str, Any]] = {}
+        self._reasoning_by_id: Dict[Any, str] = {}
+
+    def add(self, event: Any) -> None:
+        self.event_count += 1
+        if not isinstance(event, dict):
+            return
+        kind = event.get("type")
+        item = event.get("item")
+        item = item if isinstance(item, dict) else {}
+        item_type = item.get("type")
+        if item_type == "command_execution":
+            self._add_command(kind, item)
+        elif item_type == "reasoning":
+            self._add_reasoning(item.get("id"), item.get("text", ""))
+        elif kind == "reasoning":
+            self._add_reasoning(None, event.get("text", ""))
+        elif kind == "turn.completed" and isinstance(event.get("usage"), dict):
+            self.usage = event["usage"]
+            add_tokens(self.tokens, self.usage)
+
+    def _add_command(self, kind: Any, item: Dict[str, Any]) -> None:
+        command = str(item.get("command", ""))
+        item_id = item.get("id")
+        entry = self._commands_by_id.get(item_id) if item_id is not None else None
+        if entry is None:
+            entry = {"command": command, "exit_code": None}
+            self.commands.append(entry)
+            if item_id is not None:
+                self._commands_by_id[item_id] = entry
+        if kind == "item.started" and TRIGGER_MARKER in command:
+            self.trigger_fired = True
+        if kind == "item.completed":
+            entry["exit_code"] = item.get("exit_code")
+            if CREATE_NOTE_MARKER in command:
+                self.cards.extend(parse_cards(item.get("aggregated_output") or ""))
+
+    def _add_reasoning(self, item_id: Any, text: Any) -> None:
+        if not text:
+            return
+        # Reasoning items may be re-sent while streaming; keep each distinct text once.
+        if item_id is not None:
+            if self._reasoning_by_id.get(item_id) == text:
+                return
+            self._reasoning_by_id[item_id] = text
+        self.reasoning.append(text)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "version": DIGEST_VERSION,
+            "event_count": self.event_count,
+            "commands": self.commands,
+            "trigger_fired": self.trigger_fired,
+            "reasoning": self.reasoning,
+            "cards": self.cards,
+            "usage": self.usage,
+            "tokens": self.tokens,
+        }
+
+
+def add_tokens(total: Dict[str, float], usage: Dict[str, Any]) -> Dict[str, float]:
+    """Add the numeric fields of ``usage`` to ``total`` (in place) and return it."""
+    for key, value in usage.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            total[key] = total.get(key, 0) + value
+    return total
+
+
+def digest_events(events: Iterable[Any]) -> Dict[str, Any]:
+    digest = RunDigest()
+    for event in events:
+        digest.add(event)
+    return digest.as_dict()
+
+
+def card_summary(digest: Dict[str, Any]) -> str:
+    """Summary of the first ``card_json`` block that has one ("" when none does)."""
+    for card in digest.get("cards", []):
+        if card.get("summary"):
+            return card["summary"]
+    return ""
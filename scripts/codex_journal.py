@@ -0,0 +1,139 @@
+"""Append-only checkpoint journal of a batch run.
+
+The batch runner appends one JSON line per case as soon as the case is settled:
+
+    {"case": 12, "status": "done", "duration": 41.2, "output": "...", "prompt": "9f2c...",
+     "first_event": 1.8, "events": 57, "tokens": {"input_tokens": 5120, ...}}
+
+``status`` is ``done`` or ``failed`` for cases that ran, ``hit`` for cases served
+from the result cache or an existing file, and ``skipped`` for cases that never
+started (the time budget ran out). ``prompt`` is a short hash of the case prompt,
+so a resumed run notices when line N of the manifest is no longer the same case.
+``output`` is relative to the journal's directory when the result lies below it
+(so a copied shard directory stays readable) and absolute otherwise, e.g. for a
+case's ``log_file``. The remaining fields are the case's telemetry (codex_telemetry.py).
+Every run (and every resume) first appends a header line with ``"journal"`` set.
+
+Lines are flushed and fsynced one at a time; a torn last line left by a crash is
+ignored on read, and a case that was running when the batch died simply has no
+line yet, so `--resume` runs it again. Failed cases are run again on resume too.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, IO
+
+
+JOURNAL_FORMAT = "codex-batch-journal"
+JOURNAL_VERSION = 1
+# Statuses a resumed run does not repeat; failed cases are retried and "skipped" ones never started.
+FINISHED = frozenset({"done", "hit"})
+# Statuses of cases that ran to an outcome, which a shard merge accepts.
+SETTLED = FINISHED | {"failed"}
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+
+
+def read_journal(path: Path) -> Dict[int, Dict[str, Any]]:
+    """Latest entry per case number; unreadable lines (a torn tail) are skipped."""
+    entries: Dict[int, Dict[str, Any]] = {}
+    try:
+        fh = path.open(encoding="utf-8")
+    except FileNotFoundError:
+        return entries
+    with fh:
+        for line in fh:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(entry, dict) and isinstance(entry.get("case"), int):
+                entries[entry["case"]] = entry
+    return entries
+
+
+class Journal:
+    """Writer side, shared by the batch workers.
+
+    ``resume`` appends to an existing journal instead of starting a new one.
+    """
+
+    def __init__(self, path: Path, manifest: Path, resume: bool = False, shard: str | None = None):
+        self.path = path
+        self._base = path.parent.resolve()
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if resume and path.exists():
+            self._repair_tail()
+        self._fh: IO[str] = path.open("a" if resume else "w", encoding="utf-8")
+        header = {
+            "journal": JOURNAL_FORMAT,
+            "version": JOURNAL_VERSION,
+            "manifest": str(manifest),
+            "resumed": resume,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        }
+        if shard is not None:
+            header["shard"] = shard
+        self.append(header)
+
+    def record(
+        self,
+        case: int,
+        status: str,
+        prompt: str,
+        output: Path,
+        duration: float | None = None,
+        error: str | None = None,
+        details: Dict[str, Any] | None = None,
+    ) -> None:
+        """Append a case entry; ``details`` (e.g. its telemetry) is merged into it."""
+        entry: Dict[str, Any] = {
+            "case": case,
+            "status": status,
+            "prompt": prompt_hash(prompt),
+            "output": self.output_ref(output),
+        }
+        if duration is not None:
+            entry["duration"] = round(duration, 3)
+        if error:
+            entry["error"] = error
+        if details:
+            entry.update((key, value) for key, value in details.items() if key not in entry)
+        self.append(entry)
+
+    def output_ref(self, output: Path) -> str:
+        """How ``output`` is recorded: relative to the journal's directory when below it."""
+        output = Path(os.path.abspath(output))
+        try:
+            return output.relative_to(self._base).as_posix()
+        except ValueError:
+            return str(output)
+
+    def close(self) -> None:
+        self._fh.close()
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        """Write one line as is (used directly to copy entries between journals)."""
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._fh.write(line)
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+
+    def _repair_tail(self) -> None:
+        # A crash mid-write leaves a line without its newline; end it so the next entry starts clean.
+        with self.path.open("rb+") as fh:
+            if fh.seek(0, os.SEEK_END) == 0:
+                return
+            fh.seek(-1, os.SEEK_END)
+            if fh.read(1) != b"\n":
+                fh.write(b"\n")
@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+"""Run one manifest against several variants and compare them side by side.
+
+A variant is a name plus what it changes relative to the installed codex setup:
+``skills_dir`` (a whole skills directory), ``skills`` (``{skill: snapshot}``, a
+SKILL.md file or a skill directory laid over the base skills) and
+``codex_args`` (added after the shared ``--codex-arg`` ones). Variants come from
+a JSON list or a JSONL file; their paths are relative to that file::
+
+    [{"name": "baseline"},
+     {"name": "trigger-v2", "skills": {"quote-card-trigger": "snapshots/SKILL.v2.md"}},
+     {"name": "gpt-5", "codex_args": ["-m", "gpt-5"]}]
+
+Codex reads skills from ``$CODEX_HOME/skills`` (``~/.codex`` by default), and
+those installed skills are the base unless ``--skills-dir`` names another
+directory. A variant whose skills differ from the installed ones runs with
+``CODEX_HOME`` set to ``<output-dir>/.variants/<name>/codex_home``. That home
+links to everything in the real codex home except ``skills``, which points at
+the variant's skills. Cache keys always fingerprint the skills a variant
+actually runs with.
+
+Each (case, variant) pair gets the batch runner's cache key (codex_cache.py),
+computed from the variant's skill fingerprints and codex arguments. Pairs with
+the same key run once, and the others get a copy of the result. That covers a
+variant that matches the baseline and a prompt repeated in the manifest. Keys
+already in the result cache, or with an up-to-date output, do not run at all.
+The remaining runs share one worker pool and one set of sandboxes. They are
+queued case by case, so every variant makes progress at the same pace.
+
+Results are written to ``<output-dir>/<variant>/<prefix>_<n>.json``, so each
+variant directory looks like a batch run's output. The comparison is printed
+and saved as ``comparison.md`` and ``comparison.json``. For each case it shows
+whether the trigger fired and the card summary, per variant. Rows where the
+variants' triggers disagree are marked. Each variant also gets a trigger count
+and, when cases have ``expected_trigger``, an accuracy.
+
+Usage:
+    python scripts/codex_matrix.py --input-file cases.jsonl --variants variants.json --output-dir out/matrix
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from collections import namedtuple
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+if __package__:
+    from . import (
+        codex_cache,
+        codex_digest,
+        codex_retry,
+        codex_runlog,
+        codex_sandbox,
+        run_codex_batch,
+        run_codex_exec,
+    )
+else:  # run as a script from scripts/
+    import codex_cache
+    import codex_digest
+    import codex_retry
+    import codex_runlog
+    import codex_sandbox
+    import run_codex_batch
+    import run_codex_exec
+
+
+NAME_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*$")
+VARIANT_FIELDS = {"name", "skills_dir", "skills", "codex_args"}
+
+Variant = namedtuple("Variant", "name skills_dir skills codex_args")
+MatrixJob = namedtuple("MatrixJob", "idx case variant output_path entry codex_args env copies")
+
+
+def load_variants(path: Path) -> List[Variant]:
+    """Parse and check the variants file; raises ValueError on a bad entry."""
+    text = path.read_text(encoding="utf-8")
+    if text.lstrip().startswith("["):
+        specs = json.loads(text)
+    else:
+        specs = [json.loads(line) for line in text.splitlines() if line.strip()]
+    variants: List[Variant] = []
+    for spec in specs:
+        name = spec.get("name") if isinstance(spec, dict) else None
+        if not isinstance(name, str) or not NAME_RE.match(name):
+            raise ValueError(f"variant {spec!r}: name must be letters, digits, '.', '_' or '-'")
+        if any(variant.name == name for variant in variants):
+            raise ValueError(f"variant {name!r} is listed twice")
+        unknown = set(spec) - VARIANT_FIELDS
+        if unknown:
+            raise ValueError(f"variant {name!r}: unknown fields {', '.join(sorted(unknown))}")
+        codex_args = spec.get("codex_args", [])
+        if not isinstance(codex_args, list) or not all(isinstance(arg, str) for arg in codex_args):
+            raise ValueError(f"variant {name!r}: codex_args must be a list of strings")
+        skills_dir = path.parent / spec["skills_dir"] if spec.get("skills_dir") else None
+        if skills_dir is not None and not skills_dir.is_dir():
+            raise ValueError(f"variant {name!r}: skills_dir {skills_dir} is not a directory")
+        skills = {skill: path.parent / snapshot for skill, snapshot in spec.get("skills", {}).items()}
+        for skill, snapshot in skills.items():
+            if not snapshot.exists():
+                raise ValueError(f"variant {name!r}: snapshot {snapshot} for skill {skill} does not exist")
+        variants.append(Variant(name, skills_dir, skills, codex_args))
+    if not variants:
+        raise ValueError(f"no variants in {path}")
+    return variants
+
+
+def default_codex_home() -> Path:
+    return Path(os.environ.get("CODEX_HOME") or Path.home() / ".codex")
+
+
+def prepare_variant(
+    variant: Variant, base_skills: Path, root: Path, codex_home: Path
+) -> Tuple[Path, Dict[str, str] | None]:
+    """Lay out ``variant`` under ``root``; returns its skills directory and codex's extra env.
+
+    A variant that runs the skills installed in ``codex_home`` needs no files and no env (None).
+    """
+    if root.exists():
+        shutil.rmtree(root)
+    installed = codex_home / "skills"
+    if variant.skills_dir is None and not variant.skills and base_skills.resolve() == installed.resolve():
+        return installed, None
+    skills_dir = variant.skills_dir.resolve() if variant.skills_dir is not None else base_skills
+    if variant.skills:
+        overlay = root / "skills"
+        if skills_dir.is_dir():
+            shutil.copytree(skills_dir, overlay, symlinks=True)
+        for skill, snapshot in variant.skills.items():
+            target = overlay / skill
+            if snapshot.is_dir():
+                shutil.rmtree(target, ignore_errors=True)
+                shutil.copytree(snapshot, target, symlinks=True)
+            else:
+                target.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(snapshot, target / "SKILL.md")
+        skills_dir = overlay
+    home = root / "codex_home"
+    home.mkdir(parents=True)
+    if codex_home.is_dir():
+        for entry in codex_home.iterdir():
+            if entry.name != "skills":
+                (home / entry.name).symlink_to(entry.resolve())
+    (home / "skills").symlink_to(skills_dir, target_is_directory=True)
+    return skills_dir, {"CODEX_HOME": str(home)}
+
+
+def copy_run(source: Path, target: Path) -> None:
+    """Give ``target`` the result (and digest) of ``source``, as a shared run or a cache restore."""
+    result = codex_runlog.load_run(source)
+    result["digest"] = codex_runlog.run_digest(source)
+    codex_runlog.write_run(target, result)
+
+
+def compare(
+    cases: List[Dict[str, Any]], variants: List[Variant], output_dir: Path, prefix: str
+) -> List[Dict[str, Any]]:
+    """One row per case: prompt, ``expected_trigger`` and each variant's trigger and card summary."""
+    rows = []
+    for idx, case in enumerate(cases, start=1):
+        cells: Dict[str, Dict[str, Any]] = {}
+        for variant in variants:
+            path = output_dir / variant.name / f"{prefix}_{idx}.json"
+            if not path.exists():
+                cells[variant.name] = {"success": False, "trigger": None, "summary": ""}
+                continue
+            digest = codex_runlog.run_digest(path)
+            cells[variant.name] = {
+                "success": bool(codex_runlog.read_header(path).get("success")),
+                "trigger": digest["trigger_fired"],
+                "summary": codex_digest.card_summary(digest),
+            }
+        rows.append(
+            {
+                "case": idx,
+                "prompt": case["prompt"],
+                "expected_trigger": case.get("expected_trigger"),
+                "trigger_differs": len({cell["trigger"] for cell in cells.values()}) > 1,
+                "variants": cells,
+            }
+        )
+    return rows
+
+
+def variant_totals(rows: List[Dict[str, Any]], name: str) -> Dict[str, int]:
+    totals = {"cases": 0, "failed": 0, "triggered": 0, "scored": 0, "correct": 0}
+    for row in rows:
+        cell = row["variants"][name]
+        totals["cases"] += 1
+        totals["failed"] += not cell["success"]
+        totals["triggered"] += bool(cell["trigger"])
+        if row["expected_trigger"] is not None:
+            totals["scored"] += 1
+            totals["correct"] += bool(cell["trigger"]) == bool(row["expected_trigger"])
+    return totals
+
+
+def _cell(text: str, width: int) -> str:
+    text = " ".join(text.split()).replace("|", "\\|")
+    return text if len(text) <= width else text[: width - 1] + "…"
+
+
+def _mark(value: Any) -> str:
+    return "–" if value is None else "✓" if value else "✗"
+
+
+def render_table(rows: List[Dict[str, Any]], variants: List[Variant], width: int = 60) -> str:
+    """Markdown comparison; ``≠`` marks cases whose triggers disagree across variants."""
+    names = [variant.name for variant in variants]
+    lines = [
+        "| case | ≠ | prompt | expected | " + " | ".join(names) + " |",
+        "|---:|:-:|---|:-:|" + "---|" * len(names),
+    ]
+    for row in rows:
+        cells = []
+        for name in names:
+            cell = row["variants"][name]
+            text = f"{_mark(cell['trigger'])} {_cell(cell['summary'], width)}".rstrip()
+            cells.append(text if cell["success"] else f"{text} (failed)")
+        lines.append(
+            f"| {row['case']} | {'≠' if row['trigger_differs'] else ''} | {_cell(row['prompt'], 40)} "
+            f"| {_mark(row['expected_trigger'])} | " + " | ".join(cells) + " |"
+        )
+    totals = [variant_totals(rows, name) for name in names]
+    lines.append("| | | **triggered** | | " + " | ".join(f"{t['triggered']}/{t['cases']}" for t in totals) + " |")
+    if any(t["scored"] for t in totals):
+        lines.append("| | | **accuracy** | | " + " | ".join(f"{t['correct']}/{t['scored']}" for t in totals) + " |")
+    if any(t["failed"] for t in totals):
+        lines.append("| | | **failed** | | " + " | ".join(str(t["failed"]) for t in totals) + " |")
+    return "\n".join(lines) + "\n"
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run a JSONL manifest against several skill/codex variants.")
+    parser.add_argument(
+        "--input-file",
+        default="tests/fixtures/quote_card_trigger_cases.jsonl",
+        help="Path to the JSONL file that stores prompts (default: tests/fixtures/quote_card_trigger_cases.jsonl).",
+    )
+    parser.add_argument("--variants", required=True, help="JSON list or JSONL file of variants.")
+    parser.add_argument("--output-dir", required=True, help="Directory for per-variant results and the comparison.")
+    parser.add_argument(
+        "--prefix",
+        default="codex_run_case",
+        help="Filename prefix for generated JSON files (default: codex_run_case).",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=60.0,
+        help="Timeout (seconds) for each codex run (default: 60).",
+    )
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=1,
+        help="Workers shared by all variants (default: 1).",
+    )
+    parser.add_argument("--max-cases", type=int, help="Run only the first N cases of the manifest.")
+    parser.add_argument(
+        "--overwrite",
+        action="store_true",
+        help="Run every (case, variant) key again, ignoring existing results and the cache.",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Neither read nor fill the result cache.")
+    parser.add_argument(
+        "--cache-dir",
+        default=str(codex_cache.DEFAULT_CACHE_DIR),
+        help="Directory of the content-addressed result cache (default: .codex_cache).",
+    )
+    parser.add_argument(
+        "--skills-dir",
+        help="Skills that variants without skills of their own run with, and that snapshots are laid "
+        "over (default: the installed <codex home>/skills).",
+    )
+    parser.add_argument(
+        "--workdir-root",
+        help="Directory holding the workers' sandboxes; each run claims its own pool-<k> "
+        "directory in it (default: codex_tmp in the repository).",
+    )
+    parser.add_argument(
+        "--codex-home",
+        help="Codex home that variant homes link to (default: $CODEX_HOME or ~/.codex).",
+    )
+    parser.add_argument(
+        "--codex-arg",
+        action="append",
+        default=[],
+        help="Argument passed to `codex exec` for every variant, before the variant's own (repeatable).",
+    )
+    parser.add_argument(
+        "--sandbox",
+        default="workspace-write",
+        help="Sandbox mode passed to `codex exec --sandbox` (default: workspace-write).",
+    )
+    parser.add_argument(
+        "--stop-on",
+        action="append",
+        default=[],
+        help="Stop a run as soon as an event matches (repeatable; see run_codex_exec.py --stop-on).",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=0,
+        help="Retries per failed run with jittered exponential backoff (default: 0).",
+    )
+    parser.add_argument(
+        "--backoff",
+        type=float,
+        default=2.0,
+        help="Base backoff delay between retries in seconds (default: 2).",
+    )
+    parser.add_argument(
+        "--summary-width",
+        type=int,
+        default=60,
+        help="Characters of each card summary shown in the table (default: 60).",
+    )
+    args = parser.parse_args(argv)
+    try:
+        args.stop_on = [run_codex_exec.parse_predicate(spec) for spec in args.stop_on]
+    except ValueError as exc:
+        parser.error(str(exc))
+    if args.parallel < 1:
+        parser.error("--parallel must be at least 1")
+    return args
+
+
+def main(argv: List[str] | None = None) -> int:
+    args = parse_args(argv)
+    input_path = Path(args.input_file).resolve()
+    output_dir = Path(args.output_dir).resolve()
+    repo_root = Path(__file__).resolve().parents[1]
+    try:
+        variants = load_variants(Path(args.variants))
+    except (OSError, ValueError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+    cases = run_codex_batch.load_cases(input_path, args.max_cases)
+    if not cases:
+        print(f"No cases loaded from {input_path}")
+        return 1
+
+    codex_home = (Path(args.codex_home) if args.codex_home else default_codex_home()).resolve()
+    base_skills = Path(args.skills_dir).resolve() if args.skills_dir else codex_home / "skills"
+    setups = {}
+    for variant in variants:
+        skills_dir, env = prepare_variant(variant, base_skills, output_dir / ".variants" / variant.name, codex_home)
+        (output_dir / variant.name).mkdir(parents=True, exist_ok=True)
+        setups[variant.name] = (codex_cache.skill_fingerprints(skills_dir), [*args.codex_arg, *variant.codex_args], env)
+
+    cache = None if args.no_cache else codex_cache.ResultCache(Path(args.cache_dir))
+    pending: Dict[str, MatrixJob] = {}
+    settled: Dict[str, Path] = {}
+    counts = {"hits": 0, "shared": 0}
+    for idx, case in enumerate(cases, start=1):
+        for variant in variants:
+            skills, codex_args, env = setups[variant.name]
+            output_path = output_dir / variant.name / f"{args.prefix}_{idx}.json"
+            label = f"Case {idx} [{variant.name}]"
+            inputs = codex_cache.cache_inputs(case["prompt"], skills, args.sandbox, codex_args, args.stop_on)
+            entry = {"key": codex_cache.cache_key(inputs), "inputs": inputs}
+            key = entry["key"]
+            if not args.overwrite:
+                recorded = codex_cache.recorded_entry(output_path) if output_path.exists() else None
+                if recorded is not None and recorded.get("key") == key:
+                    counts["hits"] += 1
+                    settled.setdefault(key, output_path)
+                    print(f"[hit ] {label} is up to date.")
+                    continue
+                if key in settled:
+                    copy_run(settled[key], output_path)
+                    counts["hits"] += 1
+                    print(f"[hit ] {label} copied from {settled[key].parent.name}/{settled[key].name}.")
+                    continue
+                if cache is not None and cache.restore(key, output_path):
+                    counts["hits"] += 1
+                    settled[key] = output_path
+                    print(f"[hit ] {label} restored from cache.")
+                    continue
+            job = pending.get(key)
+            if job is not None:
+                job.copies.append(output_path)
+                counts["shared"] += 1
+                print(f"[same] {label} shares the run of Case {job.idx} [{job.variant}].")
+                continue
+            pending[key] = MatrixJob(idx, case, variant.name, output_path, entry, codex_args, env, [])
+            print(f"[run ] {label} -> {output_path}")
+
+    policy = codex_retry.RetryPolicy(args.retries, args.backoff)
+    workers = max(1, min(args.parallel, len(pending)))
+    workdir_root = Path(args.workdir_root).resolve() if args.workdir_root else repo_root / "codex_tmp"
+    pool = codex_sandbox.SandboxPool(workdir_root, workers)
+
+    def run_job(job: MatrixJob) -> Tuple[MatrixJob, Tuple[int, bool, str, Dict[str, Any]]]:
+        with pool.lease() as work_dir:
+            outcome = run_codex_batch.run_single(
+                job.idx,
+                job.case,
+                job.output_path,
+                args.timeout,
+                repo_root,
+                work_dir,
+                args.sandbox,
+                args.stop_on,
+                policy,
+                None,
+                job.codex_args,
+                cache,
+                job.entry,
+                job.env,
+            )
+        if job.output_path.exists():
+            for target in job.copies:
+                copy_run(job.output_path, target)
+        return job, outcome
+
+    failed = 0
+
+    def report(results: Iterable[Tuple[MatrixJob, Tuple[int, bool, str, Dict[str, Any]]]]) -> None:
+        nonlocal failed
+        for job, (idx, success, message, _) in results:
+            if success:
+                print(f"[done] Case {idx} [{job.variant}] finished successfully.")
+            else:
+                failed += 1
+                print(f"[fail] Case {idx} [{job.variant}] failed: {message}")
+
+    start = time.monotonic()
+    jobs = ((job,) for job in pending.values())
+    try:
+        if workers > 1:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                report(run_codex_batch.bounded_map(executor, run_job, jobs, 2 * workers))
+        else:
+            report(run_job(*job) for job in jobs)
+    finally:
+        pool.close()
+    elapsed = time.monotonic() - start
+
+    rows = compare(cases, variants, output_dir, args.prefix)
+    table = render_table(rows, variants, args.summary_width)
+    (output_dir / "comparison.md").write_text(table, encoding="utf-8")
+    comparison = {
+        "manifest": str(input_path),
+        "variants": [
+            {
+                "name": variant.name,
+                "codex_args": setups[variant.name][1],
+                "skills": setups[variant.name][0],
+                **variant_totals(rows, variant.name),
+            }
+            for variant in variants
+        ],
+        "cases": rows,
+    }
+    (output_dir / "comparison.json").write_text(json.dumps(comparison, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(table, end="")
+    print(
+        f"[matrix] {len(cases)} cases x {len(variants)} variants: {len(pending)} runs ({failed} failed) "
+        f"in {elapsed:.1f}s, {counts['shared']} shared, {counts['hits']} hits -> {output_dir / 'comparison.md'}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
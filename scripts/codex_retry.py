@@ -0,0 +1,146 @@
+"""Retries, jittered exponential backoff and adaptive timeouts for codex runs.
+
+`run_with_retries` calls an attempt function (normally a bound `run_codex`) until
+it succeeds, the retry count is used up, or a `TimeBudget` runs out; every
+attempt is appended to the result's ``attempts`` list. Between attempts it sleeps
+a "full jitter" delay, uniform in ``[0, min(max_backoff, backoff * 2**n)]``, so
+parallel workers that failed together do not retry in lockstep.
+
+`AdaptiveTimeout` replaces a fixed per-case timeout once enough successful runs
+have been observed: the timeout becomes ``percentile(latencies) * factor``,
+clamped to ``[minimum, maximum]``. It is shared by the batch workers.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import namedtuple
+from typing import TYPE_CHECKING, Any, Callable, Dict, List
+
+if TYPE_CHECKING:
+    import random
+
+
+RetryPolicy = namedtuple("RetryPolicy", ["retries", "backoff", "max_backoff"], defaults=[0, 2.0, 60.0])
+
+
+def backoff_delay(policy: RetryPolicy, attempt: int, rng: random.Random | None = None) -> float:
+    """Seconds to wait after failed attempt number ``attempt`` (0-based)."""
+    import random
+
+    ceiling = min(policy.max_backoff, policy.backoff * (2**attempt))
+    return (rng or random).uniform(0.0, ceiling)
+
+
+class TimeBudget:
+    """Wall-clock allowance shared by every attempt of a batch (None = unlimited)."""
+
+    def __init__(self, seconds: float | None, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.deadline = None if seconds is None else clock() + seconds
+
+    def remaining(self) -> float | None:
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - self.clock())
+
+    def exhausted(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+
+class AdaptiveTimeout:
+    """Per-case timeout derived from the latencies of successful runs."""
+
+    def __init__(
+        self,
+        initial: float,
+        factor: float = 1.5,
+        percentile: float = 0.95,
+        minimum: float = 5.0,
+        maximum: float | None = None,
+        min_samples: int = 5,
+    ):
+        self.initial = initial
+        self.factor = factor
+        self.percentile = percentile
+        self.minimum = minimum
+        self.maximum = initial * 2 if maximum is None else maximum
+        self.min_samples = min_samples
+        self._samples: List[float] = []
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def current(self) -> float:
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return self.initial
+            ordered = sorted(self._samples)
+        observed = ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile))]
+        return min(self.maximum, max(self.minimum, observed * self.factor))
+
+
+def run_with_retries(
+    attempt: Callable[[float], Dict[str, Any]],
+    timeout: float,
+    policy: RetryPolicy = RetryPolicy(),
+    budget: TimeBudget | None = None,
+    sleep: Callable[[float], None] = time.sleep,
+    rng: random.Random | None = None,
+) -> Dict[str, Any]:
+    """Call ``attempt(timeout)`` until a result has ``success``; returns the last result.
+
+    Each attempt's timeout is capped by what is left of ``budget``, and no new
+    attempt (or backoff sleep) starts once the budget cannot cover it. The result
+    gains ``attempts``: one entry per try with its timeout, duration, outcome and
+    the tokens its turns used (from the attempt's digest), and ``budget_exhausted`` when it failed because the budget ran out.
+    """
+    history: List[Dict[str, Any]] = []
+    result: Dict[str, Any] | None = None
+    out_of_budget = False
+    for number in range(policy.retries + 1):
+        remaining = budget.remaining() if budget is not None else None
+        if remaining is not None and remaining <= 0:
+            out_of_budget = True
+            break
+        limit = timeout if remaining is None else min(timeout, remaining)
+        start = time.monotonic()
+        result = attempt(limit)
+        entry = {
+            "attempt": number + 1,
+            "timeout": round(limit, 3),
+            "duration": round(time.monotonic() - start, 3),
+            "success": bool(result.get("success")),
+            "exit_code": result.get("exit_code"),
+        }
+        if result.get("error"):
+            entry["error"] = result["error"]
+        tokens = (result.get("digest") or {}).get("tokens")
+        if tokens:
+            entry["tokens"] = tokens
+        history.append(entry)
+        if result.get("success") or number == policy.retries:
+            break
+        delay = backoff_delay(policy, number, rng)
+        remaining = budget.remaining() if budget is not None else None
+        if remaining is not None and remaining <= delay:
+            out_of_budget = True
+            break
+        entry["backoff"] = round(delay, 3)
+        sleep(delay)
+
+    if result is None:
+        result = {"success": False, "exit_code": None, "events": [], "error": "Time budget exhausted."}
+    if out_of_budget or (not result.get("success") and budget is not None and budget.exhausted()):
+        result["budget_exhausted"] = True
+    result["attempts"] = history
+    return result
+
+
+def successful_durations(result: Dict[str, Any]) -> List[float]:
+    """Durations of the successful attempts recorded in ``result``."""
+    return [entry["duration"] for entry in result.get("attempts", []) if entry.get("success")]
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""Read and write codex run results in the pretty JSON or the compact event-log format.
+
+The compact format (`*.jsonl.gz`) is a gzip stream of newline-delimited JSON: the
+first line is a header holding every result field except `events` plus
+`{"format": "codex-run", "version": 1}`, and each following line is one event in
+compact separators. The run metadata can be read without decompressing the events,
+and events can be iterated lazily one line at a time. Pretty JSON (`*.json`, the
+format `run_codex_exec.py` always wrote) stays readable through the same helpers.
+
+A result carrying a ``digest`` (see `codex_digest.py`) is written without it, and
+the digest goes to a ``<stem>.digest.json`` sidecar tagged with the run file's name
+and size, so readers that only need the digest never open the run itself.
+
+Usage:
+    python scripts/codex_runlog.py convert tests/fixtures/quote_card_trigger_cases_01.json
+    python scripts/codex_runlog.py cat run.jsonl.gz
+    python scripts/codex_runlog.py digest tests/fixtures/quote_card_trigger_cases_*.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+
+FORMAT = "codex-run"
+VERSION = 1
+COMPACT_SUFFIX = ".jsonl.gz"
+JSON_SUFFIX = ".json"
+DIGEST_SUFFIX = ".digest.json"
+
+
+def is_compact(path: Path) -> bool:
+    return path.name.endswith(".gz")
+
+
+def compact_path(path: Path) -> Path:
+    """``run.json`` -> ``run.jsonl.gz`` (other names just get the suffix appended)."""
+    name = path.name[: -len(JSON_SUFFIX)] if path.name.endswith(JSON_SUFFIX) else path.name
+    return path.with_name(name + COMPACT_SUFFIX)
+
+
+def digest_path(path: Path) -> Path:
+    """``run.json`` / ``run.jsonl.gz`` -> ``run.digest.json``."""
+    for suffix in (COMPACT_SUFFIX, JSON_SUFFIX):
+        if path.name.endswith(suffix):
+            return path.with_name(path.name[: -len(suffix)] + DIGEST_SUFFIX)
+    return path.with_name(path.name + DIGEST_SUFFIX)
+
+
+def find_run(path: Path) -> Path:
+    """Return ``path`` or, if only its compact sibling exists, that sibling."""
+    if path.exists() or is_compact(path):
+        return path
+    candidate = compact_path(path)
+    return candidate if candidate.exists() else path
+
+
+def _open_compact(path: Path):
+    import gzip
+
+    return gzip.open(path, "rt", encoding="utf-8")
+
+
+def write_run(path: Path, result: Dict[str, Any], compact: bool | None = None) -> None:
+    """Write ``result``; ``compact`` defaults to whether ``path`` ends in ``.gz``.
+
+    A ``digest`` key is moved to the sidecar, written after the run so its size is known.
+    """
+    if compact is None:
+        compact = is_compact(path)
+    digest = result.get("digest")
+    if digest is not None:
+        result = {key: value for key, value in result.items() if key != "digest"}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    if not compact:
+        tmp_path.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+    else:
+        import gzip
+        import io
+
+        header = {"format": FORMAT, "version": VERSION}
+        header.update((key, value) for key, value in result.items() if key != "events")
+        # No file name and mtime=0 in the gzip header: identical runs give identical bytes.
+        with open(tmp_path, "wb") as raw, gzip.GzipFile(
+            filename="", mode="wb", fileobj=raw, mtime=0
+        ) as gz, io.TextIOWrapper(gz, encoding="utf-8") as fh:
+            fh.write(json.dumps(header, ensure_ascii=False, separators=(",", ":")) + "\n")
+            for event in result.get("events", []):
+                fh.write(json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n")
+    os.replace(tmp_path, path)
+    if digest is not None:
+        write_digest(path, digest)
+
+
+def write_digest(path: Path, digest: Dict[str, Any]) -> None:
+    """Store ``digest`` as the sidecar of the run file ``path`` (which must exist)."""
+    sidecar = digest_path(path)
+    payload = {**digest, "source": {"name": path.name, "size": path.stat().st_size}}
+    tmp_path = sidecar.with_name(f".{sidecar.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp_path, sidecar)
+
+
+def load_digest(path: Path) -> Dict[str, Any] | None:
+    """The sidecar digest of ``path``, or None if it is missing, outdated or for another file."""
+    try:
+        digest = json.loads(digest_path(path).read_text(encoding="utf-8"))
+        size = path.stat().st_size
+    except (OSError, json.JSONDecodeError):
+        return None
+    if not isinstance(digest, dict) or digest.get("version") != _digest_module().DIGEST_VERSION:
+        return None
+    if digest.pop("source", None) != {"name": path.name, "size": size}:
+        return None
+    return digest
+
+
+def run_digest(path: Path) -> Dict[str, Any]:
+    """Digest of the run at ``path``: the sidecar when valid, else computed from the events."""
+    digest = load_digest(path)
+    if digest is not None:
+        return digest
+    return _digest_module().digest_events(iter_events(path))
+
+
+def _digest_module():
+    if __package__:
+        from . import codex_digest
+    else:
+        import codex_digest
+    return codex_digest
+
+
+def read_header(path: Path) -> Dict[str, Any]:
+    """Run metadata without events (only the first line is decompressed)."""
+    if not is_compact(path):
+        data = json.loads(path.read_text(encoding="utf-8"))
+        data.pop("events", None)
+        return data
+    with _open_compact(path) as fh:
+        return _parse_header(path, fh.readline())
+
+
+def _parse_header(path: Path, line: str) -> Dict[str, Any]:
+    try:
+        header = json.loads(line)
+    except json.JSONDecodeError:
+        header = None
+    if not isinstance(header, dict) or header.pop("format", None) != FORMAT:
+        raise ValueError(f"{path} is not a {FORMAT} log")
+    version = header.pop("version", None)
+    if version != VERSION:
+        raise ValueError(f"{path}: unsupported {FORMAT} version {version!r}")
+    return header
+
+
+def iter_events(path: Path) -> Iterator[Any]:
+    """Yield the run's events; lazily, one line at a time, for the compact format."""
+    if not is_compact(path):
+        yield from json.loads(path.read_text(encoding="utf-8")).get("events", [])
+        return
+    with _open_compact(path) as fh:
+        _parse_header(path, fh.readline())
+        for line in fh:
+            if line.strip():
+                yield json.loads(line)
+
+
+def load_run(path: Path) -> Dict[str, Any]:
+    """Full result dict, identical for both formats."""
+    if not is_compact(path):
+        return json.loads(path.read_text(encoding="utf-8"))
+    with _open_compact(path) as fh:
+        result = _parse_header(path, fh.readline())
+        # One decoder pass over the whole body beats a json.loads call per line.
+        lines = [line for line in fh.read().split("\n") if line.strip()]
+    result["events"] = json.loads("[" + ",".join(lines) + "]")
+    return result
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Convert or print codex run results.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    convert = subparsers.add_parser("convert", help="Rewrite runs in the other format next to the original.")
+    convert.add_argument("paths", nargs="+", help="Run files (.json or .jsonl.gz).")
+    convert.add_argument("--remove", action="store_true", help="Delete the original after converting.")
+    show = subparsers.add_parser("cat", help="Print a run as pretty JSON.")
+    show.add_argument("path")
+    digest = subparsers.add_parser("digest", help="(Re)build the digest sidecar of existing runs.")
+    digest.add_argument("paths", nargs="+", help="Run files (.json or .jsonl.gz).")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    if args.command == "cat":
+        json.dump(load_run(Path(args.path)), sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+        return 0
+    if args.command == "digest":
+        digest_events = _digest_module().digest_events
+        for name in args.paths:
+            source = Path(name)
+            write_digest(source, digest_events(iter_events(source)))
+            print(f"{source} -> {digest_path(source)}")
+        return 0
+    for name in args.paths:
+        source = Path(name)
+        if is_compact(source):
+            target = source.with_name(source.name[: -len(COMPACT_SUFFIX)] + JSON_SUFFIX)
+        else:
+            target = compact_path(source)
+        result = load_run(source)
+        result["digest"] = run_digest(source)
+        write_run(target, result, compact=not is_compact(source))
+        print(f"{source} ({source.stat().st_size} B) -> {target} ({target.stat().st_size} B)")
+        if args.remove:
+            source.unlink()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
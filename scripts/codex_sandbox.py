@@ -0,0 +1,234 @@
+"""Per-worker working directories for parallel codex runs.
+
+Every batch worker runs its case in its own sandbox instead of one shared
+``codex_tmp``, so concurrent cases cannot see or overwrite each other's notes.
+Each pool claims a directory ``<root>/pool-<k>`` by holding an flock on
+``<root>/pool-<k>.lock`` for its lifetime, and its workers use
+``<root>/pool-<k>/worker-<n>``; batch, matrix and shard runs sharing one root
+therefore never touch each other's sandboxes. Sandboxes are clones of a template
+directory (empty when there is none): a reflink (copy on write, Linux
+``FICLONE``) where the filesystem supports it, else a plain copy, or a hard link
+when asked for explicitly.
+
+A sandbox is reset before each lease by diffing it against a stat snapshot of the
+template taken when the pool is created: files and directories the template does
+not have are removed, files whose size or mtime changed are cloned again, and
+untouched files stay as they are. A case that writes one note therefore costs one
+unlink on reset, not a full ``rmtree`` and re-copy of the template.
+
+Hard links share their inode with the template, so a case that edits a template
+file in place also edits the template. The reset detects this (the linked file no
+longer matches the snapshot) and raises instead of handing out a corrupted sandbox,
+which is why ``clone="auto"`` never falls back to them.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import queue
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Dict, Iterator, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no fcntl
+    fcntl = None  # type: ignore[assignment]
+
+
+CLONE_METHODS = ("auto", "reflink", "hardlink", "copy")
+FICLONE = 0x40049409  # _IOW(0x94, 9, int) from linux/fs.h
+
+
+def reflink(source: Path, target: Path) -> None:
+    """Copy-on-write clone of ``source``; raises OSError where unsupported."""
+    if fcntl is None:
+        raise OSError("reflinks need fcntl")
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            target.unlink()
+            raise
+    shutil.copystat(source, target)
+
+
+def template_snapshot(template: Path | None) -> Dict[str, Tuple[bool, int, int]]:
+    """``{relative path: (is_dir, size, mtime_ns)}`` for everything under ``template``."""
+    snapshot: Dict[str, Tuple[bool, int, int]] = {}
+    if template is None:
+        return snapshot
+    for dirpath, dirnames, filenames in os.walk(template):
+        base = Path(dirpath)
+        for name in dirnames:
+            snapshot[(base / name).relative_to(template).as_posix()] = (True, 0, 0)
+        for name in filenames:
+            stat = (base / name).stat()
+            snapshot[(base / name).relative_to(template).as_posix()] = (False, stat.st_size, stat.st_mtime_ns)
+    return snapshot
+
+
+def template_fingerprint(template: Path | None) -> str | None:
+    """sha256 over the template's paths and file contents (None without a template)."""
+    if template is None:
+        return None
+    digest = hashlib.sha256()
+    for relative, (is_dir, _, _) in sorted(template_snapshot(template).items()):
+        digest.update(f"{'d' if is_dir else 'f'} {relative}\0".encode("utf-8"))
+        if not is_dir:
+            digest.update(hashlib.sha256((template / relative).read_bytes()).digest())
+    return digest.hexdigest()
+
+
+def claim_pool_dir(root: Path) -> tuple[Path, IO[bytes] | None]:
+    """Return the first ``root/pool-<k>`` no live process holds, and its held lock file.
+
+    Directories of pools that exited (or crashed) are reused, so their sandboxes
+    only need a reset. Without flock each process gets ``pool-<pid>``.
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    if fcntl is None:  # pragma: no cover - Windows
+        return root / f"pool-{os.getpid()}", None
+    number = 0
+    while True:
+        lock_fh = open(root / f"pool-{number}.lock", "ab")
+        try:
+            fcntl.flock(lock_fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_fh.close()
+            number += 1
+            continue
+        return root / f"pool-{number}", lock_fh
+
+
+class SandboxPool:
+    """Up to ``size`` sandboxes in a directory of ``root`` that only this pool uses.
+
+    The directory stays claimed until :meth:`close` (or process exit).
+    """
+
+    def __init__(self, root: Path, size: int, template: Path | None = None, clone: str = "auto"):
+        if clone not in CLONE_METHODS:
+            raise ValueError(f"unknown clone method {clone!r} (expected one of {', '.join(CLONE_METHODS)})")
+        if template is not None and not template.is_dir():
+            raise ValueError(f"sandbox template {template} is not a directory")
+        self.root = root
+        self.size = size
+        self.template = template
+        self.clone = clone
+        # Resolved on the first clone that fails: "auto" degrades reflink -> copy.
+        self.method = "reflink" if clone == "auto" else clone
+        self.snapshot = template_snapshot(template)
+        self.resets = 0
+        self.removed = 0
+        self.recloned = 0
+        self._free: queue.LifoQueue = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self.dir, self._lock_fh = claim_pool_dir(root)
+        self.dir.mkdir(exist_ok=True)
+        names = {f"worker-{n}" for n in range(size)}
+        # Sandboxes of a larger pool that used this directory before.
+        for entry in self.dir.iterdir():
+            if entry.name.startswith("worker-") and entry.name not in names:
+                _remove(entry)
+
+    def close(self) -> None:
+        """Release the pool directory for the next pool (the sandboxes are kept)."""
+        if self._lock_fh is not None:
+            self._lock_fh.close()
+            self._lock_fh = None
+
+    @contextmanager
+    def lease(self) -> Iterator[Path]:
+        """A freshly reset sandbox, returned to the pool on exit."""
+        try:
+            path = self._free.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                number = self._created if self._created < self.size else None
+                if number is not None:
+                    self._created += 1
+            path = self.dir / f"worker-{number}" if number is not None else self._free.get()
+        try:
+            self.reset(path)
+            yield path
+        finally:
+            self._free.put(path)
+
+    def reset(self, path: Path) -> None:
+        """Make ``path`` match the template again, touching only what differs."""
+        path.mkdir(parents=True, exist_ok=True)
+        seen = set()
+        removed = recloned = 0
+        for dirpath, dirnames, filenames in os.walk(path):
+            base = Path(dirpath)
+            for name in list(dirnames):
+                relative = (base / name).relative_to(path).as_posix()
+                expected = self.snapshot.get(relative)
+                if expected is None or not expected[0] or (base / name).is_symlink():
+                    dirnames.remove(name)
+                    _remove(base / name)
+                    removed += 1
+                else:
+                    seen.add(relative)
+            for name in filenames:
+                relative = (base / name).relative_to(path).as_posix()
+                expected = self.snapshot.get(relative)
+                if expected is None or expected[0]:
+                    _remove(base / name)
+                    removed += 1
+                    continue
+                stat = (base / name).lstat()
+                if (False, stat.st_size, stat.st_mtime_ns) == expected:
+                    seen.add(relative)
+                    continue
+                self._check_template(base / name, relative)
+                _remove(base / name)
+                removed += 1
+        for relative in sorted(set(self.snapshot) - seen):
+            target = path / relative
+            if self.snapshot[relative][0]:
+                target.mkdir(parents=True, exist_ok=True)
+            else:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                self._clone_file(self.template / relative, target)
+                recloned += 1
+        with self._lock:
+            self.resets += 1
+            self.removed += removed
+            self.recloned += recloned
+
+    def _check_template(self, sandbox_file: Path, relative: str) -> None:
+        if self.template is None or not (self.template / relative).exists():
+            return
+        if os.path.samefile(sandbox_file, self.template / relative):
+            raise RuntimeError(
+                f"{relative} was modified in place through a hard link, which changed the template "
+                f"{self.template}; restore it and use the copy clone method"
+            )
+
+    def _clone_file(self, source: Path, target: Path) -> None:
+        if self.method == "reflink":
+            try:
+                reflink(source, target)
+                return
+            except OSError:
+                if self.clone != "auto":
+                    raise
+                self.method = "copy"
+        if self.method == "hardlink":
+            os.link(source, target)
+            return
+        shutil.copy2(source, target)
+
+
+def _remove(path: Path) -> None:
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path)
+    else:
+        path.unlink(missing_ok=True)
@@ -0,0 +1,155 @@
+"""AIMD concurrency limit for batch runs.
+
+Workers call :meth:`AimdLimiter.acquire` before starting a case and
+:meth:`AimdLimiter.release` with its outcome afterwards. The limit grows by
+``increase`` once a full window of cases (as many as the current limit) has
+finished healthy, and is multiplied by ``decrease`` as soon as one case shows
+congestion: a timeout, a non-zero exit or rate-limit-looking stderr. Latency is
+only judged when ``latency_factor`` is set: a case slower than that many times the
+median of the last ``latency_window`` successful cases is congestion too (cases
+vary, and `--stop-on` ends some early, so this is opt-in). Cases released as
+``neutral`` (codex never started) free their slot and count neither way. Only cases
+started after the last decrease can trigger another one, so a burst of failures
+from the same overloaded window halves the limit once, not once per failure; for
+the same reason only those cases count towards the next healthy window.
+
+Every change is recorded in ``decisions`` (and appended to ``log_path`` as JSONL).
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import statistics
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Callable, Dict, List
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+RATE_LIMIT_RE = re.compile(r"\b429\b|rate[ _-]?limit|too many requests|quota exceeded|overloaded", re.IGNORECASE)
+# Successful cases needed before latency is judged at all.
+MIN_LATENCY_SAMPLES = 5
+
+
+def congestion_reason(summary: Dict[str, Any]) -> str | None:
+    """Why a case result signals overload (None when it looks healthy).
+
+    ``summary`` is a run result (with or without events); every attempt counts, so a
+    case that only succeeded on retry still reports the failure it recovered from.
+    """
+    if RATE_LIMIT_RE.search(summary.get("stderr") or ""):
+        return "rate limit"
+    for attempt in summary.get("attempts") or [summary]:
+        if attempt.get("success", True):
+            continue
+        error = attempt.get("error") or ""
+        if error.startswith("Timed out"):
+            return "timeout"
+        return f"exit {attempt.get('exit_code')}" if attempt.get("exit_code") is not None else error or "failure"
+    return None
+
+
+def case_latency(summary: Dict[str, Any]) -> float | None:
+    """Duration of the successful attempt of a case result."""
+    for attempt in reversed(summary.get("attempts") or []):
+        if attempt.get("success"):
+            return attempt.get("duration")
+    return None
+
+
+class AimdLimiter:
+    """Additive-increase / multiplicative-decrease limit on cases in flight."""
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int = 1,
+        maximum: int = 32,
+        increase: int = 1,
+        decrease: float = 0.5,
+        latency_factor: float | None = None,
+        latency_window: int = 20,
+        log_path: Path | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if not 1 <= minimum <= maximum:
+            raise ValueError(f"invalid concurrency bounds {minimum}..{maximum}")
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = min(maximum, max(minimum, initial))
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.log_path = log_path
+        self.clock = clock
+        self.in_flight = 0
+        self.peak = 0
+        self.decisions: List[Dict[str, Any]] = []
+        self.recent: deque[float] = deque(maxlen=latency_window)
+        self._healthy_streak = 0
+        self._started = 0
+        self._last_decrease = -1
+        self._start_time = clock()
+        self._cond = threading.Condition()
+
+    def acquire(self) -> int:
+        """Wait for a free slot; returns the case's start number, to pass to :meth:`release`."""
+        with self._cond:
+            while self.in_flight >= self.limit:
+                self._cond.wait()
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            self._started += 1
+            return self._started
+
+    def release(
+        self, ticket: int, reason: str | None = None, latency: float | None = None, neutral: bool = False
+    ) -> None:
+        """Finish a case; ``reason`` is its congestion reason (see :func:`congestion_reason`).
+
+        ``neutral`` cases (spawn errors, cases the time budget never let start) say
+        nothing about the backend and only free their slot.
+        """
+        with self._cond:
+            self.in_flight -= 1
+            if neutral:
+                self._cond.notify_all()
+                return
+            if reason is None and latency is not None and self.latency_factor:
+                if len(self.recent) >= MIN_LATENCY_SAMPLES:
+                    median = statistics.median(self.recent)
+                    if latency > median * self.latency_factor:
+                        reason = f"latency {latency:.2f}s > {self.latency_factor:g}x median {median:.2f}s"
+                self.recent.append(latency)
+            if reason is not None:
+                self._healthy_streak = 0
+                if ticket > self._last_decrease:
+                    self._last_decrease = self._started
+                    self._set_limit(max(self.minimum, int(self.limit * self.decrease)), "decrease", reason)
+            elif ticket > self._last_decrease:
+                self._healthy_streak += 1
+                if self._healthy_streak >= self.limit and self.limit < self.maximum:
+                    self._healthy_streak = 0
+                    self._set_limit(min(self.maximum, self.limit + self.increase), "increase", "window healthy")
+            self._cond.notify_all()
+
+    def _set_limit(self, limit: int, action: str, reason: str) -> None:
+        if limit == self.limit:
+            return
+        decision = {
+            "t": round(self.clock() - self._start_time, 3),
+            "action": action,
+            "from": self.limit,
+            "to": limit,
+            "reason": reason,
+            "in_flight": self.in_flight,
+        }
+        self.limit = limit
+        self.decisions.append(decision)
+        if self.log_path is not None:
+            with self.log_path.open("a", encoding="utf-8") as fh:
+                fh.write(json.dumps(decision, ensure_ascii=False) + "\n")
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""Split a batch manifest across runners and merge the per-shard results.
+
+`run_codex_batch.py --shard i/N` only runs the cases whose shard is ``i``
+(0 <= i < N). A case's shard is the sha256 of its ``id`` (or, without one, its
+prompt) modulo N, so it does not depend on the runner, the Python version or the
+case's position in the manifest, and a rerun lands on the same shard. Cases keep
+their manifest-wide numbers, so every shard writes the same output names it would
+in an unsharded run, plus its own checkpoint journal (codex_journal.py).
+
+`merge` combines shard directories (each holding a journal and the outputs it
+lists, e.g. copied back from the runner hosts) into one result set: the outputs
+and their digest sidecars are copied into ``--output-dir`` next to a merged
+journal. Outputs are found where the journal recorded them: relative to the
+journal, or at their absolute path (a case's ``log_file``). They keep their path
+relative to the shard directory, or their file name for absolute ones. Nothing
+is copied unless every manifest case was finished by exactly one shard and no
+two results would land on the same name; duplicates, missing cases, name
+collisions and prompts that no longer match the manifest are all reported.
+
+Usage:
+    python scripts/run_codex_batch.py --input-file cases.jsonl --output-dir out/shard0 --shard 0/4
+    python scripts/codex_shard.py merge --manifest cases.jsonl --output-dir out/all out/shard*/*.journal.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+if __package__:
+    from . import codex_journal, codex_runlog
+else:  # run as a script from scripts/
+    import codex_journal
+    import codex_runlog
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """``"i/N"`` -> ``(i, N)``; raises ValueError unless 0 <= i < N."""
+    index, sep, count = spec.partition("/")
+    try:
+        shard = (int(index), int(count))
+    except ValueError:
+        shard = None
+    if not sep or shard is None or not 0 <= shard[0] < shard[1]:
+        raise ValueError(f"invalid shard {spec!r} (expected i/N with 0 <= i < N)")
+    return shard
+
+
+def shard_of(case: Dict[str, Any], count: int) -> int:
+    key = case.get("id")
+    key = str(key) if key is not None else case["prompt"]
+    return int(hashlib.sha256(key.encode("utf-8")).hexdigest()[:16], 16) % count
+
+
+def merge(
+    journals: List[Path], manifest: Path, max_cases: int | None = None
+) -> Tuple[Dict[int, Dict[str, Any]], List[str]]:
+    """Check ``journals`` against ``manifest``; returns ``(entries, errors)``.
+
+    ``entries`` maps case numbers to their journal entry, with ``output`` pointing
+    at the result file and ``target`` holding its name in the merged directory.
+    Nothing is written; callers only go on to :func:`copy_results` when ``errors``
+    is empty.
+    """
+    if __package__:
+        from .run_codex_batch import iter_cases
+    else:
+        from run_codex_batch import iter_cases
+
+    errors: List[str] = []
+    owners: Dict[int, Path] = {}
+    entries: Dict[int, Dict[str, Any]] = {}
+    targets: Dict[str, int] = {}
+    for journal in journals:
+        for case, entry in codex_journal.read_journal(journal).items():
+            if entry.get("status") not in codex_journal.SETTLED:
+                continue
+            if case in owners:
+                errors.append(f"case {case}: finished in both {owners[case]} and {journal}")
+                continue
+            owners[case] = journal
+            output, target = locate_output(journal, entry["output"])
+            if entry["status"] != "failed" and not output.exists():
+                errors.append(f"case {case}: result {output} listed in {journal} is missing")
+            if target in targets:
+                errors.append(f"case {case}: result name {target} is also used by case {targets[target]}")
+            targets[target] = case
+            entries[case] = {**entry, "output": str(output), "target": target}
+    expected = set()
+    for idx, case in enumerate(iter_cases(manifest, max_cases), start=1):
+        expected.add(idx)
+        entry = entries.get(idx)
+        if entry is None:
+            errors.append(f"case {idx}: not finished by any shard")
+        elif entry["prompt"] != codex_journal.prompt_hash(case["prompt"]):
+            errors.append(f"case {idx}: prompt in {owners[idx]} does not match {manifest.name}")
+    for case in sorted(set(entries) - expected):
+        errors.append(f"case {case}: in {owners[case]} but not in {manifest.name}")
+    return entries, errors
+
+
+def locate_output(journal: Path, recorded: str) -> Tuple[Path, str]:
+    """``(path of the result, its name in the merged directory)`` for a journal's ``output``."""
+    path = Path(recorded)
+    if not path.is_absolute():
+        return journal.parent / path, path.as_posix()
+    # Journals written before outputs were recorded relative to them hold absolute paths;
+    # a shard directory copied back from its runner has the result beside the journal.
+    local = journal.parent / path.name
+    if not path.exists() and local.exists():
+        return local, path.name
+    return path, path.name
+
+
+def copy_results(entries: Dict[int, Dict[str, Any]], output_dir: Path, manifest: Path, journal_name: str) -> int:
+    """Copy every result (and digest sidecar) into ``output_dir``; write the merged journal."""
+    import shutil
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    journal = codex_journal.Journal(output_dir / journal_name, manifest)
+    copied = 0
+    for case in sorted(entries):
+        entry = dict(entries[case])
+        source = Path(entry["output"])
+        target = output_dir / entry.pop("target")
+        if source.exists():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(source, target)
+            copied += 1
+            sidecar = codex_runlog.digest_path(source)
+            if sidecar.exists():
+                shutil.copy2(sidecar, codex_runlog.digest_path(target))
+        journal.append({**entry, "output": journal.output_ref(target)})
+    journal.close()
+    return copied
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Merge the results of a sharded batch run.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    merge_cmd = subparsers.add_parser("merge", help="Combine per-shard outputs and journals.")
+    merge_cmd.add_argument("journals", nargs="+", help="Shard journals; outputs are looked up beside them.")
+    merge_cmd.add_argument("--manifest", required=True, help="The manifest every shard ran.")
+    merge_cmd.add_argument("--output-dir", required=True, help="Directory for the merged result set.")
+    merge_cmd.add_argument("--max-cases", type=int, help="The --max-cases the shards ran with.")
+    merge_cmd.add_argument(
+        "--journal-name",
+        default="merged.journal.jsonl",
+        help="File name of the merged journal (default: merged.journal.jsonl).",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    manifest = Path(args.manifest)
+    entries, errors = merge([Path(name) for name in args.journals], manifest, args.max_cases)
+    if errors:
+        for error in errors:
+            print(f"Error: {error}", file=sys.stderr)
+        print(f"Not merged: {len(errors)} problems in {len(args.journals)} journals.", file=sys.stderr)
+        return 1
+    copied = copy_results(entries, Path(args.output_dir), manifest, args.journal_name)
+    failed = sum(entry["status"] == "failed" for entry in entries.values())
+    print(f"Merged {len(entries)} cases ({failed} failed) from {len(args.journals)} journals; {copied} results copied.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
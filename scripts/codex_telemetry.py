@@ -0,0 +1,226 @@
+"""Latency and throughput report of a batch run.
+
+The batch runner feeds every settled case to `BatchTelemetry.add` as a small
+record (`case_record`): wall time, time to the first codex event, event count,
+token usage summed over the ``turn.completed`` events of every attempt and, for
+failures, a failure type.
+The same fields go into the checkpoint journal, so per-case numbers are kept
+there; the telemetry itself only keeps the latencies (for percentiles), counters
+and the slowest cases.
+
+`BatchTelemetry.report` returns the summary as a dict (written as JSON) and
+`prometheus` renders it in the Prometheus text exposition format, with optional
+constant labels (e.g. ``skill_version="0.2.0"``) so runs can be compared in a
+dashboard or a textfile collector.
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import re
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Sequence, Tuple
+
+if __package__:
+    from . import codex_digest
+else:  # run as a script from scripts/
+    import codex_digest
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+QUANTILES = (0.5, 0.9, 0.99)
+LABEL_RE = re.compile(r"^[a-zA-Z_][a-zA-Z0-9_]*$")
+
+
+def failure_type(success: bool, message: str, summary: Dict[str, Any]) -> str | None:
+    """Coarse failure class of a case outcome (None for successes)."""
+    if success:
+        return None
+    if summary.get("budget_exhausted") and not summary.get("attempts"):
+        return "budget exhausted"
+    if message.startswith("Could not start codex"):
+        return "spawn error"
+    if __package__:
+        from . import codex_scheduler
+    else:  # run as a script from scripts/
+        import codex_scheduler
+
+    return codex_scheduler.congestion_reason(summary) or "failure"
+
+
+def case_tokens(summary: Dict[str, Any]) -> Dict[str, float]:
+    """Tokens of every turn of every attempt (retried attempts cost tokens too)."""
+    per_attempt = [attempt.get("tokens") or {} for attempt in summary.get("attempts") or []]
+    if not any(per_attempt):
+        per_attempt = [(summary.get("digest") or {}).get("tokens") or {}]
+    total: Dict[str, float] = {}
+    for tokens in per_attempt:
+        codex_digest.add_tokens(total, tokens)
+    return total
+
+
+def case_record(outcome: Tuple[int, bool, str, Dict[str, Any]], wall: float) -> Dict[str, Any]:
+    idx, success, message, summary = outcome
+    digest = summary.get("digest") or {}
+    record: Dict[str, Any] = {
+        "case": idx,
+        "success": success,
+        "wall": round(wall, 3),
+        "first_event": (summary.get("timing") or {}).get("first_event"),
+        "events": digest.get("event_count", 0),
+        "tokens": case_tokens(summary),
+    }
+    kind = failure_type(success, message, summary)
+    if kind is not None:
+        record["failure"] = kind
+    return record
+
+
+def quantile(ordered: Sequence[float], q: float) -> float | None:
+    """Nearest-rank quantile of an already sorted sequence."""
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+class BatchTelemetry:
+    """Aggregates case records; keeps latencies and the ``slowest`` cases only.
+
+    Cases skipped because the time budget ran out count as failures but stay out of
+    the latency figures. :meth:`add` may be called from several worker threads.
+    """
+
+    def __init__(self, slowest: int = 10):
+        self.walls: List[float] = []
+        self.first_events: List[float] = []
+        self.succeeded = 0
+        self.failures: Dict[str, int] = {}
+        self.events = 0
+        self.tokens: Dict[str, float] = {}
+        self._slowest: List[Tuple[float, int, Dict[str, Any]]] = []
+        self._keep = slowest
+        self._lock = threading.Lock()
+
+    def add(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._add(record)
+
+    def _add(self, record: Dict[str, Any]) -> None:
+        if record.get("failure") == "budget exhausted":
+            self.failures["budget exhausted"] = self.failures.get("budget exhausted", 0) + 1
+            return
+        self.walls.append(record["wall"])
+        if record.get("first_event") is not None:
+            self.first_events.append(record["first_event"])
+        if record["success"]:
+            self.succeeded += 1
+        else:
+            kind = record.get("failure", "failure")
+            self.failures[kind] = self.failures.get(kind, 0) + 1
+        self.events += record.get("events", 0)
+        for key, value in record.get("tokens", {}).items():
+            self.tokens[key] = self.tokens.get(key, 0) + value
+        entry = (record["wall"], -record["case"], record)
+        if len(self._slowest) < self._keep:
+            heapq.heappush(self._slowest, entry)
+        elif entry > self._slowest[0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        walls = sorted(self.walls)
+        first_events = sorted(self.first_events)
+        failed = sum(self.failures.values())
+        cases = self.succeeded + failed
+        return {
+            "cases": cases,
+            "succeeded": self.succeeded,
+            "failed": failed,
+            "elapsed": round(elapsed, 3),
+            "cases_per_minute": round(cases * 60 / elapsed, 2) if elapsed > 0 else None,
+            "latency": _distribution(walls),
+            "time_to_first_event": _distribution(first_events),
+            "events": self.events,
+            "tokens": self.tokens,
+            "failures": dict(sorted(self.failures.items())),
+            "slowest": [
+                {key: record[key] for key in ("case", "wall", "first_event", "success") if key in record}
+                for _, _, record in sorted(self._slowest, reverse=True)
+            ],
+        }
+
+
+def _distribution(ordered: Sequence[float]) -> Dict[str, Any]:
+    stats: Dict[str, Any] = {f"p{round(q * 100)}": quantile(ordered, q) for q in QUANTILES}
+    stats["max"] = ordered[-1] if ordered else None
+    stats["sum"] = round(sum(ordered), 3)
+    stats["count"] = len(ordered)
+    return stats
+
+
+def parse_label(spec: str) -> Tuple[str, str]:
+    """``name=value`` -> ``(name, value)`` for --telemetry-label."""
+    name, sep, value = spec.partition("=")
+    if not sep or not LABEL_RE.match(name):
+        raise ValueError(f"invalid label {spec!r} (expected name=value)")
+    return name, value
+
+
+def prometheus(report: Dict[str, Any], labels: Dict[str, str] | None = None) -> str:
+    """``report`` in the Prometheus text exposition format (version 0.0.4)."""
+    lines: List[str] = []
+
+    def sample(name: str, value: Any, extra: Dict[str, str] | None = None) -> None:
+        if value is None:
+            return
+        merged = {**(labels or {}), **(extra or {})}
+        rendered = ",".join(f'{key}="{_escape(val)}"' for key, val in merged.items())
+        lines.append(f"{name}{{{rendered}}} {value}" if rendered else f"{name} {value}")
+
+    def header(name: str, kind: str, text: str) -> None:
+        lines.append(f"# HELP {name} {text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    summaries = (
+        ("codex_batch_case_duration_seconds", "latency", "Wall time per case."),
+        ("codex_batch_time_to_first_event_seconds", "time_to_first_event", "Seconds until the first codex event."),
+    )
+    for name, key, text in summaries:
+        stats = report[key]
+        header(name, "summary", text)
+        for q in QUANTILES:
+            sample(name, stats[f"p{round(q * 100)}"], {"quantile": f"{q:g}"})
+        sample(f"{name}_sum", stats["sum"])
+        sample(f"{name}_count", stats["count"])
+
+    header("codex_batch_cases", "gauge", "Cases settled in this run by outcome.")
+    sample("codex_batch_cases", report["succeeded"], {"outcome": "success"})
+    sample("codex_batch_cases", report["failed"], {"outcome": "failure"})
+    header("codex_batch_failures", "gauge", "Failed cases by failure type.")
+    for kind, count in report["failures"].items():
+        sample("codex_batch_failures", count, {"type": kind})
+    header("codex_batch_cases_per_minute", "gauge", "Throughput of the run.")
+    sample("codex_batch_cases_per_minute", report["cases_per_minute"])
+    header("codex_batch_elapsed_seconds", "gauge", "Wall time of the whole run.")
+    sample("codex_batch_elapsed_seconds", report["elapsed"])
+    header("codex_batch_events", "gauge", "Codex events received.")
+    sample("codex_batch_events", report["events"])
+    header("codex_batch_tokens", "gauge", "Token usage reported by codex, by usage field.")
+    for kind, count in sorted(report["tokens"].items()):
+        sample("codex_batch_tokens", count, {"kind": kind})
+    return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def write_report(path: Path, report: Dict[str, Any], labels: Dict[str, str]) -> Path:
+    """Write ``path`` (JSON) and the Prometheus text beside it as ``.prom``; returns the latter."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({**report, "labels": labels}, ensure_ascii=False, indent=2), encoding="utf-8")
+    prom_path = path.with_suffix(".prom")
+    prom_path.write_text(prometheus(report, labels), encoding="utf-8")
+    return prom_path
@@ -1,18 +1,80 @@
 #!/usr/bin/env python3
-"""Batch runner that feeds prompts to run_codex_exec.py."""
+"""Batch runner that feeds prompts to `run_codex()`.
+
+Cases run in this process: each one calls `run_codex_exec.run_codex()` directly
+(in a worker thread when `--parallel` > 1), the runner writes the result files
+itself and keeps every result, minus its events, in memory for the closing
+summary. Cases run inline when `--parallel` is 1; `concurrent.futures` (which
+pulls in `logging`) is only imported when needed.
+
+Results are cached by content (codex_cache.py): a case is only run again when its
+prompt, a SKILL.md, the sandbox mode, `--codex-arg`, `--stop-on` or the
+`--workdir-template` contents changed, and each case is reported as a cache hit
+or a miss with the reason.
+
+Every worker runs codex in its own directory, `<workdir-root>/pool-<k>/worker-<n>`
+(codex_sandbox.py; `--workdir-root` defaults to `codex_tmp`), cloned from
+`--workdir-template` (empty by default) and reset between cases by removing only
+what the previous case changed, so parallel cases never share a working directory.
+The pool directory is locked while the batch runs, so other batch, matrix or shard
+runs on the same root use their own.
+
+`--adaptive-parallel` replaces the fixed worker count with an AIMD limit
+(codex_scheduler.py) between `--min-parallel` and `--max-parallel`, starting at
+`--parallel`; `--concurrency-log` records each change of the limit.
+
+The manifest is streamed: cases are planned one line at a time and at most
+`--queue-size` of them are waiting for a worker, so a huge manifest never sits
+in memory. Every settled case is appended to a checkpoint journal
+(codex_journal.py, `--journal`); `--resume` skips the cases it records as
+finished (done or served from the cache) and runs the rest: failed cases and any
+that were in flight when a previous run died.
+
+`--shard i/N` runs only the cases whose stable hash falls on shard i of N
+(codex_shard.py), keeping their manifest-wide numbers and writing a journal per
+shard; `codex_shard.py merge` puts the shards back together.
+
+Each case's wall time, time to first event, event count and token usage are
+journaled, and the run ends with a latency/throughput report (codex_telemetry.py):
+p50/p90/p99, cases per minute, failures by type and the slowest cases, written as
+`--telemetry` JSON plus a Prometheus `.prom` file next to it.
+
+`--retries` applies to every case. `--time-budget` bounds the whole batch:
+each case only gets what is left of it, and cases not yet started when it runs
+out are skipped. With `--adaptive-timeout FACTOR` the per-case timeout follows the
+observed latency (percentile of successful attempts x FACTOR) once a few cases
+have finished; `--timeout` is used until then.
+"""
 
 from __future__ import annotations
 
 import argparse
 import json
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-import shutil
-import subprocess
-from typing import Any, Dict, List
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Sequence
 
+if __package__:
+    from . import codex_retry, codex_runlog, run_codex_exec
+else:  # run as a script from scripts/
+    import codex_retry
+    import codex_runlog
+    import run_codex_exec
 
-def parse_args() -> argparse.Namespace:
+# Cache, journal, sandbox, scheduler, shard and telemetry modules are imported by
+# the code paths that use them (see _sibling), not when this module is loaded.
+if TYPE_CHECKING:
+    import codex_cache
+
+
+def _sibling(name: str) -> Any:
+    """Import the sibling module ``name`` of scripts/ on first use."""
+    import importlib
+
+    return importlib.import_module(f"{__package__}.{name}" if __package__ else name)
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Batch Codex exec runner for JSONL prompts.")
     parser.add_argument(
         "--input-file",
@@ -33,13 +95,42 @@ def parse_args() -> argparse.Namespace:
         "--timeout",
         type=float,
         default=60.0,
-        help="Timeout (seconds) for each run_codex_exec invocation (default: 60).",
+        help="Timeout (seconds) for each codex run (default: 60).",
     )
     parser.add_argument(
         "--parallel",
         type=int,
         default=1,
-        help="Number of parallel workers (default: 1).",
+        help="Number of parallel workers; the starting limit with --adaptive-parallel (default: 1).",
+    )
+    parser.add_argument(
+        "--adaptive-parallel",
+        action="store_true",
+        help="Adjust concurrency with AIMD: grow while cases stay healthy, halve on "
+        "timeouts, non-zero exits or rate-limit errors (and latency spikes with --latency-factor).",
+    )
+    parser.add_argument(
+        "--min-parallel",
+        type=int,
+        default=1,
+        help="Lower bound for --adaptive-parallel (default: 1).",
+    )
+    parser.add_argument(
+        "--max-parallel",
+        type=int,
+        default=16,
+        help="Upper bound for --adaptive-parallel (default: 16).",
+    )
+    parser.add_argument(
+        "--latency-factor",
+        type=float,
+        default=0.0,
+        help="With --adaptive-parallel, a case slower than FACTOR x the median of recent successful "
+        "cases counts as congestion (default: 0, off).",
+    )
+    parser.add_argument(
+        "--concurrency-log",
+        help="Append every --adaptive-parallel decision to this JSONL file.",
     )
     parser.add_argument(
         "--max-cases",
@@ -49,97 +140,522 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--overwrite",
         action="store_true",
-        help="Overwrite existing output files (default: skip existing).",
+        help="Rerun every case, ignoring cached and existing results.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Disable the result cache: skip a case whenever its output file exists.",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="Directory of the content-addressed result cache (default: .codex_cache).",
+    )
+    parser.add_argument(
+        "--skills-dir",
+        help="Skills whose SKILL.md files are part of the cache key (default: skills).",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Write results as compressed `.jsonl.gz` event logs instead of pretty JSON.",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=0,
+        help="Retries per failed case with jittered exponential backoff (default: 0).",
+    )
+    parser.add_argument(
+        "--backoff",
+        type=float,
+        default=2.0,
+        help="Base backoff delay between retries in seconds (default: 2).",
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        help="Total seconds for the whole batch, retries included (default: unlimited).",
+    )
+    parser.add_argument(
+        "--adaptive-timeout",
+        type=float,
+        metavar="FACTOR",
+        help="Derive each case's timeout from observed latency: percentile x FACTOR (e.g. 1.5).",
+    )
+    parser.add_argument(
+        "--timeout-percentile",
+        type=float,
+        default=0.95,
+        help="Latency percentile used by --adaptive-timeout (default: 0.95).",
+    )
+    parser.add_argument(
+        "--min-timeout",
+        type=float,
+        default=5.0,
+        help="Lower bound for adaptive timeouts in seconds (default: 5).",
+    )
+    parser.add_argument(
+        "--max-timeout",
+        type=float,
+        help="Upper bound for adaptive timeouts in seconds (default: twice --timeout).",
+    )
+    parser.add_argument(
+        "--codex-arg",
+        action="append",
+        default=[],
+        help="Additional argument passed to `codex exec` for every case (repeatable; part of the cache key).",
+    )
+    parser.add_argument(
+        "--sandbox",
+        default="workspace-write",
+        help="Sandbox mode passed to `codex exec --sandbox` (default: workspace-write).",
+    )
+    parser.add_argument(
+        "--shard",
+        metavar="I/N",
+        help="Run only shard I of N (0-based); cases are assigned by a hash of their id or prompt.",
+    )
+    parser.add_argument(
+        "--telemetry",
+        help="Where to write the telemetry report (JSON; the Prometheus text goes beside it "
+        "as .prom; default: <output-dir>/<journal name>.telemetry.json).",
+    )
+    parser.add_argument(
+        "--telemetry-label",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="Constant label for every Prometheus sample, e.g. skill_version=0.2.0 (repeatable).",
+    )
+    parser.add_argument(
+        "--slowest",
+        type=int,
+        default=10,
+        help="Number of slowest cases listed in the telemetry report (default: 10).",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        help="Cases planned ahead of the workers (default: 2 x workers).",
+    )
+    parser.add_argument(
+        "--journal",
+        help="Checkpoint journal (JSONL, one line per finished case; default: "
+        "<output-dir>/<prefix>.journal.jsonl, or <prefix>.shard-I-of-N.journal.jsonl with --shard).",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted batch: skip cases the journal records as done or cached; "
+        "failed cases run again.",
+    )
+    parser.add_argument(
+        "--workdir-template",
+        help="Directory every worker's codex working directory starts as a copy of (default: empty).",
+    )
+    parser.add_argument(
+        "--workdir-clone",
+        default="auto",
+        help="How template files are cloned: reflink, hardlink or copy; auto uses reflinks where "
+        "the filesystem supports them, else copies (default: auto). Hard links are only safe if "
+        "codex never edits template files in place.",
+    )
+    parser.add_argument(
+        "--workdir-root",
+        help="Directory holding the workers' sandboxes; each run claims its own pool-<k> "
+        "directory in it (default: codex_tmp in the repository).",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--stop-on",
+        action="append",
+        default=[],
+        metavar="PREDICATE",
+        help="Stop a case as soon as an event matches (repeatable; see run_codex_exec.py --stop-on).",
+    )
+    args = parser.parse_args(argv)
+    try:
+        args.stop_on = [run_codex_exec.parse_predicate(spec) for spec in args.stop_on]
+    except ValueError as exc:
+        parser.error(str(exc))
+    if args.workdir_clone != "auto":
+        methods = _sibling("codex_sandbox").CLONE_METHODS
+        if args.workdir_clone not in methods:
+            parser.error(f"--workdir-clone must be one of {', '.join(methods)}")
+    if args.telemetry_label:
+        try:
+            args.telemetry_label = dict(_sibling("codex_telemetry").parse_label(spec) for spec in args.telemetry_label)
+        except ValueError as exc:
+            parser.error(str(exc))
+    else:
+        args.telemetry_label = {}
+    if args.shard is not None:
+        try:
+            args.shard = _sibling("codex_shard").parse_shard(args.shard)
+        except ValueError as exc:
+            parser.error(str(exc))
+    if args.workdir_template and not Path(args.workdir_template).is_dir():
+        parser.error(f"--workdir-template {args.workdir_template} is not a directory")
+    if args.adaptive_parallel and not 1 <= args.min_parallel <= args.max_parallel:
+        parser.error(f"--min-parallel {args.min_parallel} / --max-parallel {args.max_parallel} is not a valid range")
+    return args
 
 
-def load_cases(path: Path, max_cases: int | None) -> List[Dict[str, Any]]:
-    cases: List[Dict[str, Any]] = []
+def iter_cases(path: Path, max_cases: int | None) -> Iterator[Dict[str, Any]]:
+    """Manifest cases one at a time; the file is never read into memory as a whole."""
+    count = 0
     with path.open(encoding="utf-8") as fh:
         for line in fh:
             line = line.strip()
             if not line:
                 continue
-            cases.append(json.loads(line))
-            if max_cases and len(cases) >= max_cases:
+            yield json.loads(line)
+            count += 1
+            if max_cases and count >= max_cases:
                 break
-    return cases
+
+
+def load_cases(path: Path, max_cases: int | None) -> List[Dict[str, Any]]:
+    return list(iter_cases(path, max_cases))
+
+
+def bounded_map(executor: Any, fn: Callable[..., Any], jobs: Iterable[tuple], window: int) -> Iterator[Any]:
+    """``executor.submit(fn, *job)`` for each job, keeping at most ``window`` pending.
+
+    Results are yielded as they complete; ``jobs`` is only advanced when a slot
+    frees up, so a lazily generated job list is never materialised.
+    """
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    pending = set()
+    for job in jobs:
+        pending.add(executor.submit(fn, *job))
+        if len(pending) >= window:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield future.result()
 
 
 def run_single(
     case_idx: int,
     case: Dict[str, Any],
-    script_path: Path,
     output_path: Path,
     timeout: float,
-) -> tuple[int, bool, str]:
-    cmd = [
-        "python3",
-        str(script_path),
-        "--text",
-        case["prompt"],
-        "--timeout",
-        str(timeout),
-        "--output-file",
-        str(output_path),
-    ]
+    repo_root: Path,
+    working_dir: Path,
+    sandbox: str | None = "workspace-write",
+    stop_on: Sequence[run_codex_exec.StopPredicate] = (),
+    policy: codex_retry.RetryPolicy = codex_retry.RetryPolicy(),
+    budget: codex_retry.TimeBudget | None = None,
+    codex_args: Sequence[str] = (),
+    cache: codex_cache.ResultCache | None = None,
+    cache_entry: Dict[str, Any] | None = None,
+    env: Dict[str, str] | None = None,
+) -> tuple[int, bool, str, Dict[str, Any]]:
+    """Run one case, write its result file and return ``(idx, success, message, summary)``.
+
+    ``summary`` is the result without its events; the digest is kept. The result
+    records ``cache_entry`` (key and inputs) and is stored in ``cache`` only when successful.
+    ``env`` is passed on to `run_codex` (codex_matrix.py points ``CODEX_HOME`` at a variant).
+    """
     try:
-        subprocess.run(cmd, check=True, cwd=script_path.parents[1])
-        return case_idx, True, ""
-    except subprocess.CalledProcessError as exc:
-        return case_idx, False, f"Command failed (exit {exc.returncode}): {' '.join(cmd)}"
+        result = codex_retry.run_with_retries(
+            lambda limit: run_codex_exec.run_codex(
+                case["prompt"], list(codex_args), repo_root, limit, working_dir, sandbox, stop_on=stop_on, env=env
+            ),
+            timeout,
+            policy,
+            budget,
+        )
+    except OSError as exc:
+        return case_idx, False, f"Could not start codex: {exc}", {}
+    # Only successful results claim their key; a failed one has to run again next time.
+    if cache_entry is not None and result["success"]:
+        result["cache"] = cache_entry
+    codex_runlog.write_run(output_path, result)
+    if cache is not None and cache_entry is not None and result["success"]:
+        cache.put(cache_entry["key"], result)
+    summary = {key: value for key, value in result.items() if key != "events"}
+    if result["success"]:
+        return case_idx, True, "", summary
+    return case_idx, False, result.get("error") or f"codex exited with {result['exit_code']}", summary
+
+
+def _report(outcomes: Iterable[tuple[int, bool, str, Dict[str, Any]]], tally: BatchTally) -> None:
+    for outcome in outcomes:
+        idx, success, message, _ = outcome
+        if success:
+            print(f"[done] Case {idx} finished successfully.")
+        else:
+            print(f"[fail] Case {idx} failed: {message}")
+        tally.add(outcome)
+
+
+def case_status(outcome: tuple[int, bool, str, Dict[str, Any]]) -> str:
+    """Journal status of a case that was handed to a worker."""
+    _, success, _, summary = outcome
+    if success:
+        return "done"
+    if summary.get("budget_exhausted") and not summary.get("attempts"):
+        return "skipped"
+    return "failed"
+
+
+class BatchTally:
+    """Running counts for the closing summary; outcomes are not kept."""
+
+    def __init__(self) -> None:
+        self.total = 0
+        self.succeeded = 0
+        self.retried = 0
+        self.triggered = 0
+        self.failed: List[int] = []
+
+    def add(self, outcome: tuple[int, bool, str, Dict[str, Any]]) -> None:
+        idx, success, _, summary = outcome
+        self.total += 1
+        self.succeeded += success
+        self.retried += len(summary.get("attempts", [])) > 1
+        self.triggered += bool(summary.get("digest", {}).get("trigger_fired"))
+        if not success:
+            self.failed.append(idx)
+
+    def line(self, elapsed: float) -> str:
+        line = (
+            f"[summary] {self.succeeded}/{self.total} cases succeeded in {elapsed:.1f}s "
+            f"({self.retried} retried, {self.triggered} fired the trigger)"
+        )
+        return line + (f"; failed: {', '.join(map(str, sorted(self.failed)))}" if self.failed else "")
+
 
+def summarize(outcomes: Iterable[tuple[int, bool, str, Dict[str, Any]]], elapsed: float) -> str:
+    tally = BatchTally()
+    for outcome in outcomes:
+        tally.add(outcome)
+    return tally.line(elapsed)
 
-def main() -> int:
-    args = parse_args()
+
+def main(argv: List[str] | None = None) -> int:
+    args = parse_args(argv)
+    codex_journal = _sibling("codex_journal")
+    codex_sandbox = _sibling("codex_sandbox")
+    codex_telemetry = _sibling("codex_telemetry")
     input_path = Path(args.input_file).resolve()
     base_dir = input_path.parent
     output_dir = Path(args.output_dir).resolve()
-    script = Path(__file__).resolve().with_name("run_codex_exec.py")
-    repo_root = script.parents[1]
-    work_dir = repo_root / "codex_tmp"
-    if work_dir.exists():
-        shutil.rmtree(work_dir)
-    work_dir.mkdir(parents=True, exist_ok=True)
+    repo_root = Path(__file__).resolve().parents[1]
+    template = Path(args.workdir_template).resolve() if args.workdir_template else None
     output_dir.mkdir(parents=True, exist_ok=True)
-    cases = load_cases(input_path, args.max_cases)
-    if not cases:
-        print(f"No cases loaded from {input_path}")
-        return 1
+    shard_tag = f"{args.shard[0]}/{args.shard[1]}" if args.shard else None
+    journal_name = f"{args.prefix}.shard-{args.shard[0]}-of-{args.shard[1]}" if args.shard else args.prefix
+    journal_path = Path(args.journal) if args.journal else output_dir / f"{journal_name}.journal.jsonl"
+    telemetry_path = Path(args.telemetry) if args.telemetry else output_dir / f"{journal_name}.telemetry.json"
+    telemetry = codex_telemetry.BatchTelemetry(args.slowest)
+    finished = {}
+    retry = set()
+    if args.resume:
+        for case, entry in codex_journal.read_journal(journal_path).items():
+            if entry.get("status") in codex_journal.FINISHED:
+                finished[case] = entry
+            elif entry.get("status") == "failed":
+                retry.add(case)
+
+    cache = None
+    skills = {}
+    workdir = None
+    if not args.no_cache:
+        codex_cache = _sibling("codex_cache")
+        cache = codex_cache.ResultCache(Path(args.cache_dir) if args.cache_dir else codex_cache.DEFAULT_CACHE_DIR)
+        skills = codex_cache.skill_fingerprints(
+            Path(args.skills_dir) if args.skills_dir else codex_cache.DEFAULT_SKILLS_DIR
+        )
+        workdir = codex_sandbox.template_fingerprint(template)
+    codex_shard = _sibling("codex_shard") if args.shard else None
+    counts = {"cases": 0, "hits": 0, "misses": 0, "resumed": 0, "other_shards": 0}
+    suffix = ".jsonl.gz" if args.compact else ".json"
+    journal = codex_journal.Journal(journal_path, input_path, resume=args.resume, shard=shard_tag)
 
-    tasks = []
-    with ThreadPoolExecutor(max_workers=max(1, args.parallel)) as executor:
-        for idx, case in enumerate(cases, start=1):
+    def plan() -> Iterator[tuple[int, Dict[str, Any], Path, Dict[str, Any] | None]]:
+        """Yield the cases that have to run, reporting and journaling the others on the way."""
+        for idx, case in enumerate(iter_cases(input_path, args.max_cases), start=1):
+            counts["cases"] += 1
+            if args.shard and codex_shard.shard_of(case, args.shard[1]) != args.shard[0]:
+                counts["other_shards"] += 1
+                continue
             log_file = case.get("log_file")
             if log_file:
                 output_path = Path(log_file)
                 if not output_path.is_absolute():
                     output_path = base_dir / output_path
+                if args.compact and not output_path.name.endswith(".gz"):
+                    output_path = output_path.with_name(output_path.stem + suffix)
             else:
-                output_path = output_dir / f"{args.prefix}_{idx}.json"
+                output_path = output_dir / f"{args.prefix}_{idx}{suffix}"
+            done = finished.get(idx)
+            if done is not None:
+                if done.get("prompt") == codex_journal.prompt_hash(case["prompt"]):
+                    counts["resumed"] += 1
+                    continue
+                print(f"[run ] Case {idx}: prompt differs from the journal entry, running it again.")
             output_path.parent.mkdir(parents=True, exist_ok=True)
-            if output_path.exists() and not args.overwrite:
-                print(f"[skip] Case {idx} -> {output_path} already exists.")
+            if cache is None:
+                # A failed result is still a file; on resume it must not pass for a finished one.
+                if output_path.exists() and not args.overwrite and idx not in retry:
+                    print(f"[skip] Case {idx} -> {output_path} already exists.")
+                    journal.record(idx, "hit", case["prompt"], output_path)
+                    continue
+                print(f"[run ] Case {idx} -> {output_path}")
+                yield idx, case, output_path, None
                 continue
-            print(f"[run ] Case {idx} -> {output_path}")
-            tasks.append(
-                executor.submit(
-                    run_single,
-                    idx,
-                    case,
-                    script,
-                    output_path,
-                    args.timeout,
-                )
+
+            inputs = codex_cache.cache_inputs(
+                case["prompt"], skills, args.sandbox, args.codex_arg, args.stop_on, workdir
             )
+            entry = {"key": codex_cache.cache_key(inputs), "inputs": inputs}
+            recorded = codex_cache.recorded_entry(output_path) if output_path.exists() else None
+            if not args.overwrite:
+                if recorded is not None and recorded.get("key") == entry["key"]:
+                    counts["hits"] += 1
+                    print(f"[hit ] Case {idx} -> {output_path} is up to date.")
+                    journal.record(idx, "hit", case["prompt"], output_path)
+                    continue
+                if cache.restore(entry["key"], output_path):
+                    counts["hits"] += 1
+                    print(f"[hit ] Case {idx} -> {output_path} restored from cache.")
+                    journal.record(idx, "hit", case["prompt"], output_path)
+                    continue
+            reason = "--overwrite" if args.overwrite else codex_cache.miss_reason(output_path, inputs)
+            counts["misses"] += 1
+            print(f"[miss] Case {idx} -> {output_path} ({reason})")
+            yield idx, case, output_path, entry
 
-        for future in as_completed(tasks):
-            idx, success, message = future.result()
-            if success:
-                print(f"[done] Case {idx} finished successfully.")
-            else:
-                print(f"[fail] Case {idx} failed: {message}")
+    budget = codex_retry.TimeBudget(args.time_budget)
+    timeouts = None
+    if args.adaptive_timeout:
+        timeouts = codex_retry.AdaptiveTimeout(
+            args.timeout,
+            factor=args.adaptive_timeout,
+            percentile=args.timeout_percentile,
+            minimum=args.min_timeout,
+            maximum=args.max_timeout,
+        )
+    policy = codex_retry.RetryPolicy(args.retries, args.backoff)
+    limiter = None
+    workers = args.parallel
+    if args.adaptive_parallel:
+        codex_scheduler = _sibling("codex_scheduler")
+        limiter = codex_scheduler.AimdLimiter(
+            args.parallel,
+            minimum=args.min_parallel,
+            maximum=args.max_parallel,
+            latency_factor=args.latency_factor or None,
+            log_path=Path(args.concurrency_log) if args.concurrency_log else None,
+        )
+        workers = args.max_parallel
+    workdir_root = Path(args.workdir_root).resolve() if args.workdir_root else repo_root / "codex_tmp"
+    pool = codex_sandbox.SandboxPool(workdir_root, workers, template, args.workdir_clone)
+
+    def run_job(
+        idx: int, case: Dict[str, Any], output_path: Path, entry: Dict[str, Any] | None
+    ) -> tuple[int, bool, str, Dict[str, Any]]:
+        if limiter is None:
+            started = time.monotonic()
+            outcome = run_case(idx, case, output_path, entry)
+        else:
+            ticket = limiter.acquire()
+            started = time.monotonic()
+            outcome = (idx, False, "interrupted", {})
+            try:
+                outcome = run_case(idx, case, output_path, entry)
+            finally:
+                summary = outcome[3]
+                if not summary.get("attempts"):  # codex never ran: spawn error, budget, interruption
+                    limiter.release(ticket, neutral=True)
+                else:
+                    reason = codex_scheduler.congestion_reason(summary)
+                    limiter.release(ticket, reason, codex_scheduler.case_latency(summary))
+        wall = time.monotonic() - started
+        record = codex_telemetry.case_record(outcome, wall)
+        telemetry.add(record)
+        status = case_status(outcome)
+        error = outcome[2] if status != "done" else None
+        details = {key: record[key] for key in ("first_event", "events", "tokens", "failure") if key in record}
+        journal.record(idx, status, case["prompt"], output_path, wall, error, details)
+        return outcome
+
+    def run_case(
+        idx: int, case: Dict[str, Any], output_path: Path, entry: Dict[str, Any] | None
+    ) -> tuple[int, bool, str, Dict[str, Any]]:
+        if budget.exhausted():
+            return idx, False, "batch time budget exhausted before the case started", {"budget_exhausted": True}
+        timeout = timeouts.current() if timeouts is not None else args.timeout
+        with pool.lease() as work_dir:
+            outcome = run_single(
+                idx,
+                case,
+                output_path,
+                timeout,
+                repo_root,
+                work_dir,
+                args.sandbox,
+                args.stop_on,
+                policy,
+                budget,
+                args.codex_arg,
+                cache,
+                entry,
+            )
+        if timeouts is not None:
+            for duration in codex_retry.successful_durations(outcome[3]):
+                timeouts.record(duration)
+        return outcome
+
+    start = time.monotonic()
+    tally = BatchTally()
+    try:
+        if workers > 1:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                _report(bounded_map(executor, run_job, plan(), args.queue_size or 2 * workers), tally)
+        else:
+            _report((run_job(*job) for job in plan()), tally)
+    finally:
+        journal.close()
+        pool.close()
+    if not counts["cases"]:
+        print(f"No cases loaded from {input_path}")
+        return 1
+    if args.shard:
+        mine = counts["cases"] - counts["other_shards"]
+        print(f"[shard] {shard_tag}: {mine} of {counts['cases']} cases")
+    if counts["resumed"]:
+        print(f"[resume] {counts['resumed']} cases already finished according to {journal_path}")
+    if cache is not None:
+        print(f"[cache] {counts['hits']} hits, {counts['misses']} misses")
+    if tally.total:
+        elapsed = time.monotonic() - start
+        print(tally.line(elapsed))
+        report = telemetry.report(elapsed)
+        prom_path = codex_telemetry.write_report(telemetry_path, report, args.telemetry_label)
+        latency = report["latency"]
+        quantiles = ", ".join(
+            f"{name} {latency[name]:.1f}s" for name in ("p50", "p90", "p99") if latency[name] is not None
+        )
+        print(
+            f"[telemetry] {quantiles or 'no cases ran'}, {report['cases_per_minute']} cases/min "
+            f"-> {telemetry_path}, {prom_path.name}"
+        )
+    if limiter is not None:
+        changes = [decision["action"] for decision in limiter.decisions]
+        print(
+            f"[concurrency] final limit {limiter.limit}, peak {limiter.peak} in flight "
+            f"({changes.count('increase')} increases, {changes.count('decrease')} decreases)"
+        )
     return 0
 
 
@@ -1,16 +1,68 @@
 #!/usr/bin/env python3
-"""Run `codex exec` with inline text and emit a JSON summary."""
+"""Run `codex exec` with inline text and emit a JSON summary.
+
+Events are read from the pipe as codex emits them, so a timed-out run still
+reports everything received before the deadline; `--event-log` additionally
+appends each event to a JSONL file as it arrives. `--stop-on` predicates end the
+run as soon as a matching event shows up (e.g. the skill's first command), and the
+result records which predicate fired. `--retries` re-runs failed attempts with
+jittered exponential backoff within an optional `--time-budget` (codex_retry.py).
+`run_codex_async()` is the asyncio variant of `run_codex()`, and
+`run_codex_many_async()` drives many prompts from one event loop.
+
+The script is started once per prompt, so heavier modules (`subprocess`, `shlex`,
+`json`) are imported where they are used; see `scripts/bench_startup.py`.
+"""
 
 from __future__ import annotations
 
 import argparse
-import json
-import shlex
-import subprocess
+import os
 import sys
+from collections import namedtuple
 from pathlib import Path
-from subprocess import TimeoutExpired
-from typing import Any, List
+from typing import TYPE_CHECKING, IO, Any, AsyncIterator, Callable, Deque, Dict, Iterable, List, Sequence
+
+if TYPE_CHECKING:
+    import asyncio
+    import subprocess
+    import threading
+
+
+# Fields left as None match anything; ``command`` is a substring of item.command.
+StopPredicate = namedtuple("StopPredicate", ["type", "item_type", "command"], defaults=[None, None, None])
+PREDICATE_KEYS = {"type": "type", "item_type": "item_type", "item.type": "item_type", "command": "command"}
+DEFAULT_MAX_EVENTS = 10_000  # events kept in a result unless the caller asks otherwise
+
+
+def parse_predicate(spec: str) -> StopPredicate:
+    """Parse ``type=item.started,item_type=command_execution,command=create_note.py``.
+
+    Only the first ``=`` of each field splits key from value; fields are separated
+    by commas, so commands containing commas cannot be matched this way.
+    """
+    fields = {}
+    for part in spec.split(","):
+        key, sep, value = part.partition("=")
+        key = key.strip()
+        if not sep or key not in PREDICATE_KEYS or not value:
+            raise ValueError(f"invalid predicate {spec!r}; use type=..., item_type=..., command=...")
+        fields[PREDICATE_KEYS[key]] = value
+    return StopPredicate(**fields)
+
+
+def predicate_matches(predicate: StopPredicate, event: Any) -> bool:
+    if not isinstance(event, dict):
+        return False
+    if predicate.type is not None and event.get("type") != predicate.type:
+        return False
+    item = event.get("item")
+    item = item if isinstance(item, dict) else {}
+    if predicate.item_type is not None and item.get("type") != predicate.item_type:
+        return False
+    if predicate.command is not None and predicate.command not in str(item.get("command", "")):
+        return False
+    return True
 
 
 def read_prompt(text: str | None, file_path: str | None) -> str:
@@ -42,7 +94,8 @@ def parse_args(argv: List[str]) -> argparse.Namespace:
     )
     parser.add_argument(
         "--output-file",
-        help="Optional path to write the JSON result (in addition to stdout).",
+        help="Optional path to write the JSON result (in addition to stdout); a "
+        "`.jsonl.gz` name selects the compact event-log format (see codex_runlog.py).",
     )
     parser.add_argument(
         "--timeout",
@@ -55,7 +108,212 @@ def parse_args(argv: List[str]) -> argparse.Namespace:
         default="workspace-write",
         help="Sandbox mode passed to `codex exec --sandbox` (default: workspace-write).",
     )
-    return parser.parse_args(argv)
+    parser.add_argument(
+        "--event-log",
+        help="Append every event to this JSONL file while codex is running.",
+    )
+    parser.add_argument(
+        "--max-events",
+        type=int,
+        default=DEFAULT_MAX_EVENTS,
+        help=f"Keep only the last N events in the JSON result; 0 keeps all (default: {DEFAULT_MAX_EVENTS}). "
+        "The event log and the digest cover every event.",
+    )
+    parser.add_argument(
+        "--stop-on",
+        action="append",
+        default=[],
+        metavar="PREDICATE",
+        help="Stop codex as soon as an event matches, e.g. "
+        "'item_type=command_execution,command=create_note.py' (repeatable; fields: "
+        "type, item_type, command).",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=0,
+        help="Retry a failed or timed-out run up to N more times (default: 0). "
+        "Each attempt is listed under `attempts` in the result; --event-log keeps the last one.",
+    )
+    parser.add_argument(
+        "--backoff",
+        type=float,
+        default=2.0,
+        help="Base of the jittered exponential backoff between retries, in seconds (default: 2).",
+    )
+    parser.add_argument(
+        "--max-backoff",
+        type=float,
+        default=60.0,
+        help="Upper bound for a single backoff delay in seconds (default: 60).",
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        help="Total seconds allowed for all attempts; each attempt's timeout is capped by what is left.",
+    )
+    args = parser.parse_args(argv)
+    try:
+        args.stop_on = [parse_predicate(spec) for spec in args.stop_on]
+    except ValueError as exc:
+        parser.error(str(exc))
+    return args
+
+
+STDERR_LIMIT = 1 << 20  # keep at most the last MiB of stderr
+
+
+class EventSink:
+    """Collect parsed events, optionally appending each one to a JSONL log.
+
+    Only the most recent ``max_events`` (default `DEFAULT_MAX_EVENTS`, None for
+    no cap) are kept in memory; the log still receives all of them, so memory
+    stays flat for arbitrarily long runs.
+    The first event matching one of ``stop_on`` is recorded in ``stopped_by``, and
+    every event, kept or not, is folded into ``digest`` (see codex_digest.py).
+    ``started`` and ``first_event_at`` (monotonic clock) time the run's output.
+    """
+
+    def __init__(
+        self,
+        log_path: Path | None = None,
+        max_events: int | None = DEFAULT_MAX_EVENTS,
+        stop_on: Sequence[StopPredicate] = (),
+    ):
+        import time
+        from collections import deque
+
+        if __package__:
+            from .codex_digest import RunDigest
+        else:  # run as a script from scripts/
+            from codex_digest import RunDigest
+
+        self.digest = RunDigest()
+        self.clock = time.monotonic
+        self.started = self.clock()
+        self.first_event_at: float | None = None
+        self.events: Deque[Any] = deque(maxlen=max_events)
+        self.count = 0
+        self.stop_on = list(stop_on)
+        self.stopped_by: dict[str, Any] | None = None
+        self.log_path = log_path
+        self._log = None
+        if log_path is not None:
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+            self._log = log_path.open("w", encoding="utf-8")
+
+    def add(self, line: str) -> Any:
+        """Parse one stdout line (non-JSON lines become ``raw`` events) and record it."""
+        import json
+
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            event = {"type": "raw", "data": line}
+            line = json.dumps(event, ensure_ascii=False)
+        if self.first_event_at is None:
+            self.first_event_at = self.clock()
+        self.events.append(event)
+        self.count += 1
+        self.digest.add(event)
+        if self._log is not None:
+            self._log.write(line + "\n")
+            self._log.flush()
+        if self.stopped_by is None:
+            for predicate in self.stop_on:
+                if predicate_matches(predicate, event):
+                    fields = {key: value for key, value in predicate._asdict().items() if value is not None}
+                    self.stopped_by = {"predicate": fields, "event_index": self.count - 1}
+                    break
+        return event
+
+    def close(self) -> None:
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+
+def _pump_stdout(stream: IO[bytes], sink: EventSink, finished: "threading.Event") -> None:
+    """Feed stdout lines to ``sink``; sets ``finished`` at EOF or when a stop predicate fires."""
+    try:
+        for raw in stream:
+            line = raw.decode("utf-8", errors="replace").strip()
+            if line:
+                sink.add(line)
+                if sink.stopped_by is not None:
+                    return
+    finally:
+        finished.set()
+
+
+def _pump_stderr(stream: IO[bytes], buffer: bytearray) -> None:
+    while True:
+        chunk = stream.read1(65536)
+        if not chunk:
+            return
+        buffer.extend(chunk)
+        if len(buffer) > STDERR_LIMIT:
+            del buffer[:-STDERR_LIMIT]
+
+
+def _kill_group(process: "subprocess.Popen[bytes] | asyncio.subprocess.Process") -> None:
+    """Kill codex and anything it spawned (it runs in its own process group)."""
+    import signal
+
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:  # pragma: no cover - Windows
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _stop(process: "subprocess.Popen[bytes]") -> None:
+    _kill_group(process)
+    process.wait()
+
+
+def _codex_command(working_dir: Path, sandbox: str | None, extra_args: Sequence[str]) -> List[str]:
+    cmd = ["codex", "exec", "--json", "-", "--cd", str(working_dir)]
+    if sandbox:
+        cmd.extend(["--sandbox", sandbox])
+    cmd.extend(extra_args)
+    return cmd
+
+
+def _build_result(
+    cmd: List[str],
+    working_dir: Path,
+    sink: EventSink,
+    returncode: int | None,
+    error: str | None,
+    stderr: bytearray,
+) -> dict[str, Any]:
+    import shlex
+
+    stopped = sink.stopped_by is not None
+    first_event = None if sink.first_event_at is None else round(sink.first_event_at - sink.started, 3)
+    result: dict[str, Any] = {
+        "command": " ".join(shlex.quote(part) for part in cmd),
+        "cwd": str(working_dir.resolve()),
+        "success": stopped or (error is None and returncode == 0),
+        "exit_code": None if error or stopped else returncode,
+        "events": list(sink.events),
+        "digest": sink.digest.as_dict(),
+        "timing": {"wall": round(sink.clock() - sink.started, 3), "first_event": first_event},
+    }
+    if stopped:
+        result["stopped_by"] = sink.stopped_by
+    if error:
+        result["error"] = error
+    if sink.count > len(sink.events):
+        result["events_dropped"] = sink.count - len(sink.events)
+    if sink.log_path is not None:
+        result["event_log"] = str(sink.log_path)
+    if stderr:
+        result["stderr"] = stderr.decode("utf-8", errors="replace")
+    return result
 
 
 def run_codex(
@@ -65,54 +323,211 @@ def run_codex(
     timeout: float,
     working_dir: Path,
     sandbox: str | None,
+    event_log: Path | None = None,
+    max_events: int | None = DEFAULT_MAX_EVENTS,
+    stop_on: Sequence[StopPredicate] = (),
+    env: Dict[str, str] | None = None,
 ) -> dict[str, Any]:
-    cmd = ["codex", "exec", "--json", "-", "--cd", str(working_dir)]
-    if sandbox:
-        cmd.extend(["--sandbox", sandbox])
-    cmd.extend(extra_args)
+    """Run ``codex exec --json`` and collect its events while they stream in.
+
+    Each stdout line is parsed as soon as it arrives and, with ``event_log``,
+    appended to that JSONL file. On timeout the process group is killed and the
+    result still carries the events received so far; it is also killed and reaped
+    if anything (e.g. ``KeyboardInterrupt``) interrupts the wait. ``max_events`` caps how
+    many events are kept in the returned result (default `DEFAULT_MAX_EVENTS`,
+    None for all; the log and the digest see every one).
+
+    When an event matches one of ``stop_on`` codex is killed right away; the run
+    counts as successful, ``exit_code`` is None and ``stopped_by`` names the
+    predicate and the index of the matching event.
+
+    ``digest`` summarizes all events received (commands, trigger, reasoning, cards);
+    `codex_runlog.write_run` stores it in a sidecar next to the run file. ``timing``
+    holds the run's wall time and the seconds until its first event (None if none came).
+    ``env`` adds to (or overrides) the environment codex inherits, e.g. ``CODEX_HOME``.
+    """
+    import subprocess
+    import threading
+    import time
+
+    cmd = _codex_command(working_dir, sandbox, extra_args)
+    sink = EventSink(event_log, max_events, stop_on)
+    stderr = bytearray()
+    finished = threading.Event()
+    process = subprocess.Popen(
+        cmd,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        cwd=str(repo_root),
+        env={**os.environ, **env} if env else None,
+        start_new_session=hasattr(os, "killpg"),
+    )
+    readers = [
+        threading.Thread(target=_pump_stdout, args=(process.stdout, sink, finished), daemon=True),
+        threading.Thread(target=_pump_stderr, args=(process.stderr, stderr), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+    try:
+        process.stdin.write(prompt.encode("utf-8"))
+        process.stdin.close()
+    except BrokenPipeError:
+        pass
+
+    error = None
+    deadline = time.monotonic() + timeout
+    try:
+        if not finished.wait(timeout):
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        if sink.stopped_by is not None:
+            _stop(process)
+        else:
+            process.wait(timeout=max(0.0, deadline - time.monotonic()))
+    except subprocess.TimeoutExpired:
+        error = f"Timed out after {timeout} seconds."
+        _stop(process)
+    finally:
+        # Also runs on KeyboardInterrupt: never leave codex running without its parent.
+        if process.returncode is None:
+            _stop(process)
+        for reader in readers:
+            reader.join(timeout=5)
+        sink.close()
+
+    return _build_result(cmd, working_dir, sink, process.returncode, error, stderr)
+
+
+async def _read_lines(stream: asyncio.StreamReader) -> AsyncIterator[bytes]:
+    """Yield complete lines of any length (``StreamReader.readline`` caps them at 64 KiB)."""
+    pending = bytearray()
+    while True:
+        chunk = await stream.read(65536)
+        if not chunk:
+            break
+        pending.extend(chunk)
+        start = 0
+        while True:
+            end = pending.find(b"\n", start)
+            if end < 0:
+                break
+            yield bytes(pending[start:end])
+            start = end + 1
+        del pending[:start]
+    if pending:
+        yield bytes(pending)
+
+
+async def run_codex_async(
+    prompt: str,
+    extra_args: List[str],
+    repo_root: Path,
+    timeout: float,
+    working_dir: Path,
+    sandbox: str | None,
+    event_log: Path | None = None,
+    max_events: int | None = DEFAULT_MAX_EVENTS,
+    stop_on: Sequence[StopPredicate] = (),
+    env: Dict[str, str] | None = None,
+) -> dict[str, Any]:
+    """Asyncio counterpart of :func:`run_codex`: same arguments and result.
+
+    Output is parsed line by line on the event loop instead of by reader threads,
+    so one loop can drive many runs. If the awaiting task is cancelled, codex's
+    process group is killed and reaped before ``CancelledError`` propagates.
+    """
+    import asyncio
+
+    cmd = _codex_command(working_dir, sandbox, extra_args)
+    sink = EventSink(event_log, max_events, stop_on)
+    stderr = bytearray()
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=str(repo_root),
+        env={**os.environ, **env} if env else None,
+        start_new_session=hasattr(os, "killpg"),
+    )
+
+    async def pump_stdout() -> None:
+        async for raw in _read_lines(process.stdout):
+            line = raw.decode("utf-8", errors="replace").strip()
+            if line:
+                sink.add(line)
+                if sink.stopped_by is not None:
+                    return
+
+    async def pump_stderr() -> None:
+        while True:
+            chunk = await process.stderr.read(65536)
+            if not chunk:
+                return
+            stderr.extend(chunk)
+            if len(stderr) > STDERR_LIMIT:
+                del stderr[:-STDERR_LIMIT]
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    readers = [asyncio.ensure_future(pump_stdout()), asyncio.ensure_future(pump_stderr())]
+    error = None
     try:
-        process = subprocess.run(
-            cmd,
-            input=prompt,
-            text=True,
-            capture_output=True,
-            cwd=str(repo_root),
-            timeout=timeout,
-        )
-    except TimeoutExpired as exc:
-        return {
-            "command": " ".join(shlex.quote(part) for part in cmd),
-            "cwd": str(working_dir.resolve()),
-            "success": False,
-            "exit_code": None,
-            "error": f"Timed out after {timeout} seconds.",
-            "events": [],
-            "stderr": exc.stderr,
-        }
-
-    events: List[Any] = []
-    for line in process.stdout.splitlines():
-        line = line.strip()
-        if not line:
-            continue
         try:
-            events.append(json.loads(line))
-        except json.JSONDecodeError:
-            events.append({"type": "raw", "data": line})
+            process.stdin.write(prompt.encode("utf-8"))
+            await process.stdin.drain()
+            process.stdin.close()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        try:
+            # shield: a timeout must not cancel the reader before the group is killed.
+            await asyncio.wait_for(asyncio.shield(readers[0]), max(0.0, deadline - loop.time()))
+            if sink.stopped_by is None:
+                await asyncio.wait_for(process.wait(), max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            error = f"Timed out after {timeout} seconds."
+    finally:
+        # Also runs when the caller cancels us: never leave codex running behind a dead task.
+        if process.returncode is None:
+            _kill_group(process)
+        await asyncio.shield(process.wait())
+        await asyncio.wait(readers, timeout=5)
+        for reader in readers:
+            reader.cancel()
+        sink.close()
 
-    result: dict[str, Any] = {
-        "command": " ".join(shlex.quote(part) for part in cmd),
-        "cwd": str(working_dir.resolve()),
-        "success": process.returncode == 0,
-        "exit_code": process.returncode,
-        "events": events,
-    }
-    if process.stderr:
-        result["stderr"] = process.stderr
-    return result
+    return _build_result(cmd, working_dir, sink, process.returncode, error, stderr)
+
+
+async def run_codex_many_async(
+    prompts: Iterable[str],
+    concurrency: int,
+    on_result: Callable[[int, dict[str, Any]], Any] | None = None,
+    **options: Any,
+) -> List[dict[str, Any]]:
+    """Run every prompt through :func:`run_codex_async`, at most ``concurrency`` at a time.
+
+    ``options`` are the remaining ``run_codex_async`` arguments (``extra_args``,
+    ``repo_root``, ``timeout``, ``working_dir``, ``sandbox``, ...). Results come
+    back in prompt order; ``on_result(index, result)`` is called as each one finishes.
+    """
+    import asyncio
+
+    slots = asyncio.BoundedSemaphore(concurrency)
+
+    async def run_one(index: int, prompt: str) -> dict[str, Any]:
+        async with slots:
+            result = await run_codex_async(prompt, **options)
+        if on_result is not None:
+            on_result(index, result)
+        return result
+
+    return list(await asyncio.gather(*(run_one(index, prompt) for index, prompt in enumerate(prompts))))
 
 
 def main(argv: List[str]) -> int:
+    import json
+
     args = parse_args(argv)
     prompt = read_prompt(args.text, args.file)
     repo_root = Path(__file__).resolve().parents[1]
@@ -120,21 +535,36 @@ def main(argv: List[str]) -> int:
     if not working_dir.is_absolute():
         working_dir = repo_root / working_dir
     working_dir.mkdir(parents=True, exist_ok=True)
-    result = run_codex(
-        prompt,
-        args.codex_arg,
-        repo_root,
+    if __package__:
+        from . import codex_retry
+    else:  # run as a script from scripts/
+        import codex_retry
+
+    result = codex_retry.run_with_retries(
+        lambda timeout: run_codex(
+            prompt,
+            args.codex_arg,
+            repo_root,
+            timeout,
+            working_dir,
+            args.sandbox,
+            event_log=Path(args.event_log) if args.event_log else None,
+            max_events=args.max_events or None,
+            stop_on=args.stop_on,
+        ),
         args.timeout,
-        working_dir,
-        args.sandbox,
+        codex_retry.RetryPolicy(args.retries, args.backoff, args.max_backoff),
+        codex_retry.TimeBudget(args.time_budget),
     )
     json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
     sys.stdout.write("\n")
     if args.output_file:
-        Path(args.output_file).write_text(
-            json.dumps(result, ensure_ascii=False, indent=2),
-            encoding="utf-8",
-        )
+        if __package__:
+            from . import codex_runlog
+        else:  # run as a script from scripts/
+            import codex_runlog
+
+        codex_runlog.write_run(Path(args.output_file), result)
     return 0 if result["success"] else result["exit_code"] or 1
 
 
@@ -4,19 +4,65 @@
 The script builds a Markdown file inside the `fleeting` folder (configurable through
 CLI arguments). It keeps the filename aligned with the provided title, falling back
 to a lightly sanitized variant when illegal path characters appear.
+
+Notes never overwrite each other: a persistent filename index (see
+`vault_index.py`) detects sanitized-title collisions and appends a deterministic
+` 2`, ` 3`, ... suffix. Vaults migrated to a sharded layout (`shard_vault.py`)
+get new notes in their date or hash shard; the index records where each note lives.
+
+Re-running with identical inputs is a no-op: the index caches a content hash of
+every note it wrote, and when an existing note (or one of its suffixed variants)
+already holds the exact Markdown the write is skipped and reported as
+`"status": "unchanged"` instead of `"created"`.
+
+An optional near-duplicate check (`--near-duplicates report|skip`, see
+`near_duplicates.py`) compares the summary with existing cards through a MinHash
+LSH index and either lists close matches in card_json or skips the write.
+
+Writes are atomic: each note is staged under `<folder>/.staging/` and renamed into
+place (see `note_writer.py`), optionally fsynced (`--durable`) and grouped into
+batches that are flushed together (`--group-commit`).
+
+Bulk imports can stream JSONL records (`--from-jsonl`) so that many cards are
+written by a single process instead of paying interpreter startup per card.
 """
 
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
+from collections import namedtuple
 from pathlib import Path
 import re
 import sys
-from typing import List
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, List, Mapping, Sequence, TextIO
+
+from note_writer import NoteWriter, recover_staging
+from vault_index import VaultIndex
+from vault_layout import note_dirs, read_layout, shard_dir
+
+# near_duplicates pulls in sqlite3, so it is only imported when the check is enabled.
+if TYPE_CHECKING:
+    from near_duplicates import NearDuplicate, NearDuplicateIndex
 
 
 INVALID_PATH_CHARS = r'[\\/:*?"<>|]'
+DEFAULT_TAGS = ["fleeting"]
+STATUS_CREATED = "created"
+STATUS_UNCHANGED = "unchanged"
+STATUS_DUPLICATE = "duplicate"
+NEAR_DUPLICATE_MODES = ("off", "report", "skip")
+# First output line per status; for "duplicate" the path is the existing card.
+STATUS_MESSAGES = {
+    STATUS_CREATED: "Created note at {path}",
+    STATUS_UNCHANGED: "Note unchanged at {path}",
+    STATUS_DUPLICATE: "Skipped near-duplicate of {path}",
+}
+
+
+# Returned by create_note(); near_duplicates holds NearDuplicate matches (empty when none).
+NoteResult = namedtuple("NoteResult", ["path", "title", "status", "near_duplicates"], defaults=[()])
 
 
 def sanitize_filename(title: str) -> str:
@@ -39,22 +85,238 @@ def build_content(summary: str, tags: List[str]) -> str:
     return "\n".join(parts)
 
 
-def create_note(folder: Path, title: str, summary: str, tags: List[str]) -> tuple[Path, str]:
+def parse_content(content: str) -> tuple[List[str], str]:
+    """Split a note produced by :func:`build_content` into ``(tags, summary)``.
+
+    Notes without frontmatter are returned with no tags and the whole text as body.
+    """
+    lines = content.splitlines()
+    if not lines or lines[0].strip() != "---":
+        return [], content.strip()
+    tags: List[str] = []
+    in_tags = False
+    for offset, line in enumerate(lines[1:], start=1):
+        stripped = line.strip()
+        if stripped == "---":
+            return tags, "\n".join(lines[offset + 1 :]).strip()
+        if stripped == "tags:":
+            in_tags = True
+        elif in_tags and stripped.startswith("- "):
+            tags.append(stripped[2:].strip())
+        elif stripped:
+            in_tags = False
+    return [], content.strip()
+
+
+def open_vault(folder: Path) -> VaultIndex:
+    """Prepare ``folder`` for writing and return its filename index.
+
+    Staged files left by an interrupted run mean names may have been reserved
+    without being published, so the index is rebuilt from the folder.
+    """
     folder.mkdir(parents=True, exist_ok=True)
-    filename = sanitize_filename(title)
-    note_path = folder / f"{filename}.md"
-    note_path.write_text(build_content(summary, tags), encoding="utf-8")
-    return note_path, filename
+    leftovers = recover_staging(folder)
+    index = VaultIndex(folder)
+    if leftovers:
+        index.rebuild()
+    return index
+
+
+def _content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _holds_content(folder: Path, index: VaultIndex, name: str, digest: str, size: int) -> bool:
+    """Return True when note ``name`` already contains exactly the bytes hashed as ``digest``.
+
+    The cached hash is trusted while the file's size and mtime match the index;
+    otherwise the file is hashed once (only if its size matches) and the cache
+    is refreshed.
+    """
+    note_path = index.path_of(name)
+    try:
+        stat = note_path.stat()
+    except FileNotFoundError:
+        return False
+    if stat.st_size != size:
+        return False
+    entry = index.get(name) or {}
+    if entry.get("sha256") and entry.get("mtime_ns") == stat.st_mtime_ns:
+        return entry["sha256"] == digest
+    current = _content_hash(note_path.read_bytes())
+    index.update(name, sha256=current, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+    return current == digest
+
+
+def create_note(
+    folder: Path,
+    title: str,
+    summary: str,
+    tags: List[str],
+    index: VaultIndex | None = None,
+    writer: NoteWriter | None = None,
+    duplicates: NearDuplicateIndex | None = None,
+    skip_duplicates: bool = False,
+) -> NoteResult:
+    """Write a note and return a :class:`NoteResult`.
+
+    ``status`` is ``"unchanged"`` when a note with this title (or one of its
+    ``Title N`` variants) already holds identical content, else ``"created"``.
+    With a ``duplicates`` index, existing cards with a similar summary are
+    listed in ``near_duplicates``; if ``skip_duplicates`` is set the write is
+    skipped and the closest match is returned with status ``"duplicate"``.
+    """
+    if index is None:
+        index = open_vault(folder)
+    if writer is None:
+        writer = NoteWriter(folder)
+    base = sanitize_filename(title)
+    data = build_content(summary, tags).encode("utf-8")
+    digest = _content_hash(data)
+
+    layout = read_layout(folder)
+
+    def on_disk(name: str) -> str | None:
+        """Subdirectory of an unindexed note called ``name``, checking every shard it may be in."""
+        for subdir in note_dirs(folder, layout, name):
+            if (folder / subdir / f"{name}.md").exists():
+                return subdir
+        return None
+
+    candidate = base
+    counter = 2
+    while True:
+        if candidate not in index:
+            # Notes made outside this script (e.g. in Obsidian) are not indexed yet.
+            subdir = on_disk(candidate)
+            if subdir is None:
+                break
+            index.update(candidate, **({"dir": subdir} if subdir else {}))
+        if _holds_content(folder, index, candidate, digest, len(data)):
+            return NoteResult(index.path_of(candidate), candidate, STATUS_UNCHANGED)
+        candidate = f"{base} {counter}"
+        counter += 1
+
+    matches = duplicates.find(summary) if duplicates is not None else []
+    if matches and skip_duplicates:
+        best = matches[0].title
+        return NoteResult(index.path_of(best), best, STATUS_DUPLICATE, matches)
+
+    filename = index.reserve(base, lambda name: on_disk(name) is not None)
+    subdir = shard_dir(layout, filename)
+    if subdir:
+        (folder / subdir).mkdir(parents=True, exist_ok=True)
+    note_path = folder / subdir / f"{filename}.md"
+    writer.write(note_path, data)
+    fields: dict[str, Any] = {"sha256": digest, "size": len(data)}
+    if subdir:
+        fields["dir"] = subdir
+    if not writer.group_commit:
+        fields["mtime_ns"] = note_path.stat().st_mtime_ns
+    index.update(filename, **fields)
+    if duplicates is not None:
+        duplicates.add(filename, summary, note_path)
+    return NoteResult(note_path, filename, STATUS_CREATED, matches)
+
+
+def card_info(
+    title: str,
+    tags: List[str],
+    summary: str,
+    status: str = STATUS_CREATED,
+    near_duplicates: Sequence[NearDuplicate] = (),
+) -> dict[str, Any]:
+    """Return the payload printed inside the ``card_json`` block."""
+    info: dict[str, Any] = {
+        "title": title,
+        "tags": tags,
+        "summary": summary.strip(),
+        "status": status,
+    }
+    if near_duplicates:
+        info["near_duplicates"] = [
+            {"title": match.title, "similarity": round(match.similarity, 3)} for match in near_duplicates
+        ]
+    return info
+
+
+def read_records(stream: TextIO) -> Iterator[dict[str, Any]]:
+    """Yield JSON objects from a JSONL stream, skipping blank lines."""
+    for lineno, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"line {lineno}: invalid JSON ({exc.msg})") from exc
+        if not isinstance(record, dict):
+            raise ValueError(f"line {lineno}: expected a JSON object")
+        yield record
+
+
+def create_notes(
+    folder: Path,
+    records: Iterable[Mapping[str, Any]],
+    durable: bool = False,
+    group_commit: int = 0,
+    index: VaultIndex | None = None,
+    duplicates: NearDuplicateIndex | None = None,
+    skip_duplicates: bool = False,
+) -> Iterator[tuple[Path, dict[str, Any]]]:
+    """Write one note per record and yield ``(note_path, card_info)`` pairs.
+
+    Records need ``title`` and ``summary``; ``tags`` falls back to the default
+    ``fleeting`` tag. Notes are written lazily, so callers can stream records,
+    and the filename index is loaded once for the whole batch. With
+    ``group_commit=N`` notes are published N at a time and only yielded once
+    their group is committed; an error discards the uncommitted group.
+    """
+    writer = NoteWriter(folder, durable=durable, group_commit=group_commit > 0)
+    committed: List[tuple[Path, dict[str, Any]]] = []
+    try:
+        for record in records:
+            title = record.get("title")
+            summary = record.get("summary")
+            if not isinstance(title, str) or not isinstance(summary, str):
+                raise ValueError("Each record needs string 'title' and 'summary' fields.")
+            tags = list(record.get("tags") or DEFAULT_TAGS)
+            if index is None:
+                index = open_vault(folder)
+            result = create_note(
+                folder,
+                title,
+                summary,
+                tags,
+                index=index,
+                writer=writer,
+                duplicates=duplicates,
+                skip_duplicates=skip_duplicates,
+            )
+            info = card_info(result.title, tags, summary, result.status, result.near_duplicates)
+            committed.append((result.path, info))
+            if writer.pending < group_commit:
+                continue
+            writer.commit()
+            yield from committed
+            committed.clear()
+        writer.commit()
+        yield from committed
+    except BaseException:
+        if writer.pending:
+            writer.abort()
+            if index is not None:
+                index.rebuild()
+        raise
 
 
 def parse_args(argv: list[str]) -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Create a fleeting note for Obsidian."
     )
-    parser.add_argument("--title", required=True, help="Note title, also used as filename.")
+    parser.add_argument("--title", help="Note title, also used as filename.")
     parser.add_argument(
         "--summary",
-        required=True,
         help="One to two sentences that summarize the captured voice note.",
     )
     parser.add_argument(
@@ -65,25 +327,118 @@ def parse_args(argv: list[str]) -> argparse.Namespace:
     parser.add_argument(
         "--tags",
         nargs="*",
-        default=["fleeting"],
+        default=list(DEFAULT_TAGS),
         help="Tags to embed in the frontmatter (default: fleeting).",
     )
-    return parser.parse_args(argv)
+    parser.add_argument(
+        "--from-jsonl",
+        metavar="PATH",
+        help="Create one note per JSONL record ({title, summary, tags}); use - for stdin.",
+    )
+    parser.add_argument(
+        "--durable",
+        action="store_true",
+        help="fsync notes and their folder so they survive a crash or power loss.",
+    )
+    parser.add_argument(
+        "--group-commit",
+        type=int,
+        default=0,
+        metavar="N",
+        help="With --from-jsonl, publish and fsync notes N at a time (default: per note).",
+    )
+    parser.add_argument(
+        "--near-duplicates",
+        choices=NEAR_DUPLICATE_MODES,
+        default="off",
+        help="Compare the summary with existing cards: list close matches (report) "
+        "or skip writing (skip) (default: off).",
+    )
+    parser.add_argument(
+        "--similarity",
+        type=float,
+        default=None,
+        help="Minimum estimated similarity for --near-duplicates (default: 0.4).",
+    )
+    args = parser.parse_args(argv)
+    if args.from_jsonl is None and (args.title is None or args.summary is None):
+        parser.error("--title and --summary are required unless --from-jsonl is given.")
+    return args
+
 
+def run_batch(folder: Path, stream: TextIO, **options: Any) -> int:
+    """Create notes for every JSONL record and print one card_json line per card.
 
-def main(argv: list[str]) -> int:
+    ``options`` are forwarded to :func:`create_notes`.
+    """
+    try:
+        for note_path, info in create_notes(folder, read_records(stream), **options):
+            print(json.dumps({"path": str(note_path), **info}, ensure_ascii=False))
+    except ValueError as exc:
+        print(f"Invalid record: {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def main(
+    argv: list[str],
+    vaults: dict[Path, VaultIndex] | None = None,
+    duplicate_indexes: dict[Path, NearDuplicateIndex] | None = None,
+) -> int:
+    """Run the CLI; a resident caller passes ``vaults`` and ``duplicate_indexes``
+    to reuse the loaded filename and near-duplicate indexes per folder."""
     args = parse_args(argv)
-    note_path, resolved_title = create_note(
-        Path(args.folder), args.title, args.summary, args.tags
-    )
-    print(f"Created note at {note_path}")
-    card_info = {
-        "title": resolved_title,
-        "tags": args.tags,
-        "summary": args.summary.strip(),
+    folder = Path(args.folder)
+    index = None
+    if vaults is not None:
+        key = folder.resolve()
+        if key not in vaults:
+            vaults[key] = open_vault(folder)
+        index = vaults[key]
+    duplicates = None
+    if args.near_duplicates != "off":
+        from near_duplicates import DEFAULT_THRESHOLD, NearDuplicateIndex
+
+        if index is None:
+            index = open_vault(folder)
+        threshold = DEFAULT_THRESHOLD if args.similarity is None else args.similarity
+        if duplicate_indexes is None:
+            duplicates = NearDuplicateIndex(folder, threshold=threshold, vault=index)
+        else:
+            key = folder.resolve()
+            if key not in duplicate_indexes:
+                duplicate_indexes[key] = NearDuplicateIndex(folder, vault=index)
+            duplicates = duplicate_indexes[key]
+            duplicates.threshold = threshold
+    options: dict[str, Any] = {
+        "index": index,
+        "duplicates": duplicates,
+        "skip_duplicates": args.near_duplicates == "skip",
     }
+
+    try:
+        if args.from_jsonl is not None:
+            batch_options = {**options, "durable": args.durable, "group_commit": args.group_commit}
+            if args.from_jsonl == "-":
+                return run_batch(folder, sys.stdin, **batch_options)
+            with open(args.from_jsonl, encoding="utf-8") as fh:
+                return run_batch(folder, fh, **batch_options)
+
+        result = create_note(
+            folder,
+            args.title,
+            args.summary,
+            args.tags,
+            writer=NoteWriter(folder, durable=args.durable),
+            **options,
+        )
+    finally:
+        if duplicates is not None and duplicate_indexes is None:
+            duplicates.close()
+    print(STATUS_MESSAGES[result.status].format(path=result.path))
     print("```card_json")
-    print(json.dumps(card_info, ensure_ascii=False))
+    info = card_info(result.title, args.tags, args.summary, result.status, result.near_duplicates)
+    print(json.dumps(info, ensure_ascii=False))
     print("```")
     return 0
 
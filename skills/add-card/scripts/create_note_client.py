@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Thin client for note_daemon.py with the same CLI and output as create_note.py.
+
+The client forwards its arguments to a resident daemon over a Unix socket, so the
+per-card cost is a socket round trip instead of importing and warming up the note
+writer. When no daemon is listening it falls back to running create_note.py
+in-process. Once a request has reached the daemon it is never repeated locally:
+the daemon may already have written the note, so a failure after that point is
+reported instead. Imports are kept to the bare minimum on purpose.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sys
+
+
+SOCKET_ENV = "CARD_BOX_NOTE_SOCKET"
+
+
+def default_socket_path() -> str:
+    """Socket path shared by client and daemon (overridable via CARD_BOX_NOTE_SOCKET)."""
+    configured = os.environ.get(SOCKET_ENV)
+    if configured:
+        return configured
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or "/tmp"
+    return os.path.join(runtime_dir, f"card-box-notes-{os.getuid()}.sock")
+
+
+def connect(socket_path: str) -> socket.socket | None:
+    """Open a connection to the daemon, or return None when none is listening."""
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(socket_path)
+    except OSError:
+        conn.close()
+        return None
+    return conn
+
+
+def send_request(request: dict, conn: socket.socket) -> dict:
+    """Send one request over ``conn`` and return the daemon reply."""
+    with conn:
+        conn.sendall(json.dumps(request, ensure_ascii=False).encode("utf-8"))
+        conn.shutdown(socket.SHUT_WR)
+        chunks = []
+        while True:
+            chunk = conn.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    return json.loads(b"".join(chunks))
+
+
+def run_local(argv: list[str]) -> int:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import create_note
+
+    return create_note.main(argv)
+
+
+def main(argv: list[str]) -> int:
+    if not hasattr(socket, "AF_UNIX"):
+        return run_local(argv)
+    request = {"argv": argv, "cwd": os.getcwd()}
+    if "-" in argv and "--from-jsonl" in argv:
+        request["stdin"] = sys.stdin.read()
+    socket_path = default_socket_path()
+    conn = connect(socket_path)
+    if conn is None:
+        if "stdin" in request:
+            import io
+
+            sys.stdin = io.StringIO(request["stdin"])
+        return run_local(argv)
+    try:
+        reply = send_request(request, conn)
+    except (OSError, ValueError) as exc:
+        print(f"create_note_client: note daemon at {socket_path} failed: {exc}", file=sys.stderr)
+        return 1
+    sys.stdout.write(reply.get("stdout", ""))
+    sys.stderr.write(reply.get("stderr", ""))
+    return int(reply.get("exit_code", 1))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
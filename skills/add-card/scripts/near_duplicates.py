@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""Near-duplicate detection for card summaries with MinHash + LSH banding.
+
+Summaries are shingled with the same tokenizer as `note_search.py` (words for Latin
+text, character bigrams for CJK), reduced to a 60-value MinHash signature and split
+into 20 bands of 3 rows. Each band is stored as a hashed key in
+`<folder>/.card_minhash.sqlite3`; a lookup fetches only the cards that share at least
+one band and then compares their signatures, so a lookup does not re-read the vault.
+
+Before each lookup the index catches up with cards written without
+`--near-duplicates`: it stores a cursor into the filename index log
+(`.card_index.jsonl`) and only looks at names appended since, re-reading a card
+when its size or mtime changed and dropping it when it is gone. A new index reads
+every note once; afterwards the whole folder is only walked again by `--rebuild`
+(e.g. after editing cards by hand). Summaries without any shingle get no
+signature and never match.
+
+With 20x3 banding a pair at 50% Jaccard similarity becomes a candidate with ~93%
+probability and one at 10% with ~2%; the final threshold is applied to the
+estimated similarity. Re-dictated reminders typically land around 0.4-0.6.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import sqlite3
+import struct
+import sys
+from pathlib import Path
+from typing import Dict, List, NamedTuple
+
+from create_note import parse_content
+from note_search import tokenize
+from vault_index import VaultIndex
+from vault_layout import NOTE_SUFFIX, iter_note_files
+
+
+INDEX_FILENAME = ".card_minhash.sqlite3"
+BANDS = 20
+ROWS = 3
+NUM_PERM = BANDS * ROWS
+DEFAULT_THRESHOLD = 0.4
+_SIGNATURE = struct.Struct(f"<{NUM_PERM}I")
+_BAND = struct.Struct(f"<B{ROWS}I")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS signatures (
+    name TEXT PRIMARY KEY,
+    minhash BLOB NOT NULL,
+    size INTEGER NOT NULL DEFAULT -1,
+    mtime_ns INTEGER NOT NULL DEFAULT -1
+);
+CREATE TABLE IF NOT EXISTS bands (
+    band_key INTEGER NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bands_by_key ON bands (band_key);
+CREATE INDEX IF NOT EXISTS bands_by_name ON bands (name);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class NearDuplicate(NamedTuple):
+    title: str
+    similarity: float
+
+
+def shingles(text: str) -> set[str]:
+    return set(tokenize(text))
+
+
+def minhash(text: str) -> tuple[int, ...] | None:
+    """Return the MinHash signature of ``text`` (None when it has no shingles).
+
+    Each shingle is expanded into ``NUM_PERM`` independent 32-bit hashes with one
+    SHAKE-128 call; the signature is the element-wise minimum over all shingles.
+    """
+    rows = [
+        _SIGNATURE.unpack(hashlib.shake_128(shingle.encode("utf-8")).digest(_SIGNATURE.size))
+        for shingle in shingles(text)
+    ]
+    if not rows:
+        return None
+    return tuple(map(min, zip(*rows)))
+
+
+def band_keys(signature: tuple[int, ...]) -> List[int]:
+    keys = []
+    for band in range(BANDS):
+        chunk = _BAND.pack(band, *signature[band * ROWS : (band + 1) * ROWS])
+        keys.append(int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(), "little", signed=True))
+    return keys
+
+
+def similarity(first: tuple[int, ...], second: tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(a == b for a, b in zip(first, second)) / NUM_PERM
+
+
+class NearDuplicateIndex:
+    """Persistent LSH index of card summaries for one folder.
+
+    ``vault`` is the folder's filename index, used to locate notes in sharded
+    layouts; it is loaded on first use when not given.
+    """
+
+    def __init__(self, folder: Path, threshold: float = DEFAULT_THRESHOLD, vault: VaultIndex | None = None):
+        self.folder = folder
+        self.threshold = threshold
+        self.vault = vault
+        folder.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(folder / INDEX_FILENAME)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(signatures)")}
+        if "size" not in columns:  # index created before refresh(); every card is re-read once
+            self.conn.execute("ALTER TABLE signatures ADD COLUMN size INTEGER NOT NULL DEFAULT -1")
+            self.conn.execute("ALTER TABLE signatures ADD COLUMN mtime_ns INTEGER NOT NULL DEFAULT -1")
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def find(self, summary: str) -> List[NearDuplicate]:
+        """Return existing cards whose summary is at least ``threshold`` similar."""
+        self.sync()
+        signature = minhash(summary)
+        if signature is None:
+            return []
+        keys = band_keys(signature)
+        placeholders = ",".join("?" * len(keys))
+        rows = self.conn.execute(
+            "SELECT s.name, s.minhash FROM signatures s WHERE s.name IN "
+            f"(SELECT DISTINCT name FROM bands WHERE band_key IN ({placeholders}))",
+            keys,
+        ).fetchall()
+        matches: List[NearDuplicate] = []
+        for name, blob in rows:
+            score = similarity(signature, _SIGNATURE.unpack(blob))
+            if score < self.threshold:
+                continue
+            if not self.vault.path_of(name).exists():
+                continue  # deleted outside create_note (or not committed yet)
+            matches.append(NearDuplicate(name, score))
+        matches.sort(key=lambda match: (-match.similarity, match.title))
+        return matches
+
+    def add(self, name: str, summary: str, path: Path | None = None) -> None:
+        """Index a card just written to ``path`` (its stat spares the next sync a re-read)."""
+        try:
+            stat = path.stat() if path is not None else None
+        except OSError:
+            stat = None  # staged by a group commit; kept until --rebuild re-reads it
+        with self.conn:
+            self._insert(name, summary, stat.st_size if stat else -1, stat.st_mtime_ns if stat else -1)
+
+    def remove(self, name: str) -> None:
+        with self.conn:
+            self._delete(name)
+
+    def sync(self) -> Dict[str, int]:
+        """Catch up with the names logged in the filename index since the last sync.
+
+        When the log was rewritten (rebuilt or compacted) since then, names are
+        reconciled against the whole filename index instead; an index without a
+        cursor falls back to :meth:`refresh`. Returns counts like ``refresh``.
+        """
+        vault = self._vault()
+        stored = self.conn.execute("SELECT value FROM meta WHERE key = 'cursor'").fetchone()
+        stored = json.loads(stored[0]) if stored else None
+        if stored is None:
+            return self.refresh()
+        cursor = vault.cursor
+        stats = {"indexed": 0, "removed": 0, "unchanged": 0}
+        if stored == list(cursor or ()):
+            return stats
+        names = vault.names_since(stored)
+        with self.conn:
+            if names is None:
+                known = {name for (name,) in self.conn.execute("SELECT name FROM signatures")}
+                current = set(vault.names())
+                for name in known - current:
+                    self._delete(name)
+                    stats["removed"] += 1
+                names = sorted(current - known)
+            for name in dict.fromkeys(names):
+                self._sync_name(vault.path_of(name), name, stats)
+            self._save_cursor(cursor)
+        return stats
+
+    def refresh(self) -> Dict[str, int]:
+        """Re-read cards whose size or mtime changed and drop deleted ones; returns counts.
+
+        Walks the whole folder; lookups only call it while the index has no cursor.
+        """
+        vault = self._vault()
+        cursor = vault.cursor
+        rows = self.conn.execute("SELECT name, size, mtime_ns FROM signatures")
+        known = {name: (size, mtime_ns) for name, size, mtime_ns in rows}
+        stats = {"indexed": 0, "removed": 0, "unchanged": 0}
+        with self.conn:
+            for _, entry in iter_note_files(self.folder):
+                name = entry.name[: -len(NOTE_SUFFIX)]
+                try:
+                    stat = entry.stat()
+                    if known.pop(name, None) == (stat.st_size, stat.st_mtime_ns):
+                        stats["unchanged"] += 1
+                        continue
+                    _, summary = parse_content(Path(entry.path).read_text(encoding="utf-8"))
+                except (OSError, UnicodeDecodeError):
+                    continue
+                self._insert(name, summary, stat.st_size, stat.st_mtime_ns)
+                stats["indexed"] += 1
+            for name in known:
+                self._delete(name)
+                stats["removed"] += 1
+            self._save_cursor(cursor)
+        return stats
+
+    def rebuild(self) -> int:
+        """Re-index every note in the folder; returns the number of cards indexed."""
+        with self.conn:
+            self.conn.execute("DELETE FROM signatures")
+            self.conn.execute("DELETE FROM bands")
+        return self.refresh()["indexed"]
+
+    def _vault(self) -> VaultIndex:
+        if self.vault is None:
+            self.vault = VaultIndex(self.folder)
+        else:
+            self.vault.refresh()
+        return self.vault
+
+    def _save_cursor(self, cursor: tuple[int, int, int] | None) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('cursor', ?)", (json.dumps(list(cursor or ())),)
+        )
+
+    def _sync_name(self, path: Path, name: str, stats: Dict[str, int]) -> None:
+        row = self.conn.execute("SELECT size, mtime_ns FROM signatures WHERE name = ?", (name,)).fetchone()
+        try:
+            stat = path.stat()
+            if row is not None and tuple(row) == (stat.st_size, stat.st_mtime_ns):
+                stats["unchanged"] += 1
+                return
+            _, summary = parse_content(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            # A card staged by a group commit (size -1) is kept until it lands.
+            if row is not None and row[0] != -1:
+                self._delete(name)
+                stats["removed"] += 1
+            return
+        except (OSError, UnicodeDecodeError):
+            return
+        self._insert(name, summary, stat.st_size, stat.st_mtime_ns)
+        stats["indexed"] += 1
+
+    def _insert(self, name: str, summary: str, size: int = -1, mtime_ns: int = -1) -> None:
+        signature = minhash(summary)
+        self._delete(name)
+        self.conn.execute(
+            "INSERT INTO signatures (name, minhash, size, mtime_ns) VALUES (?, ?, ?, ?)",
+            (name, _SIGNATURE.pack(*signature) if signature else b"", size, mtime_ns),
+        )
+        if signature is not None:
+            self.conn.executemany(
+                "INSERT INTO bands (band_key, name) VALUES (?, ?)",
+                ((key, name) for key in band_keys(signature)),
+            )
+
+    def _delete(self, name: str) -> None:
+        self.conn.execute("DELETE FROM signatures WHERE name = ?", (name,))
+        self.conn.execute("DELETE FROM bands WHERE name = ?", (name,))
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Look up near-duplicate cards or rebuild the MinHash index.")
+    parser.add_argument("--folder", default="fleeting", help="Notes folder (default: ./fleeting).")
+    parser.add_argument("--summary", help="Summary text to look up.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"Minimum estimated similarity (default: {DEFAULT_THRESHOLD}).",
+    )
+    parser.add_argument("--rebuild", action="store_true", help="Re-index all notes in the folder.")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    index = NearDuplicateIndex(Path(args.folder), threshold=args.threshold)
+    try:
+        if args.rebuild:
+            print(json.dumps({"indexed": index.rebuild()}))
+        if args.summary:
+            for match in index.find(args.summary):
+                print(json.dumps(match._asdict(), ensure_ascii=False))
+    finally:
+        index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
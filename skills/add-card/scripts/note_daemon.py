@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Resident note writer that serves create_note_client.py over a Unix socket.
+
+The daemon keeps create_note and the per-folder filename and near-duplicate indexes
+loaded, and handles one request at a time so writes to the vault are serialized. Each
+request carries the client's argv and working directory; the reply holds the exact
+stdout/stderr and exit code that `create_note.py` would have produced.
+
+Startup refuses to take over a socket another daemon still answers on; a stale one
+left by a crashed daemon is replaced. The socket is bound under a 0177 umask, so
+it is never reachable by other users, not even briefly.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import errno
+import io
+import json
+import os
+import signal
+import socketserver
+import stat
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+import create_note
+from create_note_client import connect, default_socket_path
+from vault_index import VaultIndex
+
+
+def handle_request(
+    request: Dict[str, Any],
+    vaults: Dict[Path, VaultIndex],
+    duplicate_indexes: Dict[Path, Any] | None = None,
+) -> Dict[str, Any]:
+    """Run create_note.main for one client request and capture its output."""
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    previous_cwd = os.getcwd()
+    previous_stdin = sys.stdin
+    try:
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                os.chdir(request.get("cwd") or previous_cwd)
+                sys.stdin = io.StringIO(request.get("stdin", ""))
+                exit_code = create_note.main(
+                    list(request.get("argv", [])), vaults=vaults, duplicate_indexes=duplicate_indexes
+                )
+            except SystemExit as exc:  # argparse errors and --help
+                exit_code = exc.code if isinstance(exc.code, int) else int(exc.code is not None)
+            except Exception as exc:  # keep serving other clients
+                print(f"note_daemon: {type(exc).__name__}: {exc}", file=sys.stderr)
+                exit_code = 1
+    finally:
+        sys.stdin = previous_stdin
+        os.chdir(previous_cwd)
+    return {"stdout": stdout.getvalue(), "stderr": stderr.getvalue(), "exit_code": exit_code}
+
+
+class NoteRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        server: NoteDaemon = self.server  # type: ignore[assignment]
+        data = self.rfile.read()
+        if not data:  # a liveness probe from a starting daemon
+            return
+        try:
+            request = json.loads(data)
+        except (json.JSONDecodeError, UnicodeDecodeError) as exc:
+            reply = {"stdout": "", "stderr": f"note_daemon: bad request: {exc}\n", "exit_code": 2}
+        else:
+            reply = handle_request(request, server.vaults, server.duplicate_indexes)
+        self.wfile.write(json.dumps(reply, ensure_ascii=False).encode("utf-8"))
+
+
+class NoteDaemon(socketserver.UnixStreamServer):
+    """Single-threaded server: requests, and therefore vault writes, run one at a time."""
+
+    def __init__(self, socket_path: str):
+        self.socket_path = socket_path
+        self.vaults: Dict[Path, VaultIndex] = {}
+        # NearDuplicateIndex per folder; near_duplicates (sqlite3) loads on the first --near-duplicates request.
+        self.duplicate_indexes: Dict[Path, Any] = {}
+        _remove_stale_socket(socket_path)
+        super().__init__(socket_path, NoteRequestHandler)
+
+    def server_bind(self) -> None:
+        previous = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(previous)
+
+    def serve_forever(self, poll_interval: float = 0.5) -> None:
+        try:
+            super().serve_forever(poll_interval)
+        finally:
+            # sqlite connections belong to the thread that served the requests.
+            for duplicates in self.duplicate_indexes.values():
+                duplicates.close()
+            self.duplicate_indexes.clear()
+
+    def server_close(self) -> None:
+        super().server_close()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.socket_path)
+
+
+def _remove_stale_socket(socket_path: str) -> None:
+    """Unlink a socket nobody listens on; raise if a daemon still answers or it is not a socket."""
+    try:
+        mode = os.lstat(socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise OSError(errno.EEXIST, f"{socket_path} exists and is not a socket")
+    conn = connect(socket_path)
+    if conn is not None:
+        conn.close()
+        raise OSError(errno.EADDRINUSE, f"a note daemon is already listening on {socket_path}")
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(socket_path)
+
+
+def _interrupt(signum: int, frame: Any) -> None:
+    raise KeyboardInterrupt
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve create_note requests over a Unix socket.")
+    parser.add_argument(
+        "--socket",
+        default=default_socket_path(),
+        help="Unix socket path (default: $CARD_BOX_NOTE_SOCKET or $XDG_RUNTIME_DIR/card-box-notes-<uid>.sock).",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    try:
+        server = NoteDaemon(args.socket)
+    except OSError as exc:
+        print(f"note_daemon: {exc}", file=sys.stderr)
+        return 1
+    signal.signal(signal.SIGTERM, _interrupt)
+    print(f"note_daemon listening on {args.socket}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
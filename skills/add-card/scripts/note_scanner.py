@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Lazy frontmatter-only scanner for fleeting notes.
+
+Listing cards or tags only needs the `---`-delimited frontmatter written by
+`build_content()`, so the scanner reads each note in small chunks until the closing
+delimiter (never more than `max_bytes`) and skips the body. Files are read in a thread
+pool to overlap I/O on slow disks, with a bounded window of in-flight reads so memory
+stays flat regardless of vault size. Records are yielded lazily in directory order.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Deque, Iterator, List, NamedTuple
+
+from create_note import parse_content
+from vault_layout import NOTE_SUFFIX, iter_note_files
+
+
+CHUNK_SIZE = 1024
+MAX_FRONTMATTER_BYTES = 64 * 1024
+DEFAULT_WORKERS = 8
+
+
+class NoteRecord(NamedTuple):
+    path: str
+    title: str
+    tags: List[str]
+    size: int
+    mtime_ns: int
+
+
+def read_frontmatter(
+    path: str | Path,
+    chunk_size: int = CHUNK_SIZE,
+    max_bytes: int = MAX_FRONTMATTER_BYTES,
+) -> str:
+    """Return the frontmatter block of ``path`` (delimiters included), or ``""``.
+
+    Reading stops at the closing ``---`` line, so the note body is never loaded.
+    """
+    buffer = b""
+    search_from = 3
+    with open(path, "rb") as fh:
+        while len(buffer) < max_bytes:
+            chunk = fh.read(chunk_size)
+            eof = not chunk
+            buffer += chunk
+            if not buffer.startswith(b"---"[: len(buffer)]):
+                return ""
+            while True:
+                start = buffer.find(b"\n---", search_from)
+                if start == -1:
+                    search_from = max(3, len(buffer) - 3)
+                    break
+                line_end = buffer.find(b"\n", start + 1)
+                if line_end == -1:
+                    if not eof:
+                        search_from = start
+                        break  # the delimiter line may continue in the next chunk
+                    line_end = len(buffer)
+                if buffer[start + 1 : line_end].strip() == b"---":
+                    return buffer[:line_end].decode("utf-8", errors="replace")
+                search_from = start + 1
+            if eof:
+                break
+    return ""
+
+
+def scan_note(path: str, size: int, mtime_ns: int) -> NoteRecord:
+    tags, _ = parse_content(read_frontmatter(path))
+    title = os.path.basename(path)[: -len(NOTE_SUFFIX)]
+    return NoteRecord(path, title, tags, size, mtime_ns)
+
+
+def _scan_batch(batch: List[tuple[str, int, int]]) -> List[NoteRecord]:
+    return [scan_note(path, size, mtime_ns) for path, size, mtime_ns in batch]
+
+
+def scan_vault(
+    folder: Path,
+    workers: int = DEFAULT_WORKERS,
+    window: int | None = None,
+    batch_size: int = 32,
+) -> Iterator[NoteRecord]:
+    """Yield a :class:`NoteRecord` per note, reading frontmatter in a thread pool.
+
+    Notes are handed to the pool in batches of ``batch_size`` to keep per-task
+    overhead low, and at most ``window`` batches (default ``2 * workers``) are
+    in flight, which bounds memory independently of the vault size.
+    """
+    window = window or workers * 2
+    pending: Deque[Future] = deque()
+    batch: List[tuple[str, int, int]] = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for _, entry in iter_note_files(folder):
+            stat = entry.stat()
+            batch.append((entry.path, stat.st_size, stat.st_mtime_ns))
+            if len(batch) < batch_size:
+                continue
+            pending.append(executor.submit(_scan_batch, batch))
+            batch = []
+            if len(pending) >= window:
+                yield from pending.popleft().result()
+        if batch:
+            pending.append(executor.submit(_scan_batch, batch))
+        while pending:
+            yield from pending.popleft().result()
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="List fleeting notes and their tags from frontmatter only.")
+    parser.add_argument("--folder", default="fleeting", help="Notes folder (default: ./fleeting).")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Reader threads (default: {DEFAULT_WORKERS}).",
+    )
+    parser.add_argument(
+        "--tag-counts",
+        action="store_true",
+        help="Print tag usage counts instead of one JSON line per note.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    records = scan_vault(Path(args.folder), workers=args.workers)
+    if args.tag_counts:
+        counts = Counter(tag for record in records for tag in record.tags)
+        for tag, count in counts.most_common():
+            print(f"{count}\t{tag}")
+        return 0
+    for record in records:
+        print(json.dumps(record._asdict(), ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""Incremental inverted index and search CLI for a fleeting notes folder.
+
+The index lives in `<folder>/.card_search.sqlite3` and maps frontmatter tags and
+summary tokens to notes. `update` only re-reads notes whose size or mtime changed
+since the last run and drops notes that disappeared. Summary text is tokenized into
+lowercase words for Latin scripts and overlapping character bigrams for CJK, so
+Chinese keywords match without a word segmenter; every CJK character is indexed
+on its own as well, so a one-character keyword such as 账 finds the notes holding it.
+
+Usage:
+    python note_search.py update --folder fleeting
+    python note_search.py query --folder fleeting --tag fleeting --keyword 登录埋点
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+from create_note import parse_content
+from vault_layout import NOTE_SUFFIX, iter_note_files
+
+
+INDEX_FILENAME = ".card_search.sqlite3"
+# PRAGMA user_version; 1 added CJK unigram terms.
+INDEX_VERSION = 1
+CJK_CHARS = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+TOKEN_RE = re.compile(f"([{CJK_CHARS}]+)|([^\\W_{CJK_CHARS}]+)")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    dir TEXT NOT NULL DEFAULT '',
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    tags TEXT NOT NULL,
+    summary TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tags (
+    tag TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    PRIMARY KEY (tag, doc_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS terms (
+    term TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    PRIMARY KEY (term, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS tags_by_doc ON tags (doc_id);
+CREATE INDEX IF NOT EXISTS terms_by_doc ON terms (doc_id);
+"""
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens for Latin text and character bigrams for CJK runs."""
+    tokens: List[str] = []
+    for match in TOKEN_RE.finditer(text.casefold()):
+        cjk, word = match.groups()
+        if word:
+            tokens.append(word)
+        elif len(cjk) == 1:
+            tokens.append(cjk)
+        else:
+            tokens.extend(cjk[idx : idx + 2] for idx in range(len(cjk) - 1))
+    return tokens
+
+
+def index_terms(text: str) -> set[str]:
+    """Terms a note is indexed under: :func:`tokenize` plus every single CJK character."""
+    terms = set(tokenize(text))
+    for match in TOKEN_RE.finditer(text.casefold()):
+        if match.group(1):
+            terms.update(match.group(1))
+    return terms
+
+
+def connect(folder: Path) -> sqlite3.Connection:
+    folder.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(folder / INDEX_FILENAME)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(docs)")}
+    if "dir" not in columns:  # index created before sharded layouts existed
+        conn.execute("ALTER TABLE docs ADD COLUMN dir TEXT NOT NULL DEFAULT ''")
+    if conn.execute("PRAGMA user_version").fetchone()[0] < INDEX_VERSION:
+        # Notes indexed with older terms are re-read by the next update.
+        with conn:
+            conn.execute("UPDATE docs SET size = -1")
+            conn.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+    return conn
+
+
+def update_index(folder: Path, conn: sqlite3.Connection | None = None) -> Dict[str, int]:
+    """Bring the index in line with the folder; return counts of added/updated/moved/removed notes.
+
+    A note that only changed shard directory (same size and mtime) is moved
+    without being re-read.
+    """
+    own_conn = conn is None
+    conn = conn or connect(folder)
+    known = {
+        name: (doc_id, size, mtime_ns, subdir)
+        for doc_id, name, size, mtime_ns, subdir in conn.execute("SELECT id, name, size, mtime_ns, dir FROM docs")
+    }
+    stats = {"added": 0, "updated": 0, "moved": 0, "removed": 0, "unchanged": 0}
+    try:
+        with conn:
+            for subdir, entry in iter_note_files(folder):
+                name = entry.name[: -len(NOTE_SUFFIX)]
+                stat = entry.stat()
+                previous = known.pop(name, None)
+                if previous and previous[1:3] == (stat.st_size, stat.st_mtime_ns):
+                    if previous[3] == subdir:
+                        stats["unchanged"] += 1
+                    else:
+                        conn.execute("UPDATE docs SET dir = ? WHERE id = ?", (subdir, previous[0]))
+                        stats["moved"] += 1
+                    continue
+                if previous:
+                    _delete_doc(conn, previous[0])
+                    stats["updated"] += 1
+                else:
+                    stats["added"] += 1
+                _insert_doc(conn, name, subdir, Path(entry.path), stat.st_size, stat.st_mtime_ns)
+            for doc_id, *_ in known.values():
+                _delete_doc(conn, doc_id)
+                stats["removed"] += 1
+    finally:
+        if own_conn:
+            conn.close()
+    return stats
+
+
+def _insert_doc(conn: sqlite3.Connection, name: str, subdir: str, path: Path, size: int, mtime_ns: int) -> None:
+    try:
+        content = path.read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError):
+        content = ""
+    tags, summary = parse_content(content)
+    cursor = conn.execute(
+        "INSERT INTO docs (name, dir, size, mtime_ns, tags, summary) VALUES (?, ?, ?, ?, ?, ?)",
+        (name, subdir, size, mtime_ns, json.dumps(tags, ensure_ascii=False), summary),
+    )
+    doc_id = cursor.lastrowid
+    conn.executemany(
+        "INSERT OR IGNORE INTO tags (tag, doc_id) VALUES (?, ?)",
+        ((tag.casefold(), doc_id) for tag in set(tags)),
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO terms (term, doc_id) VALUES (?, ?)",
+        ((term, doc_id) for term in index_terms(name + " " + summary)),
+    )
+
+
+def _delete_doc(conn: sqlite3.Connection, doc_id: int) -> None:
+    conn.execute("DELETE FROM tags WHERE doc_id = ?", (doc_id,))
+    conn.execute("DELETE FROM terms WHERE doc_id = ?", (doc_id,))
+    conn.execute("DELETE FROM docs WHERE id = ?", (doc_id,))
+
+
+def search(
+    folder: Path,
+    tags: List[str] | None = None,
+    keyword: str | None = None,
+    limit: int | None = None,
+    conn: sqlite3.Connection | None = None,
+) -> List[Dict[str, Any]]:
+    """Return notes carrying every tag and containing ``keyword`` in title or summary.
+
+    Results come back in indexing order. The query walks the postings of one
+    term and probes the others through their primary keys, so ``limit`` stops
+    the scan early instead of materializing every match.
+    """
+    lookups: List[tuple[str, str]] = []
+    needle = (keyword or "").strip().casefold()
+    for term in sorted(set(tokenize(needle))):
+        lookups.append(("terms", term))
+    for tag in tags or []:
+        lookups.append(("tags", tag.casefold()))
+    if not lookups:
+        return []
+
+    (table, value), rest = lookups[0], lookups[1:]
+    column = "term" if table == "terms" else "tag"
+    sql = (
+        f"SELECT d.name, d.dir, d.tags, d.summary FROM {table} p JOIN docs d ON d.id = p.doc_id "
+        f"WHERE p.{column} = ?"
+    )
+    params: List[Any] = [value]
+    for other_table, other_value in rest:
+        other_column = "term" if other_table == "terms" else "tag"
+        sql += (
+            f" AND EXISTS (SELECT 1 FROM {other_table} "
+            f"WHERE {other_column} = ? AND doc_id = p.doc_id)"
+        )
+        params.append(other_value)
+    sql += " ORDER BY p.doc_id"
+
+    own_conn = conn is None
+    conn = conn or connect(folder)
+    try:
+        results: List[Dict[str, Any]] = []
+        for name, subdir, tags_json, summary in conn.execute(sql, params):
+            # Bigram postings only prove the characters co-occur; confirm the phrase.
+            if needle and needle not in f"{name}\n{summary}".casefold():
+                continue
+            results.append(
+                {
+                    "title": name,
+                    "path": str(folder / subdir / f"{name}{NOTE_SUFFIX}"),
+                    "tags": json.loads(tags_json),
+                    "summary": summary,
+                }
+            )
+            if limit and len(results) >= limit:
+                break
+        return results
+    finally:
+        if own_conn:
+            conn.close()
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Index and search fleeting notes by tag or keyword.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    update = subparsers.add_parser("update", help="Incrementally refresh the index from the folder.")
+    update.add_argument("--folder", default="fleeting", help="Notes folder (default: ./fleeting).")
+
+    query = subparsers.add_parser("query", help="Find notes by tag and/or keyword.")
+    query.add_argument("--folder", default="fleeting", help="Notes folder (default: ./fleeting).")
+    query.add_argument("--tag", action="append", default=[], help="Required tag (repeatable).")
+    query.add_argument("--keyword", help="Text that must appear in the title or summary.")
+    query.add_argument("--limit", type=int, help="Maximum number of results.")
+    query.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Run an incremental update before querying.",
+    )
+    args = parser.parse_args(argv)
+    if args.command == "query" and not args.tag and not args.keyword:
+        parser.error("query needs --tag and/or --keyword.")
+    return args
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    folder = Path(args.folder)
+    conn = connect(folder)
+    try:
+        if args.command == "update":
+            stats = update_index(folder, conn)
+            print(json.dumps(stats))
+            return 0
+        if args.refresh:
+            update_index(folder, conn)
+        for result in search(folder, args.tag, args.keyword, args.limit, conn):
+            print(json.dumps(result, ensure_ascii=False))
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
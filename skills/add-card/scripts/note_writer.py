@@ -0,0 +1,157 @@
+"""Atomic note writes through a staging directory, with optional group commit.
+
+Every note is first written to `<folder>/.staging/` and then renamed over its target,
+so readers (Obsidian, sync clients) never observe a half-written file. In group-commit
+mode staged notes are published together: one flush for the whole batch, then the
+renames, then a single fsync of each target directory.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+from typing import List
+
+
+STAGING_DIRNAME = ".staging"
+STAGED_SUFFIX = ".tmp"
+
+
+def staging_dir(folder: Path) -> Path:
+    return folder / STAGING_DIRNAME
+
+
+def fsync_dir(path: Path) -> None:
+    """Persist directory entries (renames) where the platform supports it."""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _syncfs(path: Path) -> bool:
+    """Flush the whole filesystem holding ``path`` with one syscall (Linux only)."""
+    if not sys.platform.startswith("linux"):
+        return False
+    import ctypes
+
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        syncfs = libc.syncfs
+    except (OSError, AttributeError):
+        return False
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return syncfs(fd) == 0
+    finally:
+        os.close(fd)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+def recover_staging(folder: Path) -> List[Path]:
+    """Delete staged files left behind by interrupted runs and return them.
+
+    Files staged by processes that are still alive are left alone.
+    """
+    leftovers: List[Path] = []
+    staging = staging_dir(folder)
+    if not staging.is_dir():
+        return leftovers
+    for path in staging.iterdir():
+        if not path.name.endswith(STAGED_SUFFIX):
+            continue
+        pid_text = path.name[: -len(STAGED_SUFFIX)].rpartition(".")[2]
+        if pid_text.isdigit() and int(pid_text) != os.getpid() and _pid_alive(int(pid_text)):
+            continue
+        path.unlink(missing_ok=True)
+        leftovers.append(path)
+    return leftovers
+
+
+class NoteWriter:
+    """Write notes atomically, either one by one or grouped into batches.
+
+    ``durable`` makes the data survive power loss (fsync). With ``group_commit``
+    the writer buffers staged notes until :meth:`commit`, so a batch of N notes
+    costs one filesystem flush and one directory fsync instead of N of each.
+    Used as a context manager, pending notes are committed on success and
+    discarded when the block raises.
+    """
+
+    def __init__(self, folder: Path, durable: bool = False, group_commit: bool = False):
+        self.folder = folder
+        self.durable = durable
+        self.group_commit = group_commit
+        self.staging = staging_dir(folder)
+        self._pending: List[tuple[Path, Path]] = []
+        self._staging_ready = False
+
+    def __enter__(self) -> "NoteWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def write(self, target: Path, content: bytes) -> None:
+        staged = self._stage(target, content)
+        if self.group_commit:
+            self._pending.append((staged, target))
+            return
+        os.replace(staged, target)
+        if self.durable:
+            fsync_dir(target.parent)
+
+    def commit(self) -> None:
+        """Publish every pending note; no-op outside group-commit mode."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        if self.durable and not _syncfs(self.staging):
+            for staged, _ in pending:
+                with staged.open("rb") as fh:
+                    os.fsync(fh.fileno())
+        directories = set()
+        for staged, target in pending:
+            os.replace(staged, target)
+            directories.add(target.parent)
+        if self.durable:
+            for directory in directories:
+                fsync_dir(directory)
+
+    def abort(self) -> None:
+        """Drop pending staged notes without publishing them."""
+        pending, self._pending = self._pending, []
+        for staged, _ in pending:
+            staged.unlink(missing_ok=True)
+
+    def _stage(self, target: Path, content: bytes) -> Path:
+        if not self._staging_ready:
+            self.staging.mkdir(parents=True, exist_ok=True)
+            self._staging_ready = True
+        staged = self.staging / f"{target.name}.{os.getpid()}{STAGED_SUFFIX}"
+        with staged.open("wb") as fh:
+            fh.write(content)
+            if self.durable and not self.group_commit:
+                fh.flush()
+                os.fsync(fh.fileno())
+        return staged
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""Move a fleeting vault into a sharded layout (or back), resumably and in parallel.
+
+`migrate` records the target layout first, so notes written meanwhile already land
+in their shard, then moves existing notes in batches. Before each batch is moved
+its planned moves are appended to `<folder>/.card_migration.jsonl`; an interrupted
+migration is resumed by running the same command again, because notes already in
+place are skipped. `rollback` replays the journal backwards, restores the previous
+layout and deletes the journal. Notes created after the migration stay where they
+were written; the filename index records their shard either way.
+
+Stop `note_daemon.py` while migrating: it caches note locations.
+
+Usage:
+    python shard_vault.py migrate --folder fleeting --layout date
+    python shard_vault.py rollback --folder fleeting
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+from vault_index import VaultIndex
+from vault_layout import LAYOUTS, NOTE_SUFFIX, iter_note_files, read_layout, shard_dir, write_layout
+
+
+JOURNAL_FILENAME = ".card_migration.jsonl"
+DEFAULT_WORKERS = 8
+BATCH_SIZE = 256
+
+
+def read_journal(folder: Path) -> List[Dict[str, Any]]:
+    path = folder / JOURNAL_FILENAME
+    if not path.exists():
+        return []
+    entries = []
+    with path.open(encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue  # torn last line from an interrupted append
+    return entries
+
+
+def _append_journal(folder: Path, entries: Iterable[Dict[str, Any]]) -> None:
+    with (folder / JOURNAL_FILENAME).open("a", encoding="utf-8") as fh:
+        for entry in entries:
+            fh.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        fh.flush()
+        os.fsync(fh.fileno())
+
+
+def _note_path(folder: Path, subdir: str, name: str) -> Path:
+    return folder / subdir / f"{name}{NOTE_SUFFIX}"
+
+
+def _move(folder: Path, name: str, source_dir: str, target_dir: str) -> str:
+    """Move one note; returns ``"moved"``, ``"done"`` (already in place) or ``"conflict"``."""
+    source = _note_path(folder, source_dir, name)
+    target = _note_path(folder, target_dir, name)
+    if os.path.lexists(target):
+        return "conflict" if os.path.lexists(source) else "done"
+    if not os.path.lexists(source):
+        return "conflict"  # removed by someone else since it was planned
+    target.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(source, target)
+    return "moved"
+
+
+def _run_moves(
+    folder: Path,
+    moves: List[Dict[str, Any]],
+    source_key: str,
+    target_key: str,
+    workers: int,
+) -> Dict[str, int]:
+    stats = {"moved": 0, "done": 0, "conflict": 0}
+    index = VaultIndex(folder)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for start in range(0, len(moves), BATCH_SIZE):
+            batch = moves[start : start + BATCH_SIZE]
+            outcomes = list(
+                executor.map(
+                    lambda move: _move(folder, move["name"], move[source_key], move[target_key]),
+                    batch,
+                )
+            )
+            placed = []
+            for move, outcome in zip(batch, outcomes):
+                stats[outcome] += 1
+                if outcome != "conflict":
+                    placed.append({"name": move["name"], "dir": move[target_key]})
+            index.update_many(placed)
+    return stats
+
+
+def _prune_empty_dirs(folder: Path) -> None:
+    for root, _, _ in os.walk(folder, topdown=False):
+        relative = Path(root).relative_to(folder)
+        if not relative.parts or any(part.startswith(".") for part in relative.parts):
+            continue
+        try:
+            os.rmdir(root)
+        except OSError:
+            pass  # not empty
+
+
+def plan_moves(folder: Path, layout: str) -> List[Dict[str, Any]]:
+    """List the notes that are not yet where ``layout`` puts them."""
+    moves = []
+    for subdir, entry in iter_note_files(folder):
+        name = entry.name[: -len(NOTE_SUFFIX)]
+        target = shard_dir(layout, name, entry.stat().st_mtime)
+        if target != subdir:
+            moves.append({"name": name, "from": subdir, "to": target})
+    return moves
+
+
+def migrate(folder: Path, layout: str, workers: int = DEFAULT_WORKERS) -> Dict[str, int]:
+    """Move every note into ``layout``; safe to re-run after an interruption.
+
+    Existing notes are sharded by their modification time in the date layout.
+    """
+    stats = {"moved": 0, "done": 0, "conflict": 0}
+    journal = read_journal(folder)
+    if journal and not journal[-1].get("done"):
+        if journal[0].get("layout") != layout:
+            raise ValueError(
+                f"an unfinished migration to {journal[0].get('layout')!r} exists; "
+                "re-run it or roll it back first"
+            )
+        # Finish the moves planned before the interruption so the index learns
+        # where the already-moved notes went.
+        stats = _run_moves(folder, [entry for entry in journal[1:] if "name" in entry], "from", "to", workers)
+    else:
+        (folder / JOURNAL_FILENAME).unlink(missing_ok=True)
+        _append_journal(folder, [{"layout": layout, "previous": read_layout(folder)}])
+    write_layout(folder, layout)
+
+    moves = plan_moves(folder, layout)
+    for start in range(0, len(moves), BATCH_SIZE * 16):
+        chunk = moves[start : start + BATCH_SIZE * 16]
+        _append_journal(folder, chunk)
+        for key, value in _run_moves(folder, chunk, "from", "to", workers).items():
+            stats[key] += value
+    _append_journal(folder, [{"done": True}])
+    _prune_empty_dirs(folder)
+    return stats
+
+
+def rollback(folder: Path, workers: int = DEFAULT_WORKERS) -> Dict[str, int]:
+    """Undo the last migration recorded in the journal and restore the previous layout."""
+    journal = read_journal(folder)
+    if not journal:
+        raise ValueError(f"no migration journal in {folder}")
+    write_layout(folder, journal[0].get("previous", "flat"))
+    moves = [entry for entry in journal[1:] if "name" in entry]
+    moves.reverse()
+    stats = _run_moves(folder, moves, "to", "from", workers)
+    _prune_empty_dirs(folder)
+    (folder / JOURNAL_FILENAME).unlink()
+    return stats
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Shard a fleeting vault by date or name hash, or roll back.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = subparsers.add_parser("migrate", help="Move notes into a layout (resumes if interrupted).")
+    migrate_parser.add_argument("--folder", default="fleeting", help="Notes folder (default: ./fleeting).")
+    migrate_parser.add_argument("--layout", choices=LAYOUTS, required=True, help="Target layout.")
+
+    rollback_parser = subparsers.add_parser("rollback", help="Undo the last migration.")
+    rollback_parser.add_argument("--folder", default="fleeting", help="Notes folder (default: ./fleeting).")
+
+    for sub in (migrate_parser, rollback_parser):
+        sub.add_argument(
+            "--workers",
+            type=int,
+            default=DEFAULT_WORKERS,
+            help=f"Parallel rename threads (default: {DEFAULT_WORKERS}).",
+        )
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    folder = Path(args.folder)
+    try:
+        if args.command == "migrate":
+            stats = migrate(folder, args.layout, workers=args.workers)
+        else:
+            stats = rollback(folder, workers=args.workers)
+    except ValueError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+    print(json.dumps(stats))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
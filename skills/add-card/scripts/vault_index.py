@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""Persistent index of note filenames inside a fleeting folder.
+
+The index is an append-only JSONL sidecar (`.card_index.jsonl`) stored next to the
+notes. Every line records one sanitized filename; later lines win. Loading it once
+turns collision checks into set lookups instead of directory listings, and other
+processes' appends are picked up incrementally by re-reading only the new tail;
+a log rewritten by a rebuild or compaction (new inode) is reloaded in full. Once
+stale lines outnumber live entries the log is compacted to one line per note.
+Notes in a sharded layout (see `vault_layout.py`) carry their subdirectory in a `dir`
+field. The index can always be rebuilt from the folder contents.
+
+Writers serialize on an flock of a separate `.card_index.lock` file rather than the
+index itself, because a rebuild swaps the index file out with `os.replace`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence
+
+from vault_layout import NOTE_SUFFIX, iter_note_files
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no fcntl
+    fcntl = None  # type: ignore[assignment]
+
+
+INDEX_FILENAME = ".card_index.jsonl"
+LOCK_FILENAME = ".card_index.lock"
+# Compact once the log holds this many lines and more than twice as many as it has names.
+COMPACT_MIN_LINES = 1000
+
+
+def index_key(name: str) -> str:
+    """Collision key for a filename; case-insensitive like macOS/Windows volumes."""
+    return name.casefold()
+
+
+class VaultIndex:
+    """Filename index for one folder, kept in sync through an append-only log."""
+
+    def __init__(self, folder: Path):
+        self.folder = folder
+        self.path = folder / INDEX_FILENAME
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._offset = 0
+        self._lines = 0
+        self._identity: tuple[int, int] | None = None
+        if self.path.exists():
+            self._read_new()
+            return
+        with self._locked():
+            # Another process may have built it while we waited for the lock.
+            if self.path.exists():
+                self._read_new()
+            else:
+                self._rebuild()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, name: str) -> bool:
+        return index_key(name) in self._entries
+
+    def get(self, name: str) -> Dict[str, Any] | None:
+        return self._entries.get(index_key(name))
+
+    def names(self) -> List[str]:
+        return [entry["name"] for entry in self._entries.values()]
+
+    @property
+    def cursor(self) -> tuple[int, int, int] | None:
+        """Position up to which the log is merged: ``(st_dev, st_ino, offset)``."""
+        if self._identity is None:
+            return None
+        return (*self._identity, self._offset)
+
+    def refresh(self) -> None:
+        """Merge lines other processes appended since the last read."""
+        self._read_new()
+
+    def names_since(self, cursor: Sequence[int] | None) -> List[str] | None:
+        """Names of the log lines between ``cursor`` and :attr:`cursor`.
+
+        Returns None when the log was rewritten (rebuilt or compacted) since
+        ``cursor`` was taken; callers then have to compare against :meth:`names`.
+        """
+        current = self.cursor
+        if cursor is None or current is None or tuple(cursor[:2]) != current[:2] or cursor[2] > current[2]:
+            return None
+        try:
+            with self.path.open("rb") as fh:
+                stat = os.fstat(fh.fileno())
+                if (stat.st_dev, stat.st_ino) != current[:2]:
+                    return None
+                fh.seek(cursor[2])
+                data = fh.read(current[2] - cursor[2])
+        except FileNotFoundError:
+            return None
+        return [
+            entry["name"]
+            for entry in _parse_lines(data)
+            if isinstance(entry, dict) and isinstance(entry.get("name"), str)
+        ]
+
+    def path_of(self, name: str) -> Path:
+        """Location of note ``name``, inside its shard directory if it has one."""
+        entry = self.get(name) or {}
+        return self.folder / entry.get("dir", "") / f"{name}{NOTE_SUFFIX}"
+
+    def reserve(self, name: str, exists: Callable[[str], bool] | None = None) -> str:
+        """Claim ``name`` (or the first free ``name N`` variant) and record it.
+
+        Suffixes are deterministic: the second note titled ``Idea`` becomes
+        ``Idea 2``, the third ``Idea 3`` and so on. ``exists`` is asked about
+        names the index does not know, so notes created by other tools are not
+        claimed either.
+        """
+        with self._locked():
+            self._read_new()
+            candidate = name
+            counter = 2
+            while index_key(candidate) in self._entries or (exists is not None and exists(candidate)):
+                candidate = f"{name} {counter}"
+                counter += 1
+            self._append({"name": candidate})
+            self._maybe_compact()
+        return candidate
+
+    def update(self, name: str, **fields: Any) -> None:
+        """Append updated metadata for ``name`` to the log."""
+        with self._locked():
+            self._read_new()
+            self._append({"name": name, **fields})
+            self._maybe_compact()
+
+    def update_many(self, entries: Iterable[Dict[str, Any]]) -> None:
+        """Append several ``{"name": ..., **fields}`` updates under one lock."""
+        lines = [json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries]
+        if not lines:
+            return
+        with self._locked():
+            self._read_new()
+            with self.path.open("ab") as fh:
+                fh.write("".join(lines).encode("utf-8"))
+                self._offset = fh.tell()
+            for line in lines:
+                self._merge(json.loads(line))
+            self._lines += len(lines)
+            self._maybe_compact()
+
+    def rebuild(self) -> None:
+        """Regenerate the index from the ``*.md`` files present in the folder."""
+        with self._locked():
+            self._rebuild()
+
+    def _rebuild(self) -> None:
+        self.folder.mkdir(parents=True, exist_ok=True)
+        entries: Dict[str, Dict[str, Any]] = {}
+        for subdir, entry in iter_note_files(self.folder):
+            name = entry.name[: -len(NOTE_SUFFIX)]
+            entries[index_key(name)] = {"name": name, "dir": subdir} if subdir else {"name": name}
+        self._replace(entries)
+
+    def _maybe_compact(self) -> None:
+        """Rewrite the log with one line per name once stale lines dominate (lock held)."""
+        if self._lines >= COMPACT_MIN_LINES and self._lines > 2 * len(self._entries):
+            self._replace(self._entries)
+
+    def _replace(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as fh:
+            for entry in entries.values():
+                fh.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._offset = fh.tell()
+            stat = os.fstat(fh.fileno())
+        os.replace(tmp_path, self.path)
+        self._entries = entries
+        self._lines = len(entries)
+        self._identity = (stat.st_dev, stat.st_ino)
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+        with self.path.open("ab") as fh:
+            fh.write(line)
+            self._offset = fh.tell()
+        self._merge(dict(entry))
+        self._lines += 1
+
+    def _merge(self, entry: Dict[str, Any]) -> None:
+        key = index_key(entry["name"])
+        current = self._entries.get(key)
+        if current is None:
+            self._entries[key] = entry
+        else:
+            current.update(entry)
+
+    def _read_new(self) -> None:
+        """Merge lines appended since the last read (by this or other processes)."""
+        if not self.path.exists():
+            return
+        with self.path.open("rb") as fh:
+            stat = os.fstat(fh.fileno())
+            if (stat.st_dev, stat.st_ino) != self._identity or stat.st_size < self._offset:
+                # Another process rebuilt or compacted the index; reload it fully.
+                self._entries = {}
+                self._offset = 0
+                self._lines = 0
+                self._identity = (stat.st_dev, stat.st_ino)
+            fh.seek(self._offset)
+            data = fh.read()
+        # Ignore a trailing partial line; it is picked up once its writer finishes.
+        complete = data[: data.rfind(b"\n") + 1]
+        self._offset += len(complete)
+        self._lines += complete.count(b"\n")
+        for entry in _parse_lines(complete):
+            if isinstance(entry, dict) and isinstance(entry.get("name"), str):
+                self._merge(entry)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        self.folder.mkdir(parents=True, exist_ok=True)
+        with (self.folder / LOCK_FILENAME).open("ab") as lock_fh:
+            fcntl.flock(lock_fh.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_fh.fileno(), fcntl.LOCK_UN)
+
+
+def _parse_lines(data: bytes) -> List[Any]:
+    """Decode JSONL bytes, using a single ``json.loads`` call when every line is valid."""
+    body = data.strip()
+    if not body:
+        return []
+    try:
+        return json.loads(b"[" + body.replace(b"\n", b",") + b"]")
+    except json.JSONDecodeError:
+        pass
+    entries = []
+    for raw in body.splitlines():
+        try:
+            entries.append(json.loads(raw))
+        except json.JSONDecodeError:
+            continue
+    return entries
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Inspect or rebuild the fleeting folder filename index.")
+    parser.add_argument(
+        "--folder",
+        default="fleeting",
+        help="Folder that holds the notes (default: ./fleeting).",
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Regenerate the index from the notes currently in the folder.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    index = VaultIndex(Path(args.folder))
+    if args.rebuild:
+        index.rebuild()
+    print(f"{index.path}: {len(index)} names")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
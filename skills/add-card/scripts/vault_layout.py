@@ -0,0 +1,104 @@
+"""Folder layouts for fleeting vaults: flat, or sharded by date or by name hash.
+
+The layout is recorded in `<folder>/.card_layout.json` so every tool resolves it the
+same way; a folder without the file is flat. `date` places new notes under
+`YYYY/MM/`, `hash` under a two-hex-digit prefix of the casefolded name (256 shards).
+Note names stay unique across the whole vault, and each note's subdirectory is kept
+in the filename index (`dir` field), so lookups never have to search the shards.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+
+LAYOUT_FILENAME = ".card_layout.json"
+NOTE_SUFFIX = ".md"
+LAYOUTS = ("flat", "date", "hash")
+
+
+def read_layout(folder: Path) -> str:
+    try:
+        with open(folder / LAYOUT_FILENAME, encoding="utf-8") as fh:
+            layout = json.load(fh).get("layout", "flat")
+    except (FileNotFoundError, ValueError, AttributeError):
+        return "flat"
+    return layout if layout in LAYOUTS else "flat"
+
+
+def write_layout(folder: Path, layout: str) -> None:
+    if layout not in LAYOUTS:
+        raise ValueError(f"unknown layout {layout!r}")
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / LAYOUT_FILENAME
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps({"layout": layout}) + "\n", encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def shard_dir(layout: str, name: str, timestamp: float | None = None) -> str:
+    """Return the subdirectory (relative, ``/``-separated) for note ``name``.
+
+    ``timestamp`` picks the month for the date layout and defaults to now.
+    """
+    if layout == "date":
+        return time.strftime("%Y/%m", time.localtime(timestamp))
+    if layout == "hash":
+        return hashlib.blake2b(name.casefold().encode("utf-8"), digest_size=1).hexdigest()
+    return ""
+
+
+def note_dirs(folder: Path, layout: str, name: str) -> List[str]:
+    """Subdirectories in which a note called ``name`` may already exist.
+
+    That is the top level (notes written before a migration) plus the shard the
+    name maps to, or, for the date layout, every existing ``YYYY/MM`` shard; only
+    the two small year/month levels are listed, never the notes themselves.
+    """
+    dirs = [""]
+    if layout == "hash":
+        dirs.append(shard_dir(layout, name))
+    elif layout == "date":
+        for year in _subdirs(folder, 4):
+            dirs.extend(f"{year}/{month}" for month in _subdirs(folder / year, 2))
+    return dirs
+
+
+def _subdirs(path: Path, digits: int) -> List[str]:
+    try:
+        with os.scandir(path) as it:
+            return sorted(
+                entry.name
+                for entry in it
+                if len(entry.name) == digits and entry.name.isdigit() and entry.is_dir(follow_symlinks=False)
+            )
+    except FileNotFoundError:
+        return []
+
+
+def iter_note_files(folder: Path) -> Iterator[Tuple[str, os.DirEntry]]:
+    """Yield ``(subdir, entry)`` for every note, descending into shard directories.
+
+    Dot-files and dot-directories (indexes, staging) are skipped; ``subdir`` is
+    ``""`` for notes at the top level.
+    """
+    stack = [""]
+    while stack:
+        subdir = stack.pop()
+        try:
+            it = os.scandir(folder / subdir if subdir else folder)
+        except FileNotFoundError:
+            continue
+        with it:
+            for entry in it:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(f"{subdir}/{entry.name}" if subdir else entry.name)
+                elif entry.name.endswith(NOTE_SUFFIX) and entry.is_file():
+                    yield subdir, entry
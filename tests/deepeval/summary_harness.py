@@ -1,16 +1,26 @@
 from __future__ import annotations
 
 import json
+import os
+import sys
 from pathlib import Path
 from typing import Literal, Any
-from openai import OpenAI
 
 
-client = OpenAI()
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
 
+from tests.deepeval.utils.response_cache import RecordReplayClient, ResponseStore  # noqa: E402
 
-REPO_ROOT = Path(__file__).resolve().parents[2]
 SKILL_PATH = REPO_ROOT / "skills" / "add-card" / "SKILL.md"
+RESPONSES_DIR = Path(
+    os.environ.get("SUMMARY_HARNESS_CACHE_DIR") or REPO_ROOT / "tests" / "fixtures" / "summary_responses"
+)
+
+# Responses are recorded per request and replayed (see utils/response_cache.py);
+# SUMMARY_HARNESS_CACHE=replay (default)|record|refresh picks the mode.
+client = RecordReplayClient(ResponseStore(RESPONSES_DIR))
 tools = [
     {
         "type": "function",
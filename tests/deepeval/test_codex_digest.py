@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+TEST_DIR = Path(__file__).resolve().parent
+FIXTURES = REPO_ROOT / "tests" / "fixtures"
+FIXTURE_RUNS = sorted(FIXTURES.glob("quote_card_trigger_cases_[0-9][0-9].json"))
+for path in (REPO_ROOT, TEST_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from scripts import codex_digest, codex_runlog, run_codex_exec  # noqa: E402
+from utils import fake_codex  # noqa: E402
+
+CARD_OUTPUT = (
+    "Created note at fleeting/T.md\n```card_json\n"
+    + json.dumps({"title": "T", "summary": "摘要", "near_duplicates": [{"title": "U", "similarity": 0.5}]})
+    + "\n```\n"
+)
+
+
+def _completed(command: str, output: str = "", exit_code: int = 0, item_id: str = "item_0") -> dict:
+    return {
+        "type": "item.completed",
+        "item": {
+            "id": item_id,
+            "type": "command_execution",
+            "command": command,
+            "aggregated_output": output,
+            "exit_code": exit_code,
+        },
+    }
+
+
+def test_digest_collects_commands_trigger_reasoning_and_cards() -> None:
+    create_note = "python3 " + codex_digest.CREATE_NOTE_MARKER
+    reasoning = {"type": "item.completed", "item": {"id": "r1", "type": "reasoning", "text": "**Plan**"}}
+    events = [
+        {"type": "thread.started"},
+        reasoning,
+        reasoning,
+        {"type": "reasoning", "text": "legacy"},
+        fake_codex.command_event("cat quote-card-trigger/SKILL.md"),
+        _completed("cat quote-card-trigger/SKILL.md"),
+        {"type": "item.started", "item": {"id": "item_1", "type": "command_execution", "command": create_note}},
+        _completed(create_note, CARD_OUTPUT, item_id="item_1"),
+        _completed("false", exit_code=1, item_id="item_2"),
+        {"type": "turn.completed", "usage": {"input_tokens": 10, "output_tokens": 2}},
+    ]
+
+    digest = codex_digest.digest_events(events)
+
+    assert digest["event_count"] == len(events)
+    assert digest["trigger_fired"] is True
+    assert digest["reasoning"] == ["**Plan**", "legacy"]
+    assert [(entry["command"][:4], entry["exit_code"]) for entry in digest["commands"]] == [
+        ("cat ", 0),
+        ("pyth", 0),
+        ("fals", 1),
+    ]
+    assert digest["cards"][0]["near_duplicates"] == [{"title": "U", "similarity": 0.5}]
+    assert codex_digest.card_summary(digest) == "摘要"
+    assert digest["usage"] == digest["tokens"] == {"input_tokens": 10, "output_tokens": 2}
+
+
+def test_trigger_needs_a_started_command() -> None:
+    digest = codex_digest.digest_events([_completed("quote-card-trigger")])
+
+    assert digest["trigger_fired"] is False
+    assert codex_digest.card_summary(digest) == ""
+
+
+@pytest.mark.parametrize("source", FIXTURE_RUNS, ids=lambda path: path.stem)
+def test_fixture_sidecars_match_events(source: Path) -> None:
+    sidecar = codex_runlog.load_digest(source)
+
+    assert sidecar is not None, f"stale digest; run: python scripts/codex_runlog.py digest {source.name}"
+    assert sidecar == codex_digest.digest_events(codex_runlog.iter_events(source))
+
+
+def test_stale_or_foreign_sidecar_is_ignored(tmp_path: Path) -> None:
+    run = tmp_path / "case.json"
+    codex_runlog.write_run(run, {"events": [], "digest": codex_digest.digest_events([])})
+    assert codex_runlog.load_digest(run) is not None
+    assert "digest" not in json.loads(run.read_text(encoding="utf-8"))
+
+    codex_runlog.write_run(run, {"events": [fake_codex.command_event("quote-card-trigger")]})
+
+    assert codex_runlog.load_digest(run) is None
+    assert codex_runlog.run_digest(run)["trigger_fired"] is True
+    compact = tmp_path / "case.jsonl.gz"
+    compact.write_bytes(b"")
+    assert codex_runlog.load_digest(compact) is None
+
+
+def test_run_codex_digest_covers_dropped_events(tmp_path: Path, monkeypatch) -> None:
+    bin_dir = tmp_path / "bin"
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+    fake_codex.install(
+        bin_dir,
+        [{"event": fake_codex.command_event("quote-card-trigger")}]
+        + [{"event": {"type": "tick"}} for _ in range(20)],
+    )
+    output = tmp_path / "out" / "case.jsonl.gz"
+
+    exit_code = run_codex_exec.main(
+        ["--text", "hi", "--working-dir", str(tmp_path), "--output-file", str(output), "--max-events", "5"]
+    )
+
+    assert exit_code == 0
+    digest = codex_runlog.load_digest(output)
+    assert digest is not None and digest["trigger_fired"] is True
+    assert digest["event_count"] == 21
+    assert "digest" not in codex_runlog.read_header(output)
+
+
+def test_convert_writes_sidecar_for_target(tmp_path: Path, capsys) -> None:
+    source = tmp_path / "case.json"
+    source.write_bytes(FIXTURE_RUNS[0].read_bytes())
+
+    assert codex_runlog.main(["convert", str(source), "--remove"]) == 0
+
+    digest = codex_runlog.load_digest(tmp_path / "case.jsonl.gz")
+    assert digest is not None and digest["trigger_fired"] is True
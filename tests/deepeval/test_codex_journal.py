@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+TEST_DIR = Path(__file__).resolve().parent
+for path in (REPO_ROOT, TEST_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from scripts import codex_journal, run_codex_batch  # noqa: E402
+from utils import fake_codex  # noqa: E402
+
+
+def _manifest(tmp_path: Path, count: int) -> Path:
+    manifest = tmp_path / "cases.jsonl"
+    manifest.write_text("".join(json.dumps({"prompt": f"p{n}"}) + "\n" for n in range(count)), encoding="utf-8")
+    return manifest
+
+
+def test_read_journal_keeps_latest_entry_and_skips_a_torn_tail(tmp_path: Path) -> None:
+    path = tmp_path / "run.journal.jsonl"
+    journal = codex_journal.Journal(path, tmp_path / "cases.jsonl")
+    journal.record(1, "failed", "p0", tmp_path / "a.json", 1.0, "codex exited with 1")
+    journal.record(1, "done", "p0", tmp_path / "a.json", 2.0)
+    journal.record(2, "done", "p1", tmp_path / "b.json", 3.0)
+    journal.close()
+    with path.open("a", encoding="utf-8") as fh:
+        fh.write('{"case": 3, "status": "do')
+
+    entries = codex_journal.read_journal(path)
+
+    assert sorted(entries) == [1, 2] and entries[1]["status"] == "done"
+    assert entries[2]["prompt"] == codex_journal.prompt_hash("p1")
+    codex_journal.Journal(path, tmp_path / "cases.jsonl", resume=True).close()
+    assert json.loads(path.read_text(encoding="utf-8").splitlines()[-1])["resumed"] is True
+
+
+def test_resume_after_kill_runs_only_unfinished_cases(tmp_path: Path, monkeypatch, capsys) -> None:
+    bin_dir = tmp_path / "bin"
+    fake_codex.install(bin_dir, [{"sleep": 0.3}, {"event": {"type": "turn.completed"}}])
+    env = {**os.environ, "PATH": f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}"}
+    manifest = _manifest(tmp_path, 6)
+    journal = tmp_path / "out" / "codex_run_case.journal.jsonl"
+    argv = ["--input-file", str(manifest), "--output-dir", str(tmp_path / "out"), "--no-cache", "--sandbox", ""]
+    argv += ["--workdir-root", str(tmp_path / "codex_tmp")]
+    process = subprocess.Popen(
+        [sys.executable, str(REPO_ROOT / "scripts" / "run_codex_batch.py"), *argv],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline and len(codex_journal.read_journal(journal)) < 2:
+        time.sleep(0.05)
+    os.killpg(process.pid, signal.SIGKILL)
+    process.wait()
+    finished = set(codex_journal.read_journal(journal))
+    assert 2 <= len(finished) < 6
+
+    monkeypatch.setenv("PATH", env["PATH"])
+    assert run_codex_batch.main(argv + ["--resume"]) == 0
+
+    out = capsys.readouterr().out
+    ran = {int(line.split()[3]) for line in out.splitlines() if line.startswith("[run ]")}
+    assert ran == set(range(1, 7)) - finished
+    assert f"[resume] {len(finished)} cases already finished" in out
+    entries = codex_journal.read_journal(journal)
+    assert sorted(entries) == list(range(1, 7)) and all(e["status"] == "done" for e in entries.values())
+
+
+def test_resume_reruns_cases_whose_prompt_changed(tmp_path: Path, monkeypatch, capsys) -> None:
+    bin_dir = tmp_path / "bin"
+    fake_codex.install(bin_dir, [{"event": {"type": "turn.completed"}}])
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+    manifest = _manifest(tmp_path, 3)
+    argv = ["--input-file", str(manifest), "--output-dir", str(tmp_path / "out"), "--no-cache", "--sandbox", ""]
+    argv += ["--workdir-root", str(tmp_path / "codex_tmp")]
+    argv += ["--overwrite"]
+    assert run_codex_batch.main(argv) == 0
+    capsys.readouterr()
+
+    manifest.write_text(manifest.read_text(encoding="utf-8").replace('"p1"', '"p1 edited"'), encoding="utf-8")
+    assert run_codex_batch.main(argv + ["--resume"]) == 0
+
+    out = capsys.readouterr().out
+    assert "Case 2: prompt differs from the journal entry" in out
+    assert [line for line in out.splitlines() if line.startswith("[done]")] == ["[done] Case 2 finished successfully."]
+
+
+def test_resume_retries_failed_cases(tmp_path: Path, monkeypatch, capsys) -> None:
+    bin_dir = tmp_path / "bin"
+    fake_codex.install(bin_dir, [{"exit": 2}])
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+    manifest = _manifest(tmp_path, 2)
+    argv = ["--input-file", str(manifest), "--output-dir", str(tmp_path / "out"), "--no-cache", "--sandbox", ""]
+    argv += ["--workdir-root", str(tmp_path / "codex_tmp")]
+    assert run_codex_batch.main(argv) == 0
+    capsys.readouterr()
+
+    fake_codex.install(bin_dir, [{"event": {"type": "turn.completed"}}])
+    assert run_codex_batch.main(argv + ["--resume"]) == 0
+
+    out = capsys.readouterr().out
+    assert out.count("finished successfully") == 2 and "[resume]" not in out
+    entries = codex_journal.read_journal(tmp_path / "out" / "codex_run_case.journal.jsonl")
+    assert [entry["status"] for entry in entries.values()] == ["done", "done"]
+
+
+def test_bounded_map_limits_planned_jobs() -> None:
+    pulled = 0
+
+    def jobs():
+        nonlocal pulled
+        for n in range(50):
+            pulled += 1
+            yield (n,)
+
+    seen = []
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        for result in run_codex_batch.bounded_map(executor, lambda n: time.sleep(0.002) or n, jobs(), 4):
+            seen.append(result)
+            assert pulled - len(seen) <= 4
+
+    assert sorted(seen) == list(range(50))
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+TEST_DIR = Path(__file__).resolve().parent
+for path in (REPO_ROOT, TEST_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from scripts import codex_digest, codex_matrix  # noqa: E402
+from utils import fake_codex  # noqa: E402
+
+
+def _card_event(summary: str, item_id: str) -> dict:
+    output = "```card_json\n" + json.dumps({"summary": summary}, ensure_ascii=False) + "\n```"
+    item = {
+        "id": item_id,
+        "type": "command_execution",
+        "command": "python3 " + codex_digest.CREATE_NOTE_MARKER,
+        "aggregated_output": output,
+        "exit_code": 0,
+    }
+    return {"type": "item.completed", "item": item}
+
+
+@pytest.fixture
+def matrix_setup(tmp_path: Path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    fake_codex.install(
+        bin_dir,
+        [
+            {"event": {"type": "thread.started"}},
+            {
+                "if_skill": ["quote-card-trigger", "v2"],
+                "steps": [{"event": fake_codex.command_event("quote-card-trigger")}],
+            },
+            {"if_arg": "gpt-x", "steps": [{"event": _card_event("model x", "item_1")}]},
+            {"event": _card_event("base", "item_2")},
+            {"event": {"type": "turn.completed"}},
+        ],
+    )
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+    skills = tmp_path / "skills"
+    for skill in ("quote-card-trigger", "add-card"):
+        (skills / skill).mkdir(parents=True)
+        (skills / skill / "SKILL.md").write_text(f"---\nname: {skill}\nversion: 1\n---\nv1\n", encoding="utf-8")
+    (tmp_path / "SKILL.v2.md").write_text("---\nname: quote-card-trigger\nversion: 2\n---\nv2\n", encoding="utf-8")
+    home = tmp_path / "codex_home"
+    home.mkdir()
+    (home / "config.toml").write_text("", encoding="utf-8")
+    monkeypatch.setenv("CODEX_HOME", str(home))
+    variants = tmp_path / "variants.json"
+    specs = [
+        {"name": "baseline"},
+        {"name": "same", "skills_dir": "skills"},
+        {"name": "v2", "skills": {"quote-card-trigger": "SKILL.v2.md"}},
+        {"name": "gpt", "codex_args": ["-m", "gpt-x"]},
+    ]
+    variants.write_text(json.dumps(specs), encoding="utf-8")
+    manifest = tmp_path / "cases.jsonl"
+    cases = [
+        {"prompt": "p0", "expected_trigger": True},
+        {"prompt": "p1", "expected_trigger": False},
+        {"prompt": "p0", "expected_trigger": True},
+    ]
+    manifest.write_text("".join(json.dumps(case) + "\n" for case in cases), encoding="utf-8")
+    out = tmp_path / "out"
+    argv = ["--input-file", str(manifest), "--variants", str(variants), "--output-dir", str(out)]
+    argv += ["--workdir-root", str(tmp_path / "codex_tmp")]
+    argv += ["--skills-dir", str(skills), "--codex-home", str(home), "--cache-dir", str(tmp_path / "cache")]
+    return argv + ["--sandbox", "", "--parallel", "3"], out
+
+
+def test_matrix_runs_each_distinct_key_once_and_compares(matrix_setup, tmp_path: Path, capsys) -> None:
+    argv, out = matrix_setup
+
+    assert codex_matrix.main(argv) == 0
+
+    stdout = capsys.readouterr().out
+    # baseline and "same" share keys, and case 3 repeats case 1: 2 prompts x 3 setups.
+    assert "[matrix] 3 cases x 4 variants: 6 runs (0 failed)" in stdout and "6 shared, 0 hits" in stdout
+    assert "[same] Case 1 [same] shares the run of Case 1 [baseline]." in stdout
+    home = out / ".variants" / "v2" / "codex_home"
+    assert (home / "config.toml").is_symlink()
+    assert "v2" in (home / "skills" / "quote-card-trigger" / "SKILL.md").read_text(encoding="utf-8")
+    assert (home / "skills" / "add-card" / "SKILL.md").exists()
+    # --skills-dir is not the installed skills, so the baseline gets a codex home of its own.
+    assert (out / ".variants" / "baseline" / "codex_home" / "skills").resolve() == tmp_path / "skills"
+
+    comparison = json.loads((out / "comparison.json").read_text(encoding="utf-8"))
+    first = comparison["cases"][0]
+    assert first["trigger_differs"] is True
+    assert {name: cell["trigger"] for name, cell in first["variants"].items()} == {
+        "baseline": False,
+        "same": False,
+        "v2": True,
+        "gpt": False,
+    }
+    assert first["variants"]["gpt"]["summary"] == "model x" and first["variants"]["v2"]["summary"] == "base"
+    totals = {variant["name"]: (variant["triggered"], variant["correct"]) for variant in comparison["variants"]}
+    assert totals == {"baseline": (0, 1), "same": (0, 1), "v2": (3, 2), "gpt": (0, 1)}
+    table = (out / "comparison.md").read_text(encoding="utf-8")
+    assert "| 1 | ≠ | p0 | ✓ | ✗ base | ✗ base | ✓ base | ✗ model x |" in table
+    assert "| | | **accuracy** | | 1/3 | 1/3 | 2/3 | 1/3 |" in table
+
+    assert codex_matrix.main(argv) == 0
+    assert "0 runs (0 failed) in" in capsys.readouterr().out
+
+
+def test_matrix_reruns_failed_cells_and_uses_the_installed_skills(matrix_setup, tmp_path: Path, capsys) -> None:
+    argv, out = matrix_setup
+    skills_at = argv.index("--skills-dir")
+    argv = argv[:skills_at] + argv[skills_at + 2 :]
+    installed = tmp_path / "codex_home" / "skills" / "quote-card-trigger"
+    installed.mkdir(parents=True)
+    (installed / "SKILL.md").write_text("---\nname: quote-card-trigger\nversion: 9\n---\n", encoding="utf-8")
+    failing = [{"if_arg": "gpt-x", "steps": [{"exit": 3}]}, {"event": {"type": "turn.completed"}}]
+    fake_codex.install(tmp_path / "bin", failing)
+
+    assert codex_matrix.main(argv) == 0
+
+    assert "(2 failed)" in capsys.readouterr().out
+    assert not (out / ".variants" / "baseline").exists()
+    comparison = json.loads((out / "comparison.json").read_text(encoding="utf-8"))
+    skills = {variant["name"]: variant["skills"] for variant in comparison["variants"]}
+    assert skills["baseline"]["quote-card-trigger"]["version"] == "9"
+    assert skills["v2"]["quote-card-trigger"]["version"] == "2" and "add-card" not in skills["v2"]
+
+    fake_codex.install(tmp_path / "bin", [{"event": {"type": "turn.completed"}}])
+    assert codex_matrix.main(argv) == 0
+    second = capsys.readouterr().out
+    assert "2 runs (0 failed)" in second and "[run ] Case 1 [gpt]" in second and "[run ] Case 1 [v2]" not in second
+
+
+def test_load_variants_rejects_bad_entries(tmp_path: Path) -> None:
+    path = tmp_path / "variants.jsonl"
+    for spec, message in (
+        ('{"name": "a"}\n{"name": "a"}', "listed twice"),
+        ('{"name": "../a"}', "name must be"),
+        ('{"name": "a", "skill_dir": "x"}', "unknown fields skill_dir"),
+        ('{"name": "a", "skills": {"add-card": "missing.md"}}', "does not exist"),
+        ('{"name": "a", "codex_args": "-m x"}', "list of strings"),
+    ):
+        path.write_text(spec, encoding="utf-8")
+        with pytest.raises(ValueError, match=message):
+            codex_matrix.load_variants(path)
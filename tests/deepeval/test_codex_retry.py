@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import json
+import os
+import random
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+TEST_DIR = Path(__file__).resolve().parent
+for path in (REPO_ROOT, TEST_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from scripts import codex_retry, run_codex_exec  # noqa: E402
+from utils import fake_codex  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def _attempts(outcomes, clock: FakeClock | None = None, seconds: float = 1.0):
+    calls = []
+
+    def attempt(timeout: float) -> dict:
+        calls.append(timeout)
+        if clock is not None:
+            clock.now += seconds
+        success = outcomes[len(calls) - 1]
+        return {"success": success, "exit_code": 0 if success else None, "error": None if success else "Timed out."}
+
+    return attempt, calls
+
+
+def test_backoff_is_jittered_and_capped() -> None:
+    policy = codex_retry.RetryPolicy(retries=5, backoff=1.0, max_backoff=4.0)
+    rng = random.Random(7)
+
+    delays = [[codex_retry.backoff_delay(policy, attempt, rng) for attempt in range(6)] for _ in range(200)]
+
+    for attempt, ceiling in enumerate([1, 2, 4, 4, 4, 4]):
+        column = [row[attempt] for row in delays]
+        assert all(0 <= delay <= ceiling for delay in column)
+        assert max(column) > ceiling * 0.9 and len(set(column)) == len(column)
+
+
+def test_retries_until_success_and_records_history() -> None:
+    attempt, calls = _attempts([False, False, True])
+    slept = []
+
+    result = codex_retry.run_with_retries(
+        attempt, 30.0, codex_retry.RetryPolicy(retries=3, backoff=0.5), sleep=slept.append, rng=random.Random(1)
+    )
+
+    assert result["success"] and calls == [30.0, 30.0, 30.0]
+    assert [entry["success"] for entry in result["attempts"]] == [False, False, True]
+    assert result["attempts"][0]["error"] == "Timed out."
+    assert [entry["backoff"] for entry in result["attempts"][:2]] == [round(delay, 3) for delay in slept]
+    assert "backoff" not in result["attempts"][2] and "budget_exhausted" not in result
+
+
+def test_budget_caps_timeouts_and_stops_retrying() -> None:
+    clock = FakeClock()
+    budget = codex_retry.TimeBudget(25.0, clock=clock)
+    attempt, calls = _attempts([False] * 10, clock, seconds=10.0)
+
+    result = codex_retry.run_with_retries(
+        attempt, 20.0, codex_retry.RetryPolicy(retries=9, backoff=0.0), budget, sleep=clock.sleep
+    )
+
+    assert calls == [20.0, 15.0, 5.0]
+    assert result["budget_exhausted"] is True and not result["success"]
+    assert len(result["attempts"]) == 3
+
+
+def test_exhausted_budget_runs_nothing() -> None:
+    clock = FakeClock()
+    budget = codex_retry.TimeBudget(0.0, clock=clock)
+    attempt, calls = _attempts([True])
+
+    result = codex_retry.run_with_retries(attempt, 10.0, budget=budget)
+
+    assert calls == [] and result["attempts"] == [] and result["budget_exhausted"] is True
+
+
+def test_adaptive_timeout_follows_percentile() -> None:
+    timeouts = codex_retry.AdaptiveTimeout(60.0, factor=2.0, percentile=0.9, minimum=5.0, min_samples=3)
+    assert timeouts.current() == 60.0
+
+    for seconds in [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]:
+        timeouts.record(seconds)
+    assert timeouts.current() == 20.0
+
+    timeouts.record(200.0)
+    timeouts.record(300.0)
+    assert timeouts.current() == 120.0  # capped at twice the initial timeout
+
+    fast = codex_retry.AdaptiveTimeout(60.0, min_samples=1)
+    fast.record(0.1)
+    assert fast.current() == 5.0
+
+
+def test_cli_retries_failed_runs(tmp_path: Path, monkeypatch, capsys) -> None:
+    bin_dir = tmp_path / "bin"
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+    fake_codex.install(bin_dir, [{"event": {"type": "thread.started"}}, {"exit": 3}])
+    output = tmp_path / "out.json"
+
+    exit_code = run_codex_exec.main(
+        ["--text", "hi", "--working-dir", str(tmp_path), "--output-file", str(output)]
+        + ["--retries", "2", "--backoff", "0.01", "--time-budget", "30"]
+    )
+
+    result = json.loads(output.read_text(encoding="utf-8"))
+    assert exit_code == 3
+    assert [(entry["attempt"], entry["exit_code"]) for entry in result["attempts"]] == [(1, 3), (2, 3), (3, 3)]
+    assert result["attempts"][0]["timeout"] <= 30.0
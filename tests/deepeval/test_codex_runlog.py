@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+TEST_DIR = Path(__file__).resolve().parent
+FIXTURES = REPO_ROOT / "tests" / "fixtures"
+for path in (REPO_ROOT, TEST_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from scripts import codex_runlog, run_codex_exec  # noqa: E402
+from utils import fake_codex  # noqa: E402
+
+FIXTURE_RUNS = sorted(FIXTURES.glob("quote_card_trigger_cases_[0-9][0-9].json"))
+
+
+@pytest.mark.parametrize("source", FIXTURE_RUNS, ids=lambda path: path.stem)
+def test_compact_round_trip(tmp_path: Path, source: Path) -> None:
+    target = tmp_path / codex_runlog.compact_path(source).name
+
+    codex_runlog.write_run(target, codex_runlog.load_run(source))
+
+    assert target.name.endswith(".jsonl.gz")
+    assert codex_runlog.load_run(target) == json.loads(source.read_text(encoding="utf-8"))
+    assert list(codex_runlog.iter_events(target)) == list(codex_runlog.iter_events(source))
+    assert target.stat().st_size < source.stat().st_size
+
+
+def test_header_and_lazy_events(tmp_path: Path) -> None:
+    path = tmp_path / "run.jsonl.gz"
+    events = [{"type": "tick", "n": n} for n in range(1000)]
+    codex_runlog.write_run(path, {"command": "codex exec", "success": True, "events": events})
+
+    assert codex_runlog.read_header(path) == {"command": "codex exec", "success": True}
+    stream = codex_runlog.iter_events(path)
+    assert next(stream) == {"type": "tick", "n": 0}
+    stream.close()
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        assert json.loads(fh.readline())["format"] == codex_runlog.FORMAT
+
+
+def test_compact_output_is_deterministic(tmp_path: Path) -> None:
+    result = {"success": True, "events": [{"type": "thread.started"}]}
+    first, second = tmp_path / "a.jsonl.gz", tmp_path / "b.jsonl.gz"
+    codex_runlog.write_run(first, result)
+    codex_runlog.write_run(second, result)
+
+    assert first.read_bytes() == second.read_bytes()
+    assert [path.name for path in tmp_path.iterdir() if path.name.startswith(".")] == []
+
+
+def test_rejects_foreign_or_newer_logs(tmp_path: Path) -> None:
+    foreign = tmp_path / "foreign.jsonl.gz"
+    with gzip.open(foreign, "wt", encoding="utf-8") as fh:
+        fh.write('{"type": "thread.started"}\n')
+    newer = tmp_path / "newer.jsonl.gz"
+    with gzip.open(newer, "wt", encoding="utf-8") as fh:
+        fh.write(json.dumps({"format": codex_runlog.FORMAT, "version": 99}) + "\n")
+
+    with pytest.raises(ValueError, match="not a codex-run log"):
+        codex_runlog.read_header(foreign)
+    with pytest.raises(ValueError, match="unsupported codex-run version 99"):
+        list(codex_runlog.iter_events(newer))
+
+
+def test_find_run_falls_back_to_compact_sibling(tmp_path: Path) -> None:
+    pretty = tmp_path / "case_01.json"
+    assert codex_runlog.find_run(pretty) == pretty
+
+    codex_runlog.write_run(tmp_path / "case_01.jsonl.gz", {"events": []})
+
+    assert codex_runlog.find_run(pretty) == tmp_path / "case_01.jsonl.gz"
+    pretty.write_text("{}", encoding="utf-8")
+    assert codex_runlog.find_run(pretty) == pretty
+
+
+def test_convert_cli_both_ways(tmp_path: Path, capsys) -> None:
+    source = tmp_path / "case.json"
+    source.write_bytes(FIXTURE_RUNS[0].read_bytes())
+
+    assert codex_runlog.main(["convert", str(source), "--remove"]) == 0
+    compact = tmp_path / "case.jsonl.gz"
+    assert compact.exists() and not source.exists()
+
+    assert codex_runlog.main(["convert", str(compact)]) == 0
+    assert json.loads(source.read_text(encoding="utf-8")) == json.loads(FIXTURE_RUNS[0].read_text(encoding="utf-8"))
+    assert "case.jsonl.gz" in capsys.readouterr().out
+
+
+def test_run_codex_exec_writes_compact_output(tmp_path: Path, monkeypatch) -> None:
+    bin_dir = tmp_path / "bin"
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+    fake_codex.install(bin_dir, [{"event": {"type": "thread.started"}}, {"event": fake_codex.command_event("ls")}])
+    output = tmp_path / "out" / "case.jsonl.gz"
+
+    exit_code = run_codex_exec.main(["--text", "hi", "--working-dir", str(tmp_path), "--output-file", str(output)])
+
+    assert exit_code == 0
+    assert codex_runlog.read_header(output)["exit_code"] == 0
+    assert [event["type"] for event in codex_runlog.iter_events(output)] == ["thread.started", "item.started"]
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+TEST_DIR = Path(__file__).resolve().parent
+for path in (REPO_ROOT, TEST_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from scripts import codex_cache, codex_runlog, codex_sandbox, run_codex_batch  # noqa: E402
+from utils import fake_codex  # noqa: E402
+
+
+@pytest.fixture
+def template(tmp_path: Path) -> Path:
+    root = tmp_path / "template"
+    (root / "notes").mkdir(parents=True)
+    (root / "notes" / "a.md").write_text("alpha\n", encoding="utf-8")
+    (root / "notes" / "b.md").write_text("beta\n", encoding="utf-8")
+    (root / "README.md").write_text("vault\n", encoding="utf-8")
+    return root
+
+
+@pytest.mark.parametrize("clone", ["auto", "copy"])
+def test_reset_only_touches_what_changed(tmp_path: Path, template: Path, clone: str) -> None:
+    pool = codex_sandbox.SandboxPool(tmp_path / "pool", 1, template, clone)
+    with pool.lease() as sandbox:
+        untouched = (sandbox / "notes" / "a.md").stat().st_ino
+        (sandbox / "fleeting").mkdir()
+        (sandbox / "fleeting" / "card.md").write_text("new\n", encoding="utf-8")
+        (sandbox / "README.md").unlink()
+        (sandbox / "notes" / "b.md").unlink()
+        (sandbox / "notes" / "b.md").write_text("rewritten, longer\n", encoding="utf-8")
+
+    with pool.lease() as again:
+        assert again == sandbox
+        files = sorted(p.relative_to(again).as_posix() for p in again.rglob("*"))
+        assert files == ["README.md", "notes", "notes/a.md", "notes/b.md"]
+        assert (again / "notes" / "b.md").read_text(encoding="utf-8") == "beta\n"
+        assert (again / "notes" / "a.md").stat().st_ino == untouched
+    assert (template / "notes" / "b.md").read_text(encoding="utf-8") == "beta\n"
+    assert (pool.removed, pool.recloned) == (2, 5)
+
+
+def test_in_place_edit_through_hard_link_is_reported(tmp_path: Path, template: Path) -> None:
+    pool = codex_sandbox.SandboxPool(tmp_path / "pool", 1, template, "hardlink")
+    with pool.lease() as sandbox:
+        with (sandbox / "README.md").open("a", encoding="utf-8") as fh:
+            fh.write("appended in place\n")
+
+    with pytest.raises(RuntimeError, match="README.md was modified in place"):
+        with pool.lease():
+            pass
+
+
+def test_auto_clone_never_falls_back_to_hard_links(tmp_path: Path, template: Path, monkeypatch) -> None:
+    def unsupported(source: Path, target: Path) -> None:
+        raise OSError("no reflinks here")
+
+    monkeypatch.setattr(codex_sandbox, "reflink", unsupported)
+    pool = codex_sandbox.SandboxPool(tmp_path / "pool", 1, template)
+    with pool.lease() as sandbox:
+        with (sandbox / "README.md").open("a", encoding="utf-8") as fh:
+            fh.write("appended in place\n")
+
+    assert pool.method == "copy"
+    assert (template / "README.md").read_text(encoding="utf-8") == "vault\n"
+    with pool.lease() as again:
+        assert (again / "README.md").read_text(encoding="utf-8") == "vault\n"
+
+
+def test_pools_sharing_a_root_keep_to_their_own_directories(tmp_path: Path) -> None:
+    root = tmp_path / "codex_tmp"
+    (root / "worker-0").mkdir(parents=True)
+    (root / "notes.txt").write_text("not ours", encoding="utf-8")
+    first = codex_sandbox.SandboxPool(root, 4)
+    with first.lease() as sandbox:
+        (sandbox / "card.md").write_text("live", encoding="utf-8")
+        second = codex_sandbox.SandboxPool(root, 2)
+        with second.lease() as other:
+            assert other.parent != sandbox.parent
+        assert (sandbox / "card.md").read_text(encoding="utf-8") == "live"
+    assert (root / "worker-0").is_dir() and (root / "notes.txt").exists()
+
+    (first.dir / "worker-3").mkdir()
+    first.close()
+    reused = codex_sandbox.SandboxPool(root, 2)
+    assert reused.dir == first.dir
+    assert sorted(path.name for path in reused.dir.iterdir()) == ["worker-0"]
+    second.close()
+    reused.close()
+
+
+def test_concurrent_leases_get_distinct_sandboxes(tmp_path: Path) -> None:
+    pool = codex_sandbox.SandboxPool(tmp_path / "pool", 3)
+    barrier = threading.Barrier(3)
+    leased = []
+
+    def worker() -> None:
+        with pool.lease() as sandbox:
+            leased.append(sandbox)
+            barrier.wait(timeout=5)
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(path.name for path in leased) == ["worker-0", "worker-1", "worker-2"]
+
+
+def test_template_fingerprint_follows_contents(template: Path) -> None:
+    before = codex_sandbox.template_fingerprint(template)
+    (template / "notes" / "a.md").write_text("ALPHA\n", encoding="utf-8")
+
+    assert codex_sandbox.template_fingerprint(template) != before
+    assert codex_sandbox.template_fingerprint(None) is None
+    inputs = codex_cache.cache_inputs("p", {}, None, workdir=before)
+    assert codex_cache.explain_miss(inputs, codex_cache.cache_inputs("p", {}, None)) == "changed: workdir template"
+
+
+def test_parallel_batch_cases_never_share_a_directory(tmp_path: Path, template: Path, monkeypatch) -> None:
+    bin_dir = tmp_path / "bin"
+    fake_codex.install(bin_dir, [{"ls": True}, {"touch": "fleeting/card.md"}, {"sleep": 0.2}])
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+    manifest = tmp_path / "cases.jsonl"
+    manifest.write_text("".join(json.dumps({"prompt": f"p{n}"}) + "\n" for n in range(6)), encoding="utf-8")
+    out = tmp_path / "out"
+
+    argv = ["--input-file", str(manifest), "--output-dir", str(out), "--no-cache", "--sandbox", ""]
+    argv += ["--workdir-root", str(tmp_path / "codex_tmp")]
+    argv += ["--parallel", "3", "--workdir-template", str(template), "--workdir-clone", "copy"]
+    assert run_codex_batch.main(argv) == 0
+
+    listings = [codex_runlog.load_run(out / f"codex_run_case_{n}.json")["events"][0] for n in range(1, 7)]
+    assert all(event["files"] == ["README.md", "notes/a.md", "notes/b.md"] for event in listings)
+    assert len({event["cwd"] for event in listings}) == 3
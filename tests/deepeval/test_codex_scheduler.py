@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+TEST_DIR = Path(__file__).resolve().parent
+for path in (REPO_ROOT, TEST_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from scripts import codex_scheduler, run_codex_batch  # noqa: E402
+from utils import fake_codex  # noqa: E402
+
+
+def _finish(limiter: codex_scheduler.AimdLimiter, count: int, reason: str | None = None, latency=None) -> None:
+    tickets = [limiter.acquire() for _ in range(count)]
+    for ticket in tickets:
+        limiter.release(ticket, reason, latency)
+
+
+def test_limit_grows_by_one_per_healthy_window() -> None:
+    limiter = codex_scheduler.AimdLimiter(1, maximum=3, latency_factor=None)
+
+    for _ in range(5):
+        _finish(limiter, limiter.limit)
+
+    assert limiter.limit == 3
+    assert [(d["from"], d["to"]) for d in limiter.decisions] == [(1, 2), (2, 3)]
+    assert limiter.peak == 3
+
+
+def test_one_overloaded_window_halves_the_limit_once() -> None:
+    limiter = codex_scheduler.AimdLimiter(8, minimum=2, latency_factor=None)
+
+    _finish(limiter, 8, reason="rate limit")
+    assert limiter.limit == 4 and len(limiter.decisions) == 1
+    assert limiter.decisions[0]["reason"] == "rate limit"
+
+    _finish(limiter, 4, reason="timeout")
+    _finish(limiter, 2, reason="timeout")
+    assert limiter.limit == 2 and [d["to"] for d in limiter.decisions] == [4, 2]
+
+
+def test_latency_spike_counts_as_congestion(tmp_path: Path) -> None:
+    log = tmp_path / "concurrency.jsonl"
+    limiter = codex_scheduler.AimdLimiter(4, maximum=4, latency_factor=2.0, log_path=log)
+
+    for latency in (1.0, 3.0, 1.2, 0.2, 1.1):
+        _finish(limiter, 1, latency=latency)
+    _finish(limiter, 1, latency=2.1)
+    assert limiter.limit == 4
+    _finish(limiter, 1, latency=2.5)
+
+    assert limiter.limit == 2
+    decision = json.loads(log.read_text(encoding="utf-8"))
+    assert decision["action"] == "decrease" and decision["reason"] == "latency 2.50s > 2x median 1.15s"
+
+
+def test_latency_is_ignored_by_default_and_spawn_errors_are_neutral() -> None:
+    limiter = codex_scheduler.AimdLimiter(2, maximum=4)
+
+    for latency in (0.1, 0.1, 0.1, 0.1, 0.1, 9.0):
+        _finish(limiter, 1, latency=latency)
+    assert limiter.limit == 4 and [d["action"] for d in limiter.decisions] == ["increase", "increase"]
+
+    limiter = codex_scheduler.AimdLimiter(2, maximum=4)
+    for _ in range(4):
+        limiter.release(limiter.acquire(), neutral=True)
+    assert limiter.limit == 2 and limiter.decisions == [] and limiter.in_flight == 0
+
+
+def test_bounds_are_validated() -> None:
+    with pytest.raises(ValueError):
+        codex_scheduler.AimdLimiter(1, minimum=4, maximum=2)
+    assert codex_scheduler.AimdLimiter(10, maximum=6).limit == 6
+    with pytest.raises(SystemExit):
+        run_codex_batch.parse_args(["--adaptive-parallel", "--min-parallel", "0"])
+
+
+@pytest.mark.parametrize(
+    ("summary", "reason"),
+    [
+        ({"success": True, "stderr": "", "attempts": [{"success": True}]}, None),
+        ({"stderr": "HTTP 429 Too Many Requests"}, "rate limit"),
+        ({"attempts": [{"success": False, "error": "Timed out after 5s"}]}, "timeout"),
+        ({"attempts": [{"success": False, "exit_code": 2}, {"success": True}]}, "exit 2"),
+    ],
+)
+def test_congestion_reason(summary, reason) -> None:
+    assert codex_scheduler.congestion_reason(summary) == reason
+
+
+def test_batch_backs_off_when_the_backend_saturates(tmp_path: Path, monkeypatch, capsys) -> None:
+    bin_dir = tmp_path / "bin"
+    fake_codex.install_loaded(bin_dir, base=0.15, per_load=0.02, capacity=4)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+    manifest = tmp_path / "cases.jsonl"
+    manifest.write_text("".join(json.dumps({"prompt": f"p{n}"}) + "\n" for n in range(18)), encoding="utf-8")
+    log = tmp_path / "concurrency.jsonl"
+
+    run_codex_batch.main(
+        [
+            "--input-file", str(manifest),
+            "--output-dir", str(tmp_path / "out"),
+            "--workdir-root", str(tmp_path / "codex_tmp"),
+            "--no-cache",
+            "--sandbox", "",
+            "--adaptive-parallel",
+            "--max-parallel", "6",
+            "--latency-factor", "0",
+            "--concurrency-log", str(log),
+        ]
+    )
+
+    decisions = [json.loads(line) for line in log.read_text(encoding="utf-8").splitlines()]
+    actions = [decision["action"] for decision in decisions]
+    assert actions[:4] == ["increase"] * 4
+    assert any(d["action"] == "decrease" and d["reason"] == "rate limit" for d in decisions)
+    assert all(1 <= d["to"] <= 6 for d in decisions)
+    loads = [int(line) for line in (bin_dir / "load.log").read_text(encoding="utf-8").split()]
+    assert len(loads) == 18 and max(loads) <= 6
+    assert "[concurrency] final limit" in capsys.readouterr().out
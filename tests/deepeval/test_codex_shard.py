@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+TEST_DIR = Path(__file__).resolve().parent
+for path in (REPO_ROOT, TEST_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from scripts import codex_journal, codex_runlog, codex_shard, run_codex_batch  # noqa: E402
+from utils import fake_codex  # noqa: E402
+
+
+def test_parse_shard() -> None:
+    assert codex_shard.parse_shard("2/4") == (2, 4)
+    for spec in ("4/4", "-1/4", "1", "a/b", "1/0"):
+        with pytest.raises(ValueError):
+            codex_shard.parse_shard(spec)
+    with pytest.raises(SystemExit):
+        run_codex_batch.parse_args(["--shard", "3/3"])
+
+
+def test_shard_assignment_is_stable_and_balanced() -> None:
+    cases = [{"prompt": f"prompt {n}"} for n in range(400)]
+
+    shards = [codex_shard.shard_of(case, 4) for case in cases]
+
+    assert shards == [codex_shard.shard_of(case, 4) for case in reversed(cases)][::-1]
+    # Pinned: changing the hash would move cases between shards of runs already in progress.
+    assert [codex_shard.shard_of({"prompt": f"p{n}"}, 3) for n in range(9)] == [1, 0, 1, 1, 2, 1, 1, 0, 1]
+    assert all(60 <= shards.count(shard) <= 140 for shard in range(4))
+    assert codex_shard.shard_of({"id": 7, "prompt": "a"}, 4) == codex_shard.shard_of({"id": "7", "prompt": "b"}, 4)
+
+
+@pytest.fixture
+def sharded_run(tmp_path: Path, monkeypatch, capsys):
+    bin_dir = tmp_path / "bin"
+    fake_codex.install(bin_dir, [{"event": fake_codex.command_event("quote-card-trigger")}])
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+    manifest = tmp_path / "cases.jsonl"
+    manifest.write_text("".join(json.dumps({"prompt": f"p{n}"}) + "\n" for n in range(9)), encoding="utf-8")
+    journals = []
+    for shard in range(3):
+        out = tmp_path / f"shard{shard}"
+        argv = ["--input-file", str(manifest), "--output-dir", str(out), "--no-cache", "--sandbox", ""]
+        argv += ["--workdir-root", str(tmp_path / "codex_tmp")]
+        assert run_codex_batch.main(argv + ["--shard", f"{shard}/3"]) == 0
+        journals.append(out / f"codex_run_case.shard-{shard}-of-3.journal.jsonl")
+    return manifest, journals
+
+
+def test_shards_cover_the_manifest_once_and_merge(tmp_path: Path, sharded_run, capsys) -> None:
+    manifest, journals = sharded_run
+    per_shard = [set(codex_journal.read_journal(journal)) for journal in journals]
+    assert sorted(case for cases in per_shard for case in cases) == list(range(1, 10))
+    assert "[shard] 0/3:" in capsys.readouterr().out
+
+    merged = tmp_path / "merged"
+    argv = ["merge", "--manifest", str(manifest), "--output-dir", str(merged), *map(str, journals)]
+    assert codex_shard.main(argv) == 0
+
+    assert "Merged 9 cases (0 failed) from 3 journals; 9 results copied." in capsys.readouterr().out
+    entries = codex_journal.read_journal(merged / "merged.journal.jsonl")
+    assert sorted(entries) == list(range(1, 10))
+    result = merged / "codex_run_case_5.json"
+    assert entries[5]["output"] == result.name
+    assert codex_runlog.load_digest(result)["trigger_fired"] is True
+
+
+def test_merge_fails_on_missing_and_duplicate_cases(tmp_path: Path, sharded_run, capsys) -> None:
+    manifest, journals = sharded_run
+    merged = tmp_path / "merged"
+
+    assert codex_shard.main(["merge", "--manifest", str(manifest), "--output-dir", str(merged), str(journals[0])]) == 1
+    err = capsys.readouterr().err
+    missing = set(range(1, 10)) - set(codex_journal.read_journal(journals[0]))
+    assert all(f"case {case}: not finished by any shard" in err for case in missing)
+
+    argv = ["merge", "--manifest", str(manifest), "--output-dir", str(merged), *map(str, journals), str(journals[1])]
+    assert codex_shard.main(argv) == 1
+    assert "finished in both" in capsys.readouterr().err
+    assert not merged.exists()
+
+
+def _log_file_manifest(tmp_path: Path, names: list) -> Path:
+    manifest = tmp_path / "cases.jsonl"
+    cases = [{"prompt": f"p{n}", "log_file": name} for n, name in enumerate(names)]
+    manifest.write_text("".join(json.dumps(case) + "\n" for case in cases), encoding="utf-8")
+    return manifest
+
+
+def _run_shards(tmp_path: Path, manifest: Path, *extra: str) -> list:
+    journals = []
+    for shard in range(2):
+        out = tmp_path / f"shard{shard}"
+        argv = ["--input-file", str(manifest), "--output-dir", str(out), "--sandbox", "", *extra]
+        argv += ["--workdir-root", str(tmp_path / "codex_tmp")]
+        assert run_codex_batch.main(argv + ["--shard", f"{shard}/2"]) == 0
+        journals.append(out / f"codex_run_case.shard-{shard}-of-2.journal.jsonl")
+    return journals
+
+
+def test_merge_uses_recorded_log_file_paths_and_refuses_collisions(tmp_path: Path, monkeypatch, capsys) -> None:
+    bin_dir = tmp_path / "bin"
+    fake_codex.install(bin_dir, [{"event": {"type": "turn.completed"}}])
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+    manifest = _log_file_manifest(tmp_path, [f"logs/case_{n}.json" for n in range(4)])
+    journals = _run_shards(tmp_path, manifest, "--no-cache")
+    merged = tmp_path / "merged"
+
+    argv = ["merge", "--manifest", str(manifest), "--output-dir", str(merged), *map(str, journals)]
+    assert codex_shard.main(argv) == 0
+    assert all((merged / f"case_{n}.json").exists() for n in range(4))
+
+    clashing = tmp_path / "clash"
+    clashing.mkdir()
+    manifest = _log_file_manifest(clashing, ["a/x.json", "b/x.json"])
+    journals = _run_shards(clashing, manifest, "--no-cache")
+    capsys.readouterr()
+    argv = ["merge", "--manifest", str(manifest), "--output-dir", str(clashing / "merged"), *map(str, journals)]
+    assert codex_shard.main(argv) == 1
+    assert "result name x.json is also used by case" in capsys.readouterr().err
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+TEST_DIR = Path(__file__).resolve().parent
+for path in (REPO_ROOT, TEST_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from scripts import codex_journal, codex_telemetry, run_codex_batch  # noqa: E402
+from utils import fake_codex  # noqa: E402
+
+
+def _outcome(idx: int, success: bool = True, message: str = "", **summary):
+    return idx, success, message, summary
+
+
+def test_case_record_and_failure_types() -> None:
+    summary = {
+        "timing": {"wall": 3.0, "first_event": 0.4},
+        "digest": {"event_count": 12, "usage": {"model": "x"}, "tokens": {"input_tokens": 100, "output_tokens": 20}},
+    }
+    record = codex_telemetry.case_record(_outcome(4, **summary), 3.25)
+    assert record == {
+        "case": 4,
+        "success": True,
+        "wall": 3.25,
+        "first_event": 0.4,
+        "events": 12,
+        "tokens": {"input_tokens": 100, "output_tokens": 20},
+    }
+
+    attempts = [{"tokens": {"input_tokens": 70}}, {"success": True, "tokens": {"input_tokens": 100, "output_tokens": 20}}]
+    record = codex_telemetry.case_record(_outcome(4, attempts=attempts, **summary), 3.25)
+    assert record["tokens"] == {"input_tokens": 170, "output_tokens": 20}
+
+    failure_type = codex_telemetry.failure_type
+    assert failure_type(False, "x", {"stderr": "429 Too Many Requests", "attempts": []}) == "rate limit"
+    assert failure_type(False, "x", {"attempts": [{"success": False, "error": "Timed out after 5s"}]}) == "timeout"
+    assert failure_type(False, "codex exited with 3", {"attempts": [{"success": False, "exit_code": 3}]}) == "exit 3"
+    assert failure_type(False, "Could not start codex: nope", {}) == "spawn error"
+    assert failure_type(False, "x", {"budget_exhausted": True}) == "budget exhausted"
+
+
+def test_report_percentiles_failures_and_slowest() -> None:
+    telemetry = codex_telemetry.BatchTelemetry(slowest=3)
+    for idx in range(1, 101):
+        record = {"case": idx, "success": idx % 10 != 0, "wall": float(idx), "first_event": idx / 10}
+        record.update(events=2, tokens={"input_tokens": 10})
+        if not record["success"]:
+            record["failure"] = "timeout"
+        telemetry.add(record)
+    telemetry.add({"case": 101, "success": False, "wall": 0.0, "failure": "budget exhausted"})
+
+    report = telemetry.report(elapsed=120.0)
+
+    assert (report["cases"], report["succeeded"], report["failed"]) == (101, 90, 11)
+    assert report["cases_per_minute"] == 50.5
+    latency = report["latency"]
+    assert [latency[key] for key in ("p50", "p90", "p99", "max", "count")] == [51.0, 91.0, 100.0, 100.0, 100]
+    assert report["time_to_first_event"]["p50"] == 5.1
+    assert report["failures"] == {"budget exhausted": 1, "timeout": 10}
+    assert report["tokens"] == {"input_tokens": 1000} and report["events"] == 200
+    assert [entry["case"] for entry in report["slowest"]] == [100, 99, 98]
+
+
+def test_prometheus_exposition() -> None:
+    telemetry = codex_telemetry.BatchTelemetry()
+    telemetry.add({"case": 1, "success": True, "wall": 2.0, "first_event": 0.5, "events": 3, "tokens": {}})
+    telemetry.add({"case": 2, "success": False, "wall": 4.0, "first_event": None, "failure": "exit 1"})
+
+    text = codex_telemetry.prometheus(telemetry.report(60.0), {"skill_version": '1."0"'})
+
+    lines = text.splitlines()
+    assert "# TYPE codex_batch_case_duration_seconds summary" in lines
+    assert 'codex_batch_case_duration_seconds{skill_version="1.\\"0\\"",quantile="0.9"} 4.0' in lines
+    assert 'codex_batch_case_duration_seconds_count{skill_version="1.\\"0\\""} 2' in lines
+    assert 'codex_batch_failures{skill_version="1.\\"0\\"",type="exit 1"} 1' in lines
+    assert 'codex_batch_cases_per_minute{skill_version="1.\\"0\\""} 2.0' in lines
+    with pytest.raises(ValueError):
+        codex_telemetry.parse_label("skill-version=1")
+
+
+def test_batch_writes_telemetry_and_journals_case_metrics(tmp_path: Path, monkeypatch, capsys) -> None:
+    bin_dir = tmp_path / "bin"
+    usage = {"input_tokens": 300, "cached_input_tokens": 100, "output_tokens": 40}
+    fake_codex.install(
+        bin_dir,
+        [{"event": {"type": "thread.started"}}, {"sleep": 0.05}, {"event": {"type": "turn.completed", "usage": usage}}],
+    )
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+    manifest = tmp_path / "cases.jsonl"
+    manifest.write_text("".join(json.dumps({"prompt": f"p{n}"}) + "\n" for n in range(3)), encoding="utf-8")
+    out = tmp_path / "out"
+
+    argv = ["--input-file", str(manifest), "--output-dir", str(out), "--no-cache", "--sandbox", ""]
+    argv += ["--workdir-root", str(tmp_path / "codex_tmp")]
+    assert run_codex_batch.main(argv + ["--telemetry-label", "skill_version=0.2.0"]) == 0
+
+    assert "[telemetry] p50 " in capsys.readouterr().out
+    report = json.loads((out / "codex_run_case.telemetry.json").read_text(encoding="utf-8"))
+    assert (report["cases"], report["failed"], report["events"]) == (3, 0, 6)
+    assert report["tokens"] == {key: value * 3 for key, value in usage.items()}
+    assert report["labels"] == {"skill_version": "0.2.0"}
+    assert 0 < report["time_to_first_event"]["p50"] < report["latency"]["p50"]
+    prom = (out / "codex_run_case.telemetry.prom").read_text(encoding="utf-8")
+    assert 'codex_batch_tokens{skill_version="0.2.0",kind="output_tokens"} 120' in prom
+    entry = codex_journal.read_journal(out / "codex_run_case.journal.jsonl")[2]
+    assert entry["events"] == 2 and entry["tokens"] == usage and entry["first_event"] < entry["duration"]
+
+
+def test_tokens_cover_every_turn_and_retried_attempts(tmp_path: Path, monkeypatch) -> None:
+    bin_dir = tmp_path / "bin"
+    turn = {"type": "turn.completed", "usage": {"input_tokens": 50, "output_tokens": 5}}
+    fake_codex.install(bin_dir, [{"event": turn}, {"event": turn}, {"if_arg": "--fail", "steps": [{"exit": 1}]}])
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+    manifest = tmp_path / "cases.jsonl"
+    manifest.write_text(json.dumps({"prompt": "p"}) + "\n", encoding="utf-8")
+    out = tmp_path / "out"
+    argv = ["--input-file", str(manifest), "--output-dir", str(out), "--no-cache", "--sandbox", ""]
+    argv += ["--workdir-root", str(tmp_path / "codex_tmp")]
+
+    assert run_codex_batch.main(argv + ["--codex-arg=--fail", "--retries", "1", "--backoff", "0"]) == 0
+
+    entry = codex_journal.read_journal(out / "codex_run_case.journal.jsonl")[1]
+    assert entry["status"] == "failed" and entry["tokens"] == {"input_tokens": 200, "output_tokens": 20}
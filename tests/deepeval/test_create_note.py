@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import io
+import json
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+SCRIPTS_DIR = REPO_ROOT / "skills" / "add-card" / "scripts"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+import create_note  # noqa: E402
+
+
+def test_create_notes_writes_every_record(tmp_path: Path) -> None:
+    records = [
+        {"title": "第一张", "summary": " 提醒自己复盘。 ", "tags": ["literature"]},
+        {"title": "second/card", "summary": "Check the demo env."},
+    ]
+    results = list(create_note.create_notes(tmp_path, records))
+
+    assert [info["title"] for _, info in results] == ["第一张", "secondcard"]
+    assert results[0][1] == {
+        "title": "第一张",
+        "tags": ["literature"],
+        "summary": "提醒自己复盘。",
+        "status": "created",
+    }
+    assert results[1][1]["tags"] == ["fleeting"]
+    assert (tmp_path / "secondcard.md").read_text(encoding="utf-8") == create_note.build_content(
+        "Check the demo env.", ["fleeting"]
+    )
+
+
+def test_main_from_jsonl_prints_one_card_json_line_per_card(tmp_path, monkeypatch, capsys) -> None:
+    lines = [
+        json.dumps({"title": "A", "summary": "one"}),
+        "",
+        json.dumps({"title": "B", "summary": "two", "tags": ["x", "y"]}),
+    ]
+    monkeypatch.setattr(sys, "stdin", io.StringIO("\n".join(lines) + "\n"))
+
+    exit_code = create_note.main(["--from-jsonl", "-", "--folder", str(tmp_path)])
+
+    assert exit_code == 0
+    output = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [card["title"] for card in output] == ["A", "B"]
+    assert output[1]["tags"] == ["x", "y"]
+    assert output[0]["path"] == str(tmp_path / "A.md")
+
+
+def test_main_from_jsonl_reports_invalid_record(tmp_path, capsys) -> None:
+    manifest = tmp_path / "cards.jsonl"
+    manifest.write_text('{"title": "ok", "summary": "fine"}\n{"title": "missing summary"}\n', encoding="utf-8")
+
+    exit_code = create_note.main(["--from-jsonl", str(manifest), "--folder", str(tmp_path / "out")])
+
+    assert exit_code == 1
+    assert (tmp_path / "out" / "ok.md").exists()
+    assert "Invalid record" in capsys.readouterr().err
+
+
+def test_main_single_card_output_unchanged(tmp_path, capsys) -> None:
+    exit_code = create_note.main(["--title", "T", "--summary", "S", "--folder", str(tmp_path)])
+
+    assert exit_code == 0
+    out = capsys.readouterr().out.splitlines()
+    assert out[0] == f"Created note at {tmp_path / 'T.md'}"
+    assert out[1] == "```card_json"
+    assert json.loads(out[2]) == {"title": "T", "tags": ["fleeting"], "summary": "S", "status": "created"}
+    assert out[3] == "```"
+
+
+def test_rerun_with_same_inputs_is_unchanged(tmp_path, capsys) -> None:
+    argv = ["--title", "复盘", "--summary", "提醒一", "--folder", str(tmp_path)]
+    create_note.main(argv)
+    note = tmp_path / "复盘.md"
+    mtime = note.stat().st_mtime_ns
+    capsys.readouterr()
+
+    assert create_note.main(argv) == 0
+
+    out = capsys.readouterr().out.splitlines()
+    assert out[0] == f"Note unchanged at {note}"
+    assert json.loads(out[2])["status"] == "unchanged"
+    assert note.stat().st_mtime_ns == mtime
+    assert sorted(p.name for p in tmp_path.glob("*.md")) == ["复盘.md"]
+
+
+def test_unchanged_uses_cached_hash_without_reading(tmp_path, monkeypatch) -> None:
+    create_note.create_note(tmp_path, "A", "same", ["fleeting"])
+
+    def fail_read(self):
+        raise AssertionError("cached hash should avoid re-reading the note")
+
+    monkeypatch.setattr(Path, "read_bytes", fail_read)
+    result = create_note.create_note(tmp_path, "A", "same", ["fleeting"])
+    assert (result.title, result.status) == ("A", "unchanged")
+
+
+def test_changed_content_gets_new_card_and_suffix_matches_later(tmp_path) -> None:
+    create_note.create_note(tmp_path, "A", "first", ["fleeting"])
+    assert create_note.create_note(tmp_path, "A", "second", ["fleeting"])[1:3] == ("A 2", "created")
+    assert create_note.create_note(tmp_path, "A", "second", ["fleeting"])[1:3] == ("A 2", "unchanged")
+
+
+def test_edited_note_is_rehashed(tmp_path) -> None:
+    note_path = create_note.create_note(tmp_path, "A", "first", ["fleeting"]).path
+    note_path.write_text(create_note.build_content("frist", ["fleeting"]), encoding="utf-8")
+
+    assert create_note.create_note(tmp_path, "A", "frist", ["fleeting"])[1:3] == ("A", "unchanged")
+    assert create_note.create_note(tmp_path, "A", "first", ["fleeting"])[1:3] == ("A 2", "created")
+
+
+def test_index_rebuild_falls_back_to_hashing_files(tmp_path) -> None:
+    create_note.create_note(tmp_path, "A", "first", ["fleeting"])
+    create_note.open_vault(tmp_path).rebuild()
+
+    assert create_note.create_note(tmp_path, "A", "first", ["fleeting"])[1:3] == ("A", "unchanged")
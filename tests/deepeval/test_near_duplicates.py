@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+SCRIPTS_DIR = REPO_ROOT / "skills" / "add-card" / "scripts"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+import create_note  # noqa: E402
+import near_duplicates  # noqa: E402
+from vault_index import VaultIndex  # noqa: E402
+
+
+ORIGINAL = "提醒自己明天下午整理季度汇报的数据，顺便确认预算表。"
+REDICTATED = "提醒我明天下午整理季度汇报数据，并确认一下预算表。"
+UNRELATED = "向研发申请两台测试机器，准备演示环境。"
+
+
+def test_redictated_summary_is_a_near_duplicate(tmp_path: Path) -> None:
+    create_note.create_note(tmp_path, "季度汇报", ORIGINAL, ["fleeting"])
+    index = near_duplicates.NearDuplicateIndex(tmp_path)
+
+    matches = index.find(REDICTATED)
+    assert [match.title for match in matches] == ["季度汇报"]
+    assert matches[0].similarity >= near_duplicates.DEFAULT_THRESHOLD
+    assert index.find(UNRELATED) == []
+
+
+def test_report_mode_writes_and_lists_matches(tmp_path: Path, capsys) -> None:
+    base = ["--folder", str(tmp_path), "--near-duplicates", "report"]
+    create_note.main(["--title", "季度汇报", "--summary", ORIGINAL, *base])
+    capsys.readouterr()
+
+    assert create_note.main(["--title", "汇报数据", "--summary", REDICTATED, *base]) == 0
+
+    info = json.loads(capsys.readouterr().out.splitlines()[2])
+    assert info["status"] == "created"
+    assert [match["title"] for match in info["near_duplicates"]] == ["季度汇报"]
+    assert (tmp_path / "汇报数据.md").exists()
+
+
+def test_skip_mode_does_not_write(tmp_path: Path) -> None:
+    index = near_duplicates.NearDuplicateIndex(tmp_path)
+    create_note.create_note(tmp_path, "季度汇报", ORIGINAL, ["fleeting"], duplicates=index)
+
+    result = create_note.create_note(
+        tmp_path, "汇报数据", REDICTATED, ["fleeting"], duplicates=index, skip_duplicates=True
+    )
+
+    assert (result.title, result.status) == ("季度汇报", "duplicate")
+    assert not (tmp_path / "汇报数据.md").exists()
+    assert create_note.create_note(
+        tmp_path, "演示环境", UNRELATED, ["fleeting"], duplicates=index, skip_duplicates=True
+    ).status == "created"
+
+
+def test_skip_mode_reports_the_existing_card(tmp_path: Path, capsys) -> None:
+    base = ["--folder", str(tmp_path), "--near-duplicates", "skip"]
+    create_note.main(["--title", "季度汇报", "--summary", ORIGINAL, *base])
+    capsys.readouterr()
+
+    assert create_note.main(["--title", "汇报数据", "--summary", REDICTATED, *base]) == 0
+
+    out = capsys.readouterr().out.splitlines()
+    assert out[0] == f"Skipped near-duplicate of {tmp_path / '季度汇报.md'}"
+    assert json.loads(out[2])["status"] == "duplicate"
+
+
+def test_deleted_cards_are_not_reported(tmp_path: Path) -> None:
+    index = near_duplicates.NearDuplicateIndex(tmp_path)
+    create_note.create_note(tmp_path, "季度汇报", ORIGINAL, ["fleeting"], duplicates=index)
+    (tmp_path / "季度汇报.md").unlink()
+
+    assert index.find(REDICTATED) == []
+
+
+def test_new_index_is_built_from_existing_notes(tmp_path: Path) -> None:
+    create_note.create_note(tmp_path, "季度汇报", ORIGINAL, ["fleeting"])
+    create_note.create_note(tmp_path, "演示环境", UNRELATED, ["fleeting"])
+
+    index = near_duplicates.NearDuplicateIndex(tmp_path)
+
+    assert [match.title for match in index.find(UNRELATED)] == ["演示环境"]
+    assert index.rebuild() == 2
+
+
+def test_cards_written_without_the_index_are_picked_up(tmp_path: Path) -> None:
+    base = ["--folder", str(tmp_path), "--near-duplicates", "report"]
+    assert create_note.main(["--title", "a", "--summary", UNRELATED, *base]) == 0
+    create_note.create_note(tmp_path, "b", ORIGINAL, ["fleeting"])
+    by_hand = create_note.build_content("手写的卡片：整理季度汇报的数据", ["fleeting"])
+    (tmp_path / "c.md").write_text(by_hand, encoding="utf-8")
+
+    index = near_duplicates.NearDuplicateIndex(tmp_path)
+
+    assert [match.title for match in index.find(REDICTATED)] == ["b"]
+    assert index.sync() == {"indexed": 0, "removed": 0, "unchanged": 0}
+    # Notes written by hand are not in the filename log; only a full refresh reads them.
+    assert index.refresh() == {"indexed": 1, "removed": 0, "unchanged": 2}
+    (tmp_path / "b.md").unlink()
+    assert index.refresh()["removed"] == 1
+
+
+def test_lookups_only_read_cards_logged_since_the_last_sync(tmp_path: Path, monkeypatch) -> None:
+    create_note.create_note(tmp_path, "演示环境", UNRELATED, ["fleeting"])
+    near_duplicates.NearDuplicateIndex(tmp_path).find(UNRELATED)
+
+    def no_walk(folder):
+        raise AssertionError("the folder must not be walked")
+
+    monkeypatch.setattr(near_duplicates, "iter_note_files", no_walk)
+    create_note.create_note(tmp_path, "季度汇报", ORIGINAL, ["fleeting"])
+    index = near_duplicates.NearDuplicateIndex(tmp_path)
+
+    assert [match.title for match in index.find(REDICTATED)] == ["季度汇报"]
+    assert index.sync()["indexed"] == 0
+
+
+def test_rewritten_filename_log_is_reconciled_by_name(tmp_path: Path) -> None:
+    index = near_duplicates.NearDuplicateIndex(tmp_path)
+    create_note.create_note(tmp_path, "季度汇报", ORIGINAL, ["fleeting"], duplicates=index)
+    create_note.create_note(tmp_path, "演示环境", UNRELATED, ["fleeting"])
+    (tmp_path / "季度汇报.md").unlink()
+    VaultIndex(tmp_path).rebuild()
+
+    assert index.sync() == {"indexed": 1, "removed": 1, "unchanged": 0}
+    assert [match.title for match in index.find(UNRELATED)] == ["演示环境"]
+
+
+def test_empty_summaries_never_match(tmp_path: Path) -> None:
+    index = near_duplicates.NearDuplicateIndex(tmp_path)
+    create_note.create_note(tmp_path, "空", "", ["fleeting"], duplicates=index)
+    create_note.create_note(tmp_path, "标点", "……", ["fleeting"], duplicates=index)
+
+    assert near_duplicates.minhash("") is None
+    assert index.find("") == [] and index.find("…") == []
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import io
+import json
+import os
+import shutil
+import socket
+import stat
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+SCRIPTS_DIR = REPO_ROOT / "skills" / "add-card" / "scripts"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+import create_note_client  # noqa: E402
+from note_daemon import NoteDaemon  # noqa: E402
+
+
+@pytest.fixture
+def socket_path(monkeypatch):
+    # AF_UNIX paths are limited to ~100 bytes, so avoid pytest's long tmp_path.
+    directory = tempfile.mkdtemp(prefix="cbd", dir="/tmp")
+    path = f"{directory}/notes.sock"
+    monkeypatch.setenv(create_note_client.SOCKET_ENV, path)
+    yield path
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+@pytest.fixture
+def daemon(socket_path):
+    server = NoteDaemon(socket_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def _card_json(output: str) -> dict:
+    lines = output.splitlines()
+    start = lines.index("```card_json")
+    return json.loads(lines[start + 1])
+
+
+def test_client_output_matches_script_via_daemon(daemon, tmp_path, monkeypatch, capsys) -> None:
+    monkeypatch.chdir(tmp_path)
+
+    first = create_note_client.main(["--title", "复盘", "--summary", "提醒一", "--folder", "vault"])
+    first_out = capsys.readouterr().out
+    second = create_note_client.main(["--title", "复盘", "--summary", "提醒二", "--folder", "vault"])
+    second_out = capsys.readouterr().out
+
+    assert (first, second) == (0, 0)
+    assert first_out.splitlines()[0] == "Created note at vault/复盘.md"
+    assert _card_json(first_out) == {
+        "title": "复盘",
+        "tags": ["fleeting"],
+        "summary": "提醒一",
+        "status": "created",
+    }
+    assert _card_json(second_out)["title"] == "复盘 2"
+    assert Path(tmp_path / "vault").resolve() in daemon.vaults
+
+
+def test_daemon_keeps_one_near_duplicate_index_per_folder(daemon, tmp_path, monkeypatch, capsys) -> None:
+    monkeypatch.chdir(tmp_path)
+    base = ["--folder", "vault", "--near-duplicates", "report"]
+
+    create_note_client.main(["--title", "汇报", "--summary", "提醒自己明天下午整理季度汇报的数据", *base])
+    first = daemon.duplicate_indexes[Path(tmp_path / "vault").resolve()]
+    capsys.readouterr()
+    create_note_client.main(["--title", "数据", "--summary", "提醒我明天下午整理季度汇报数据", *base, "--similarity", "0.3"])
+
+    assert _card_json(capsys.readouterr().out)["near_duplicates"][0]["title"] == "汇报"
+    assert list(daemon.duplicate_indexes.values()) == [first]
+    assert first.threshold == 0.3
+
+
+def test_client_forwards_stdin_and_errors(daemon, tmp_path, monkeypatch, capsys) -> None:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sys, "stdin", io.StringIO('{"title": "A", "summary": "a"}\n'))
+
+    assert create_note_client.main(["--from-jsonl", "-", "--folder", "vault"]) == 0
+    assert json.loads(capsys.readouterr().out)["title"] == "A"
+
+    assert create_note_client.main(["--summary", "missing title"]) == 2
+    assert "--title and --summary are required" in capsys.readouterr().err
+
+
+def test_client_falls_back_without_daemon(socket_path, tmp_path, monkeypatch, capsys) -> None:
+    monkeypatch.chdir(tmp_path)
+
+    exit_code = create_note_client.main(["--title", "离线", "--summary", "本地写入"])
+
+    assert exit_code == 0
+    assert capsys.readouterr().out.startswith("Created note at fleeting/离线.md")
+    assert (tmp_path / "fleeting" / "离线.md").exists()
+
+
+def test_client_does_not_rerun_a_request_the_daemon_received(socket_path, tmp_path, monkeypatch, capsys) -> None:
+    monkeypatch.chdir(tmp_path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(1)
+
+    def hang_up() -> None:
+        conn, _ = listener.accept()
+        conn.recv(65536)
+        conn.close()
+
+    thread = threading.Thread(target=hang_up)
+    thread.start()
+    try:
+        exit_code = create_note_client.main(["--title", "只写一次", "--summary", "s"])
+    finally:
+        thread.join()
+        listener.close()
+
+    assert exit_code == 1
+    assert "note daemon at" in capsys.readouterr().err
+    assert not (tmp_path / "fleeting").exists()
+
+
+def test_daemon_refuses_a_live_socket_and_replaces_a_stale_one(daemon, socket_path) -> None:
+    with pytest.raises(OSError, match="already listening"):
+        NoteDaemon(socket_path)
+    probe = create_note_client.connect(socket_path)
+    assert probe is not None
+    probe.close()
+
+    stale = f"{socket_path}.stale"
+    orphan = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    orphan.bind(stale)
+    orphan.close()
+    replacement = NoteDaemon(stale)
+    try:
+        assert stat.S_IMODE(os.stat(stale).st_mode) == 0o600
+    finally:
+        replacement.server_close()
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import builtins
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+SCRIPTS_DIR = REPO_ROOT / "skills" / "add-card" / "scripts"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+import note_scanner  # noqa: E402
+from create_note import build_content  # noqa: E402
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 1024])
+def test_read_frontmatter_across_chunk_boundaries(tmp_path: Path, chunk_size: int) -> None:
+    path = tmp_path / "a.md"
+    path.write_text(build_content("正文 --- 不算分隔符", ["fleeting", "work"]), encoding="utf-8")
+
+    block = note_scanner.read_frontmatter(path, chunk_size=chunk_size)
+
+    assert block == "---\ntags:\n  - fleeting\n  - work\n---"
+
+
+def test_read_frontmatter_ignores_lookalike_delimiters(tmp_path: Path) -> None:
+    path = tmp_path / "a.md"
+    path.write_text("---\ntags:\n  - x\n----not\n---\nbody", encoding="utf-8")
+
+    assert note_scanner.read_frontmatter(path, chunk_size=4).endswith("----not\n---")
+
+
+def test_missing_or_unterminated_frontmatter(tmp_path: Path) -> None:
+    plain = tmp_path / "plain.md"
+    plain.write_text("just text\n---\n", encoding="utf-8")
+    open_ended = tmp_path / "open.md"
+    open_ended.write_text("---\ntags:\n  - x\n" + "filler\n" * 100, encoding="utf-8")
+
+    assert note_scanner.read_frontmatter(plain) == ""
+    assert note_scanner.read_frontmatter(open_ended, max_bytes=64) == ""
+
+
+class _CountingFile:
+    def __init__(self, handle, read_sizes):
+        self._handle = handle
+        self._read_sizes = read_sizes
+
+    def read(self, size=-1):
+        data = self._handle.read(size)
+        self._read_sizes.append(len(data))
+        return data
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._handle.close()
+
+
+def test_body_is_never_read(tmp_path: Path, monkeypatch) -> None:
+    path = tmp_path / "big.md"
+    path.write_text(build_content("x" * 1_000_000, ["fleeting"]), encoding="utf-8")
+    read_sizes: list[int] = []
+    monkeypatch.setattr(
+        note_scanner,
+        "open",
+        lambda *args, **kwargs: _CountingFile(builtins.open(*args, **kwargs), read_sizes),
+        raising=False,
+    )
+
+    assert note_scanner.read_frontmatter(path).endswith("---")
+    assert sum(read_sizes) <= note_scanner.CHUNK_SIZE
+
+
+def test_scan_vault_yields_records_lazily(tmp_path: Path) -> None:
+    for idx in range(25):
+        (tmp_path / f"card {idx}.md").write_text(build_content("s", ["fleeting", f"t{idx % 3}"]), encoding="utf-8")
+    (tmp_path / ".hidden.md").write_text("---\ntags:\n  - nope\n---\n", encoding="utf-8")
+
+    records = note_scanner.scan_vault(tmp_path, workers=3, window=4)
+    first = next(records)
+
+    assert isinstance(first, note_scanner.NoteRecord)
+    rest = list(records)
+    assert len(rest) == 24
+    assert sorted(r.title for r in [first, *rest])[:2] == ["card 0", "card 1"]
+    assert all(r.tags[0] == "fleeting" for r in rest)
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+SCRIPTS_DIR = REPO_ROOT / "skills" / "add-card" / "scripts"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+import create_note  # noqa: E402
+import note_search  # noqa: E402
+
+
+def _seed(folder: Path) -> None:
+    create_note.create_note(folder, "登录埋点", "今晚前完成登录功能的埋点验证。", ["fleeting", "work"])
+    create_note.create_note(folder, "演示环境", "提前准备演示环境，向研发申请测试机器。", ["fleeting"])
+    create_note.create_note(folder, "Crash log", "iOS 18 permission change breaks login.", ["Literature"])
+
+
+def test_tokenize_mixes_words_and_cjk_bigrams() -> None:
+    assert note_search.tokenize("复盘AI白板 idea") == ["复盘", "ai", "白板", "idea"]
+    assert note_search.tokenize("记") == ["记"]
+
+
+def test_parse_content_roundtrips_build_content() -> None:
+    content = create_note.build_content(" 摘要 ", ["fleeting", "work"])
+    assert create_note.parse_content(content) == (["fleeting", "work"], "摘要")
+
+
+def test_query_by_tag_and_keyword(tmp_path: Path) -> None:
+    _seed(tmp_path)
+    assert note_search.update_index(tmp_path)["added"] == 3
+
+    assert sorted(r["title"] for r in note_search.search(tmp_path, tags=["fleeting"])) == ["演示环境", "登录埋点"]
+    assert [r["title"] for r in note_search.search(tmp_path, tags=["literature"])] == ["Crash log"]
+    assert [r["title"] for r in note_search.search(tmp_path, keyword="埋点验证")] == ["登录埋点"]
+    assert [r["title"] for r in note_search.search(tmp_path, tags=["work"], keyword="测试机器")] == []
+    assert [r["title"] for r in note_search.search(tmp_path, keyword="LOGIN")] == ["Crash log"]
+
+
+def test_bigram_hits_are_checked_against_the_phrase(tmp_path: Path) -> None:
+    create_note.create_note(tmp_path, "A", "登录之后再验证埋点", ["fleeting"])
+    note_search.update_index(tmp_path)
+
+    assert note_search.search(tmp_path, keyword="登录验证") == []
+    assert [r["title"] for r in note_search.search(tmp_path, keyword="验证埋点")] == ["A"]
+
+
+def test_single_cjk_character_query(tmp_path: Path) -> None:
+    create_note.create_note(tmp_path, "复盘", "今天复盘账会要完成登录功能的验证", ["fleeting"])
+    create_note.create_note(tmp_path, "对账", "月底对账", ["fleeting"])
+    create_note.create_note(tmp_path, "演示", "准备演示环境", ["fleeting"])
+    note_search.update_index(tmp_path)
+
+    assert sorted(r["title"] for r in note_search.search(tmp_path, keyword="账")) == ["复盘", "对账"]
+    assert [r["title"] for r in note_search.search(tmp_path, keyword="境")] == ["演示"]
+
+
+def test_old_index_is_reread_for_unigrams(tmp_path: Path) -> None:
+    create_note.create_note(tmp_path, "对账", "月底对账", ["fleeting"])
+    conn = note_search.connect(tmp_path)
+    note_search.update_index(tmp_path, conn)
+    with conn:
+        conn.execute("DELETE FROM terms WHERE length(term) = 1")
+        conn.execute("PRAGMA user_version = 0")
+    conn.close()
+
+    assert note_search.update_index(tmp_path)["updated"] == 1
+    assert [r["title"] for r in note_search.search(tmp_path, keyword="账")] == ["对账"]
+
+
+def test_update_is_incremental(tmp_path: Path) -> None:
+    _seed(tmp_path)
+    note_search.update_index(tmp_path)
+    assert note_search.update_index(tmp_path) == {"added": 0, "updated": 0, "moved": 0, "removed": 0, "unchanged": 3}
+
+    edited = tmp_path / "演示环境.md"
+    edited.write_text(create_note.build_content("改为线上演示。", ["fleeting"]), encoding="utf-8")
+    os.utime(edited, ns=(1, 1))
+    (tmp_path / "Crash log.md").unlink()
+
+    assert note_search.update_index(tmp_path) == {"added": 0, "updated": 1, "moved": 0, "removed": 1, "unchanged": 1}
+    assert [r["title"] for r in note_search.search(tmp_path, keyword="线上演示")] == ["演示环境"]
+    assert note_search.search(tmp_path, keyword="测试机器") == []
+    assert note_search.search(tmp_path, tags=["literature"]) == []
+
+
+def test_cli_query_refresh(tmp_path: Path, capsys) -> None:
+    _seed(tmp_path)
+
+    assert note_search.main(["query", "--folder", str(tmp_path), "--keyword", "登录", "--refresh"]) == 0
+
+    results = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [r["title"] for r in results] == ["登录埋点"]
+    assert results[0]["tags"] == ["fleeting", "work"]
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+SCRIPTS_DIR = REPO_ROOT / "skills" / "add-card" / "scripts"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+import create_note  # noqa: E402
+from note_writer import NoteWriter, recover_staging, staging_dir  # noqa: E402
+
+
+def _records(count: int):
+    for idx in range(count):
+        yield {"title": f"card {idx}", "summary": f"summary {idx}"}
+
+
+def _notes(folder: Path) -> list[str]:
+    return sorted(path.name for path in folder.glob("*.md"))
+
+
+def test_writer_publishes_without_leaving_staged_files(tmp_path: Path) -> None:
+    writer = NoteWriter(tmp_path, durable=True)
+    writer.write(tmp_path / "a.md", b"hello")
+
+    assert (tmp_path / "a.md").read_text(encoding="utf-8") == "hello"
+    assert list(staging_dir(tmp_path).iterdir()) == []
+
+
+def test_group_commit_hides_notes_until_commit(tmp_path: Path) -> None:
+    with NoteWriter(tmp_path, durable=True, group_commit=True) as writer:
+        writer.write(tmp_path / "a.md", b"A")
+        writer.write(tmp_path / "b.md", b"B")
+        assert _notes(tmp_path) == []
+        assert writer.pending == 2
+
+    assert _notes(tmp_path) == ["a.md", "b.md"]
+
+
+def test_group_commit_aborts_on_error(tmp_path: Path) -> None:
+    with pytest.raises(RuntimeError):
+        with NoteWriter(tmp_path, group_commit=True) as writer:
+            writer.write(tmp_path / "a.md", b"A")
+            raise RuntimeError("interrupted")
+
+    assert _notes(tmp_path) == []
+    assert list(staging_dir(tmp_path).iterdir()) == []
+
+
+def test_interrupted_batch_keeps_only_committed_groups(tmp_path: Path) -> None:
+    def interrupted():
+        yield from _records(5)
+        raise KeyboardInterrupt
+
+    seen = []
+    with pytest.raises(KeyboardInterrupt):
+        for note_path, _ in create_note.create_notes(tmp_path, interrupted(), group_commit=2):
+            seen.append(note_path.name)
+
+    assert seen == ["card 0.md", "card 1.md", "card 2.md", "card 3.md"]
+    assert _notes(tmp_path) == seen
+    # The uncommitted fifth card released its reserved name.
+    title = create_note.create_note(tmp_path, "card 4", "again", ["fleeting"]).title
+    assert title == "card 4"
+
+
+def test_recovery_removes_staged_files_of_dead_writer(tmp_path: Path) -> None:
+    writer = NoteWriter(tmp_path, group_commit=True)
+    index = create_note.open_vault(tmp_path)
+    create_note.create_note(tmp_path, "lost", "never published", ["fleeting"], index=index, writer=writer)
+    staged = next(staging_dir(tmp_path).iterdir())
+    dead = staged.with_name(staged.name.replace(f".{os.getpid()}.", ".999999999."))
+    staged.rename(dead)
+
+    live = staging_dir(tmp_path) / f"other.md.{os.getppid()}.tmp"
+    live.write_text("still being written", encoding="utf-8")
+
+    index = create_note.open_vault(tmp_path)
+
+    assert not dead.exists()
+    assert live.exists()
+    assert "lost" not in index
+    assert recover_staging(tmp_path) == []
+
+
+def test_killed_batch_never_exposes_partial_notes(tmp_path: Path) -> None:
+    folder = tmp_path / "fleeting"
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            str(SCRIPTS_DIR / "create_note.py"),
+            "--from-jsonl",
+            "-",
+            "--folder",
+            str(folder),
+            "--group-commit",
+            "3",
+        ],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    assert proc.stdin is not None and proc.stdout is not None
+    for record in _records(4):
+        proc.stdin.write(json.dumps(record) + "\n")
+    proc.stdin.flush()
+    published = [json.loads(proc.stdout.readline()) for _ in range(3)]
+    deadline = time.time() + 5
+    while len(list(staging_dir(folder).glob("*.tmp"))) < 1 and time.time() < deadline:
+        time.sleep(0.01)
+    proc.send_signal(signal.SIGKILL)
+    proc.wait()
+
+    assert _notes(folder) == sorted(Path(card["path"]).name for card in published)
+    for name in _notes(folder):
+        idx = int(name.split()[1].split(".")[0])
+        expected = create_note.build_content(f"summary {idx}", ["fleeting"])
+        assert (folder / name).read_text(encoding="utf-8") == expected
+
+    index = create_note.open_vault(folder)
+    assert list(staging_dir(folder).glob("*.tmp")) == []
+    assert "card 3" not in index
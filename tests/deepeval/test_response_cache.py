@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from tests.deepeval import summary_harness  # noqa: E402
+from tests.deepeval.utils import response_cache  # noqa: E402
+
+
+class FakeResponse:
+    def __init__(self, content: str):
+        self.content = content
+
+    def model_dump(self, mode: str = "python") -> dict:
+        arguments = json.dumps({"content": self.content}, ensure_ascii=False)
+        return {"output": [{"type": "function_call", "name": "post_summary", "arguments": arguments}]}
+
+
+class FakeOpenAI:
+    created = 0
+
+    def __init__(self):
+        FakeOpenAI.created += 1
+        self.calls = []
+        self.responses = self
+
+    def create(self, **params):
+        self.calls.append(params)
+        return FakeResponse(f"summary {len(self.calls)}")
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> response_cache.ResponseStore:
+    FakeOpenAI.created = 0
+    return response_cache.ResponseStore(tmp_path / "responses")
+
+
+def test_request_key_is_canonical() -> None:
+    params = {"model": "m", "input": [{"role": "user", "content": "你好"}], "tool_choice": {"type": "function"}}
+    reordered = {"tool_choice": {"type": "function"}, "input": [{"content": "你好", "role": "user"}], "model": "m"}
+
+    assert response_cache.request_key(params) == response_cache.request_key(reordered)
+    assert response_cache.request_key(params) != response_cache.request_key({**params, "model": "n"})
+
+
+def test_record_replay_and_refresh(store, monkeypatch) -> None:
+    params = {"model": "m", "input": "a"}
+    recorder = response_cache.RecordReplayClient(store, "record", FakeOpenAI)
+
+    first = recorder.responses.create(**params)
+    again = recorder.responses.create(**params)
+
+    assert first == again and (recorder.recorded, recorder.hits) == (1, 1)
+    stored = json.loads(store.path(response_cache.request_key(params)).read_text(encoding="utf-8"))
+    assert stored["request"] == params
+
+    replayer = response_cache.RecordReplayClient(store, "replay", FakeOpenAI)
+    assert replayer.responses.create(**params) == first
+    with pytest.raises(response_cache.ResponseNotRecorded, match="m request 'b'.*SUMMARY_HARNESS_CACHE=record"):
+        replayer.responses.create(model="m", input="b")
+    assert FakeOpenAI.created == 1
+
+    refresher = response_cache.RecordReplayClient(store, "refresh", FakeOpenAI)
+    refresher.responses.create(**params)
+    refresher.responses.create(**params)
+    assert refresher.recorded == 2 and store.get(response_cache.request_key(params)) != first
+
+    monkeypatch.delenv(response_cache.MODE_ENV, raising=False)
+    default = response_cache.RecordReplayClient(store, factory=FakeOpenAI)
+    assert default.mode == "replay"
+    with pytest.raises(response_cache.ResponseNotRecorded):
+        default.responses.create(model="m", input="c")
+    assert FakeOpenAI.created == 2
+
+    with pytest.raises(ValueError, match="unknown SUMMARY_HARNESS_CACHE mode"):
+        response_cache.RecordReplayClient(store, "offline")
+
+
+def test_summary_agent_replays_until_the_skill_changes(store, monkeypatch, tmp_path: Path) -> None:
+    skill = tmp_path / "SKILL.md"
+    skill.write_text("v1", encoding="utf-8")
+    monkeypatch.setattr(summary_harness, "SKILL_PATH", skill)
+    monkeypatch.setattr(summary_harness, "client", response_cache.RecordReplayClient(store, "record", FakeOpenAI))
+    assert summary_harness.run_summary_agent("今天复盘") == ("post_summary", {"content": "summary 1"})
+
+    monkeypatch.setattr(summary_harness, "client", response_cache.RecordReplayClient(store, "replay"))
+    assert summary_harness.run_summary_agent("今天复盘") == ("post_summary", {"content": "summary 1"})
+
+    skill.write_text("v2", encoding="utf-8")
+    with pytest.raises(response_cache.ResponseNotRecorded):
+        summary_harness.run_summary_agent("今天复盘")
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+TEST_DIR = Path(__file__).resolve().parent
+for path in (REPO_ROOT, TEST_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from scripts import codex_cache, codex_retry, codex_runlog, run_codex_batch, run_codex_exec  # noqa: E402
+from utils import fake_codex  # noqa: E402
+
+
+@pytest.fixture
+def codex_bin(tmp_path: Path, monkeypatch) -> Path:
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+    return bin_dir
+
+
+def _run_single(tmp_path: Path, output: Path, **kwargs):
+    return run_codex_batch.run_single(3, {"prompt": "提示"}, output, 10.0, tmp_path, tmp_path, None, **kwargs)
+
+
+def test_run_single_writes_result_in_process(tmp_path: Path, codex_bin: Path) -> None:
+    fake_codex.install(codex_bin, [{"event": fake_codex.command_event("quote-card-trigger")}])
+    output = tmp_path / "out" / "case.jsonl.gz"
+
+    idx, success, message, summary = _run_single(tmp_path, output)
+
+    assert (idx, success, message) == (3, True, "")
+    assert "events" not in summary and summary["digest"]["trigger_fired"] is True
+    assert [event["type"] for event in codex_runlog.iter_events(output)] == ["item.started"]
+    assert codex_runlog.load_digest(output)["trigger_fired"] is True
+    assert (codex_bin / "prompt.txt").read_text(encoding="utf-8") == "提示"
+
+
+def test_run_single_reports_failures_and_retries(tmp_path: Path, codex_bin: Path) -> None:
+    fake_codex.install(codex_bin, [{"exit": 4}])
+    output = tmp_path / "case.json"
+
+    outcome = _run_single(tmp_path, output, policy=codex_retry.RetryPolicy(retries=1, backoff=0.0))
+
+    assert outcome[1:3] == (False, "codex exited with 4")
+    assert len(outcome[3]["attempts"]) == 2
+    assert json.loads(output.read_text(encoding="utf-8"))["exit_code"] == 4
+
+
+def test_run_single_without_codex(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("PATH", str(tmp_path / "empty"))
+
+    idx, success, message, summary = _run_single(tmp_path, tmp_path / "case.json")
+
+    assert not success and message.startswith("Could not start codex") and summary == {}
+    assert not (tmp_path / "case.json").exists()
+
+
+def test_summary_line() -> None:
+    outcomes = [
+        (1, True, "", {"attempts": [{}], "digest": {"trigger_fired": True}}),
+        (2, True, "", {"attempts": [{}, {}], "digest": {"trigger_fired": False}}),
+        (3, False, "Timed out", {}),
+    ]
+
+    line = run_codex_batch.summarize(outcomes, 12.34)
+
+    assert line == "[summary] 2/3 cases succeeded in 12.3s (1 retried, 1 fired the trigger); failed: 3"
+
+
+def test_stop_on_is_parsed_up_front() -> None:
+    args = run_codex_batch.parse_args(["--stop-on", "command=create_note.py"])
+
+    assert args.stop_on == [run_codex_exec.StopPredicate(command="create_note.py")]
+    with pytest.raises(SystemExit):
+        run_codex_batch.parse_args(["--stop-on", "colour=red"])
+
+
+def test_cache_reruns_only_changed_cases(tmp_path: Path, codex_bin: Path, capsys) -> None:
+    fake_codex.install(codex_bin, [{"event": {"type": "thread.started"}}])
+    skill_md = tmp_path / "skills" / "demo" / "SKILL.md"
+    skill_md.parent.mkdir(parents=True)
+    skill_md.write_text('---\nname: demo\nmetadata:\n  version: "1.0"\n---\n', encoding="utf-8")
+    manifest = tmp_path / "cases.jsonl"
+    manifest.write_text("".join(json.dumps({"prompt": f"p{n}"}) + "\n" for n in range(2)), encoding="utf-8")
+    cache_dir = tmp_path / "cache"
+    argv = ["--input-file", str(manifest), "--output-dir", str(tmp_path / "out"), "--cache-dir", str(cache_dir)]
+    argv += ["--workdir-root", str(tmp_path / "codex_tmp")]
+    argv += ["--skills-dir", str(tmp_path / "skills"), "--sandbox", ""]
+    cache = codex_cache.ResultCache(cache_dir)
+
+    def run(*extra: str) -> str:
+        (codex_bin / "prompt.txt").unlink(missing_ok=True)
+        assert run_codex_batch.main(argv + list(extra)) == 0
+        return capsys.readouterr().out
+
+    first = run()
+    assert "[cache] 0 hits, 2 misses" in first and first.count("(no result yet)") == 2
+    old_keys = set(cache.keys())
+    assert len(old_keys) == 2
+
+    second = run()
+    assert "[cache] 2 hits, 0 misses" in second and "is up to date" in second
+    assert not (codex_bin / "prompt.txt").exists()
+
+    (tmp_path / "out" / "codex_run_case_1.json").unlink()
+    third = run()
+    assert "restored from cache" in third and not (codex_bin / "prompt.txt").exists()
+    assert codex_runlog.load_digest(tmp_path / "out" / "codex_run_case_1.json") is not None
+
+    skill_md.write_text(skill_md.read_text(encoding="utf-8").replace("1.0", "1.1"), encoding="utf-8")
+    fourth = run()
+    assert fourth.count("(changed: skill demo 1.0 -> 1.1)") == 2
+    outputs = [str(tmp_path / "out" / f"codex_run_case_{n}.json") for n in (1, 2)]
+    assert codex_cache.main(["--cache-dir", str(cache_dir), "gc", "--keep", *outputs]) == 0
+    assert "2 orphaned entries removed" in capsys.readouterr().out
+    assert set(cache.keys()).isdisjoint(old_keys) and len(set(cache.keys())) == 2
+
+    fifth = run("--codex-arg=-m", "--codex-arg=other")
+    assert fifth.count("(changed: codex args)") == 2
+
+
+def test_failed_cases_rerun_on_the_next_invocation(tmp_path: Path, codex_bin: Path, capsys) -> None:
+    fake_codex.install(codex_bin, [{"exit": 3}])
+    manifest = tmp_path / "cases.jsonl"
+    manifest.write_text("".join(json.dumps({"prompt": f"p{n}"}) + "\n" for n in range(2)), encoding="utf-8")
+    argv = ["--input-file", str(manifest), "--output-dir", str(tmp_path / "out")]
+    argv += ["--workdir-root", str(tmp_path / "codex_tmp")]
+    argv += ["--cache-dir", str(tmp_path / "cache"), "--sandbox", ""]
+
+    assert run_codex_batch.main(argv) == 0
+    assert "[cache] 0 hits, 2 misses" in capsys.readouterr().out
+    assert codex_cache.recorded_entry(tmp_path / "out" / "codex_run_case_1.json") is None
+
+    fake_codex.install(codex_bin, [{"event": {"type": "thread.started"}}])
+    assert run_codex_batch.main(argv) == 0
+    second = capsys.readouterr().out
+    assert "[cache] 0 hits, 2 misses" in second and second.count("(previous run failed)") == 2
+
+    assert run_codex_batch.main(argv) == 0
+    assert "[cache] 2 hits, 0 misses" in capsys.readouterr().out
+
+
+def test_cache_cli_gc_keeps_referenced_entries(tmp_path: Path, capsys) -> None:
+    cache = codex_cache.ResultCache(tmp_path / "cache")
+    outputs = []
+    for n in range(3):
+        inputs = codex_cache.cache_inputs(f"p{n}", {}, None)
+        entry = {"key": codex_cache.cache_key(inputs), "inputs": inputs}
+        result = {"success": True, "events": [], "cache": entry}
+        cache.put(entry["key"], result)
+        outputs.append(tmp_path / f"case_{n}.json")
+        codex_runlog.write_run(outputs[-1], result)
+
+    assert codex_cache.main(["--cache-dir", str(cache.root), "gc", "--keep", str(outputs[0]), "--dry-run"]) == 0
+    assert len(list(cache.keys())) == 3
+    assert codex_cache.main(["--cache-dir", str(cache.root), "gc", "--keep", *map(str, outputs[:2])]) == 0
+
+    assert sorted(cache.keys()) == sorted(codex_cache.recorded_entry(path)["key"] for path in outputs[:2])
+    assert "1 orphaned entries removed" in capsys.readouterr().out
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import _thread
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+TEST_DIR = Path(__file__).resolve().parent
+for path in (REPO_ROOT, TEST_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from scripts import run_codex_exec  # noqa: E402
+from utils import fake_codex  # noqa: E402
+
+
+@pytest.fixture
+def codex_bin(tmp_path: Path, monkeypatch) -> Path:
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+    return bin_dir
+
+
+def _run(tmp_path: Path, timeout: float = 10.0, **kwargs):
+    return run_codex_exec.run_codex("提示词", [], tmp_path, timeout, tmp_path, None, **kwargs)
+
+
+def test_events_are_parsed_and_logged(tmp_path: Path, codex_bin: Path) -> None:
+    fake_codex.install(
+        codex_bin,
+        [
+            {"event": {"type": "thread.started"}},
+            {"raw": "not json"},
+            {"stderr": "warning"},
+            {"event": fake_codex.command_event("python3 create_note.py")},
+        ],
+    )
+    log = tmp_path / "logs" / "run.jsonl"
+
+    result = _run(tmp_path, event_log=log)
+
+    assert result["success"] and result["exit_code"] == 0
+    assert [event["type"] for event in result["events"]] == ["thread.started", "raw", "item.started"]
+    assert result["events"][1] == {"type": "raw", "data": "not json"}
+    assert [json.loads(line) for line in log.read_text(encoding="utf-8").splitlines()] == result["events"]
+    assert result["stderr"].strip() == "warning"
+    assert (codex_bin / "prompt.txt").read_text(encoding="utf-8") == "提示词"
+
+
+def test_timeout_keeps_events_received_so_far(tmp_path: Path, codex_bin: Path) -> None:
+    fake_codex.install(
+        codex_bin,
+        [{"event": {"type": "thread.started"}}, {"event": {"type": "turn.started"}}, {"sleep": 30}],
+    )
+    log = tmp_path / "run.jsonl"
+
+    start = time.monotonic()
+    result = _run(tmp_path, timeout=1.0, event_log=log)
+
+    assert time.monotonic() - start < 10
+    assert result["success"] is False and result["exit_code"] is None
+    assert result["error"] == "Timed out after 1.0 seconds."
+    assert [event["type"] for event in result["events"]] == ["thread.started", "turn.started"]
+    assert len(log.read_text(encoding="utf-8").splitlines()) == 2
+
+
+def test_max_events_bounds_the_result(tmp_path: Path, codex_bin: Path) -> None:
+    fake_codex.install(codex_bin, [{"event": {"type": "tick", "n": n}} for n in range(50)] + [{"exit": 3}])
+    log = tmp_path / "run.jsonl"
+
+    result = _run(tmp_path, event_log=log, max_events=5)
+
+    assert (result["success"], result["exit_code"]) == (False, 3)
+    assert [event["n"] for event in result["events"]] == [45, 46, 47, 48, 49]
+    assert result["events_dropped"] == 45
+    assert len(log.read_text(encoding="utf-8").splitlines()) == 50
+
+
+def test_results_keep_a_bounded_number_of_events_by_default() -> None:
+    default = run_codex_exec.DEFAULT_MAX_EVENTS
+
+    assert run_codex_exec.EventSink().events.maxlen == default
+    assert run_codex_exec.EventSink(max_events=None).events.maxlen is None
+    assert run_codex_exec.parse_args(["--text", "x"]).max_events == default
+    assert run_codex_exec.parse_args(["--text", "x", "--max-events", "0"]).max_events == 0
+
+
+def test_stop_predicate_ends_run_early(tmp_path: Path, codex_bin: Path) -> None:
+    fake_codex.install(
+        codex_bin,
+        [
+            {"event": {"type": "thread.started"}},
+            {"event": fake_codex.command_event("cat SKILL.md")},
+            {"event": fake_codex.command_event("python3 skills/add-card/scripts/create_note.py --title T")},
+            {"sleep": 30},
+            {"event": {"type": "turn.completed"}},
+        ],
+    )
+    predicates = [
+        run_codex_exec.parse_predicate("type=turn.completed"),
+        run_codex_exec.parse_predicate("item_type=command_execution,command=create_note.py"),
+    ]
+
+    start = time.monotonic()
+    result = _run(tmp_path, timeout=20.0, stop_on=predicates)
+
+    assert time.monotonic() - start < 10
+    assert (result["success"], result["exit_code"]) == (True, None)
+    assert result["stopped_by"] == {
+        "predicate": {"item_type": "command_execution", "command": "create_note.py"},
+        "event_index": 2,
+    }
+    assert len(result["events"]) == 3
+
+
+def test_interrupt_kills_codex(tmp_path: Path, codex_bin: Path) -> None:
+    fake_codex.install(codex_bin, [{"event": {"type": "thread.started"}}, {"sleep": 30}])
+
+    def interrupt_once_started() -> None:
+        while not (codex_bin / "pid.txt").exists():
+            time.sleep(0.05)
+        time.sleep(0.2)
+        _thread.interrupt_main()
+
+    threading.Thread(target=interrupt_once_started, daemon=True).start()
+    with pytest.raises(KeyboardInterrupt):
+        _run(tmp_path, timeout=20.0)
+
+    with pytest.raises(ProcessLookupError):
+        os.kill(int((codex_bin / "pid.txt").read_text(encoding="utf-8")), 0)
+
+
+def test_unmatched_predicates_wait_for_exit(tmp_path: Path, codex_bin: Path) -> None:
+    fake_codex.install(codex_bin, [{"event": fake_codex.command_event("ls", kind="item.completed")}])
+
+    result = _run(tmp_path, stop_on=[run_codex_exec.parse_predicate("type=item.started,command=ls")])
+
+    assert (result["success"], result["exit_code"]) == (True, 0)
+    assert "stopped_by" not in result
+
+
+def test_cli_stop_on(tmp_path: Path, codex_bin: Path, capsys) -> None:
+    fake_codex.install(codex_bin, [{"event": fake_codex.command_event("quote-card-trigger")}, {"sleep": 30}])
+    output = tmp_path / "out.json"
+
+    exit_code = run_codex_exec.main(
+        ["--text", "hi", "--working-dir", str(tmp_path), "--output-file", str(output), "--stop-on", "command=quote-card"]
+    )
+
+    assert exit_code == 0
+    assert json.loads(output.read_text(encoding="utf-8"))["stopped_by"]["predicate"] == {"command": "quote-card"}
+    with pytest.raises(SystemExit):
+        run_codex_exec.parse_args(["--text", "hi", "--stop-on", "colour=red"])
+
+
+def _run_async(tmp_path: Path, timeout: float = 10.0, **kwargs):
+    return asyncio.run(run_codex_exec.run_codex_async("提示词", [], tmp_path, timeout, tmp_path, None, **kwargs))
+
+
+def test_async_result_matches_sync(tmp_path: Path, codex_bin: Path) -> None:
+    fake_codex.install(
+        codex_bin,
+        [
+            {"event": {"type": "thread.started"}},
+            {"raw": "not json"},
+            {"event": {"type": "blob", "data": "x" * 200_000}},
+            {"stderr": "warning"},
+            {"event": fake_codex.command_event("python3 create_note.py")},
+            {"exit": 2},
+        ],
+    )
+
+    expected = _run(tmp_path)
+    result = _run_async(tmp_path)
+
+    # Timing is measured per run; everything else must be identical.
+    timings = [expected.pop("timing"), result.pop("timing")]
+    assert all(0 <= timing["first_event"] <= timing["wall"] for timing in timings)
+    assert result == expected
+    assert (result["success"], result["exit_code"]) == (False, 2)
+    assert len(result["events"][2]["data"]) == 200_000
+
+
+def test_async_timeout_and_stop(tmp_path: Path, codex_bin: Path) -> None:
+    fake_codex.install(
+        codex_bin,
+        [{"event": {"type": "thread.started"}}, {"event": fake_codex.command_event("ls")}, {"sleep": 30}],
+    )
+
+    start = time.monotonic()
+    timed_out = _run_async(tmp_path, timeout=1.0)
+    stopped = _run_async(tmp_path, stop_on=[run_codex_exec.parse_predicate("command=ls")])
+
+    assert time.monotonic() - start < 10
+    assert timed_out["error"] == "Timed out after 1.0 seconds."
+    assert [event["type"] for event in timed_out["events"]] == ["thread.started", "item.started"]
+    assert (stopped["success"], stopped["exit_code"], stopped["stopped_by"]["event_index"]) == (True, None, 1)
+
+
+def test_async_cancellation_kills_codex(tmp_path: Path, codex_bin: Path) -> None:
+    fake_codex.install(codex_bin, [{"event": {"type": "thread.started"}}, {"sleep": 30}])
+
+    async def cancel_midway() -> None:
+        task = asyncio.ensure_future(run_codex_exec.run_codex_async("hi", [], tmp_path, 20.0, tmp_path, None))
+        while not (codex_bin / "pid.txt").exists():
+            await asyncio.sleep(0.05)
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_midway())
+
+    with pytest.raises(ProcessLookupError):
+        os.kill(int((codex_bin / "pid.txt").read_text(encoding="utf-8")), 0)
+
+
+def test_many_async_bounds_concurrency(tmp_path: Path, monkeypatch) -> None:
+    in_flight = []
+    peak = []
+
+    async def fake_run(prompt: str, **options) -> dict:
+        in_flight.append(prompt)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.01 * (int(prompt) % 3))
+        in_flight.remove(prompt)
+        return {"prompt": prompt, **options}
+
+    monkeypatch.setattr(run_codex_exec, "run_codex_async", fake_run)
+    finished = []
+
+    results = asyncio.run(
+        run_codex_exec.run_codex_many_async(
+            [str(n) for n in range(40)], 4, on_result=lambda index, _: finished.append(index), timeout=5.0
+        )
+    )
+
+    assert [result["prompt"] for result in results] == [str(n) for n in range(40)]
+    assert results[0]["timeout"] == 5.0
+    assert max(peak) == 4 and sorted(finished) == list(range(40))
+
+
+def test_many_async_runs_real_processes(tmp_path: Path, codex_bin: Path) -> None:
+    fake_codex.install(codex_bin, [{"event": {"type": "thread.started"}}, {"sleep": 0.2}])
+
+    start = time.monotonic()
+    results = asyncio.run(
+        run_codex_exec.run_codex_many_async(
+            ["p"] * 12, 12, extra_args=[], repo_root=tmp_path, timeout=10.0, working_dir=tmp_path, sandbox=None
+        )
+    )
+
+    assert all(result["success"] for result in results)
+    assert time.monotonic() - start < 12 * 0.2
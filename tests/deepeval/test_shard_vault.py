@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+SCRIPTS_DIR = REPO_ROOT / "skills" / "add-card" / "scripts"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+import create_note  # noqa: E402
+import note_search  # noqa: E402
+import shard_vault  # noqa: E402
+import vault_layout  # noqa: E402
+
+
+def _flat_vault(folder: Path, count: int = 20) -> None:
+    for idx in range(count):
+        create_note.create_note(folder, f"卡片 {idx}", f"第{idx}条提醒。", ["fleeting"])
+
+
+def _notes(folder: Path) -> dict[str, str]:
+    return {entry.name: subdir for subdir, entry in vault_layout.iter_note_files(folder)}
+
+
+def test_migrate_to_hash_layout_and_keep_resolving(tmp_path: Path) -> None:
+    _flat_vault(tmp_path)
+    note_search.update_index(tmp_path)
+
+    assert shard_vault.migrate(tmp_path, "hash", workers=4)["moved"] == 20
+
+    notes = _notes(tmp_path)
+    assert len(notes) == 20
+    assert all(subdir == vault_layout.shard_dir("hash", name[:-3]) for name, subdir in notes.items())
+    rerun = create_note.create_note(tmp_path, "卡片 3", "第3条提醒。", ["fleeting"])
+    assert (rerun.title, rerun.status) == ("卡片 3", "unchanged")
+    assert rerun.path.exists()
+    new = create_note.create_note(tmp_path, "新卡片", "迁移后写入。", ["fleeting"])
+    assert new.path.parent.name == vault_layout.shard_dir("hash", "新卡片")
+    stats = note_search.update_index(tmp_path)
+    assert (stats["moved"], stats["added"]) == (20, 1)
+    assert [r["path"] for r in note_search.search(tmp_path, keyword="迁移后")] == [str(new.path)]
+
+
+def test_date_layout_uses_mtime_for_existing_notes(tmp_path: Path) -> None:
+    _flat_vault(tmp_path, count=2)
+    old = tmp_path / "卡片 0.md"
+    stamp = time.mktime((2024, 3, 15, 12, 0, 0, 0, 0, -1))
+    os.utime(old, (stamp, stamp))
+
+    shard_vault.migrate(tmp_path, "date")
+
+    assert (tmp_path / "2024" / "03" / "卡片 0.md").exists()
+    new = create_note.create_note(tmp_path, "今天", "新卡。", ["fleeting"])
+    assert new.path.parent == tmp_path / time.strftime("%Y/%m")
+
+
+def test_unindexed_note_in_an_older_date_shard_is_not_overwritten(tmp_path: Path) -> None:
+    vault_layout.write_layout(tmp_path, "date")
+    create_note.create_note(tmp_path, "今天", "新卡。", ["fleeting"])
+    (tmp_path / "2024" / "03").mkdir(parents=True)
+    old = tmp_path / "2024" / "03" / "旧卡.md"
+    old.write_text("made in Obsidian\n", encoding="utf-8")
+
+    new = create_note.create_note(tmp_path, "旧卡", "另一条提醒。", ["fleeting"])
+
+    assert new.title == "旧卡 2"
+    assert old.read_text(encoding="utf-8") == "made in Obsidian\n"
+    assert not (tmp_path / time.strftime("%Y/%m") / "旧卡.md").exists()
+
+
+def test_rollback_restores_flat_vault(tmp_path: Path) -> None:
+    _flat_vault(tmp_path)
+    shard_vault.migrate(tmp_path, "hash")
+
+    assert shard_vault.rollback(tmp_path)["moved"] == 20
+
+    assert set(_notes(tmp_path).values()) == {""}
+    assert [p.name for p in tmp_path.iterdir() if p.is_dir() and not p.name.startswith(".")] == []
+    assert vault_layout.read_layout(tmp_path) == "flat"
+    assert not (tmp_path / shard_vault.JOURNAL_FILENAME).exists()
+    assert create_note.create_note(tmp_path, "卡片 1", "第1条提醒。", ["fleeting"]).status == "unchanged"
+
+
+def test_interrupted_migration_resumes(tmp_path: Path, monkeypatch) -> None:
+    _flat_vault(tmp_path)
+    real_replace = os.replace
+    calls = {"count": 0}
+
+    def flaky_replace(src, dst):
+        calls["count"] += 1
+        if calls["count"] > 5 and str(src).endswith(".md"):
+            raise KeyboardInterrupt
+        real_replace(src, dst)
+
+    monkeypatch.setattr(shard_vault.os, "replace", flaky_replace)
+    with pytest.raises(KeyboardInterrupt):
+        shard_vault.migrate(tmp_path, "hash", workers=1)
+    monkeypatch.setattr(shard_vault.os, "replace", real_replace)
+
+    with pytest.raises(ValueError):
+        shard_vault.migrate(tmp_path, "date")
+    stats = shard_vault.migrate(tmp_path, "hash")
+
+    assert stats["moved"] + stats["done"] >= 20
+    notes = _notes(tmp_path)
+    assert all(subdir == vault_layout.shard_dir("hash", name[:-3]) for name, subdir in notes.items())
+    assert all(create_note.open_vault(tmp_path).path_of(name[:-3]).exists() for name in notes)
@@ -8,7 +8,10 @@ from deepeval.test_case import LLMTestCase, LLMTestCaseParams
 TEST_DIR = Path(__file__).resolve().parent
 if str(TEST_DIR) not in sys.path:
     sys.path.append(str(TEST_DIR))
+if str(TEST_DIR.parents[1]) not in sys.path:
+    sys.path.append(str(TEST_DIR.parents[1]))
 
+from scripts import codex_runlog
 from utils.semantic_score_cache import SemanticScoreCache
 
 CACHE_PATH = Path(__file__).resolve().parents[2] / "tests" / "fixtures" / "geval_cache.jsonl"
@@ -45,26 +48,11 @@ def test_no_repo_add_card_script_lookup():
             manifest.append(case["log_file"])
 
     for name in manifest:
-        path = fixtures_dir / name
+        path = codex_runlog.find_run(fixtures_dir / name)
         if not path.exists():
             continue
-        data = json.loads(path.read_text(encoding="utf-8"))
-        events = data.get("events", [])
-        for event in events:
-            payloads = []
-            item = event.get("item", {})
-            payloads.append(item.get("command", ""))
-            payloads.append(item.get("aggregated_output", ""))
-            payloads.append(event.get("text", ""))
-            item_type = item.get("type")
-            if item_type == "reasoning":
-                text = item.get("text", "")
-                if text:
-                    _semantic_guard(path.name, text)
-            elif event.get("type") == "reasoning":
-                text = event.get("text", "")
-                if text:
-                    _semantic_guard(path.name, text)
+        for text in codex_runlog.run_digest(path)["reasoning"]:
+            _semantic_guard(path.name, text)
 
 def _evaluate_score(text: str) -> float:
     metric = GEval(
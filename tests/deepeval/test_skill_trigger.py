@@ -1,6 +1,13 @@
 import json
+import sys
 from pathlib import Path
 
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts import codex_runlog  # noqa: E402
+
 
 def test_quote_skill_trigger_from_fixture():
     repo_root = Path(__file__).resolve().parents[2]
@@ -19,14 +26,7 @@ def test_quote_skill_trigger_from_fixture():
     json_files = sorted((fixtures_dir / name) for name in manifest)
 
     for path in json_files:
-        data = json.loads(path.read_text(encoding="utf-8"))
-        events = data.get("events", [])
-        trigger = any(
-            event.get("type") == "item.started"
-            and event.get("item", {}).get("type") == "command_execution"
-            and "quote-card-trigger" in event.get("item", {}).get("command", "")
-            for event in events
-        )
+        trigger = codex_runlog.run_digest(codex_runlog.find_run(path))["trigger_fired"]
         case = manifest.get(path.name, {})
         expected = case.get("expected_trigger", True)
         if trigger != expected:
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+TEST_DIR = Path(__file__).resolve().parent
+if str(TEST_DIR) not in sys.path:
+    sys.path.insert(0, str(TEST_DIR))
+
+from utils import fake_codex  # noqa: E402
+
+DEFERRED = ["subprocess", "concurrent.futures", "sqlite3", "codex_cache", "codex_journal", "codex_sandbox"]
+
+
+def _loaded_after_import(*modules: str) -> list[str]:
+    code = (
+        "import json, sys\n"
+        f"sys.path[:0] = {[str(REPO_ROOT / 'skills' / 'add-card' / 'scripts'), str(REPO_ROOT / 'scripts')]!r}\n"
+        f"for name in {list(modules)!r}: __import__(name)\n"
+        f"print(json.dumps([m for m in {DEFERRED!r} if m in sys.modules]))\n"
+    )
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def test_entry_points_defer_heavy_imports() -> None:
+    assert _loaded_after_import("create_note", "run_codex_exec", "run_codex_batch") == []
+
+
+def test_create_note_runs_without_sqlite(tmp_path: Path) -> None:
+    script = REPO_ROOT / "skills" / "add-card" / "scripts" / "create_note.py"
+    argv = [str(script), "--title", "T", "--summary", "S", "--folder", str(tmp_path)]
+
+    proc = subprocess.run([sys.executable, "-X", "importtime", *argv], check=True, capture_output=True, text=True)
+
+    imported = {line.rpartition("|")[2].strip() for line in proc.stderr.splitlines()}
+    assert (tmp_path / "T.md").exists()
+    assert "sqlite3" not in imported
+
+
+def test_batch_imports_optional_modules_only_when_used(tmp_path: Path) -> None:
+    fake_codex.install(tmp_path / "bin", [{"event": {"type": "turn.completed"}}])
+    env = {**os.environ, "PATH": f"{tmp_path / 'bin'}{os.pathsep}{os.environ.get('PATH', '')}"}
+    manifest = tmp_path / "cases.jsonl"
+    manifest.write_text(json.dumps({"prompt": "ping"}) + "\n", encoding="utf-8")
+    script = REPO_ROOT / "scripts" / "run_codex_batch.py"
+    argv = [str(script), "--input-file", str(manifest), "--output-dir", str(tmp_path / "out"), "--no-cache"]
+    argv += ["--workdir-root", str(tmp_path / "codex_tmp")]
+    names = ["codex_journal", "codex_sandbox", "codex_telemetry", "codex_cache", "codex_scheduler", "codex_shard"]
+    code = (
+        "import json, runpy, sys\n"
+        f"sys.argv = {argv + ['--sandbox', '']!r}\n"
+        f"sys.path.insert(0, {str(script.parent)!r})\n"
+        "try:\n"
+        f"    runpy.run_path({str(script)!r}, run_name='__main__')\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        f"print(json.dumps([m for m in {names!r} if m in sys.modules]))\n"
+    )
+
+    proc = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True, env=env)
+
+    assert json.loads(proc.stdout.splitlines()[-1]) == ["codex_journal", "codex_sandbox", "codex_telemetry"]
@@ -3,6 +3,7 @@ from __future__ import annotations
 import sys
 from pathlib import Path
 
+import pytest
 from deepeval import evaluate
 from deepeval.metrics import SummarizationMetric
 from deepeval.test_case import LLMTestCase
@@ -12,6 +13,7 @@ if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
 from tests.deepeval.summary_harness import run_summary_agent  # noqa: E402
+from tests.deepeval.utils.response_cache import ResponseNotRecorded  # noqa: E402
 
 
 SUMMARY_PROMPTS = [
@@ -29,7 +31,11 @@ def test_summary_agent_prompts():
     test_cases = []
 
     for prompt in SUMMARY_PROMPTS:
-        tool_name, tool_args = run_summary_agent(prompt, focus_task="summary", strict_no_extra_output=True)
+        try:
+            tool_name, tool_args = run_summary_agent(prompt, focus_task="summary", strict_no_extra_output=True)
+        except ResponseNotRecorded as exc:
+            # Replay mode without a recording: see tests/fixtures/summary_responses/README.md.
+            pytest.skip(str(exc))
         assert tool_name == "post_summary", "Summary agent did not invoke the expected tool."
 
         actual_summary = (tool_args or {}).get("content", "")
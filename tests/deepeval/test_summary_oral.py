@@ -1,10 +1,7 @@
 from __future__ import annotations
 
-import json
-import re
 import sys
 from pathlib import Path
-from typing import Iterable
 
 from deepeval import evaluate
 from deepeval.dataset import EvaluationDataset, Golden
@@ -16,6 +13,7 @@ REPO_ROOT = Path(__file__).resolve().parents[2]
 if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
+from scripts.codex_digest import card_summary, digest_events  # noqa: E402
 from scripts.run_codex_exec import run_codex  # noqa: E402
 from tests.deepeval.utils.summary_oral_cache import (  # noqa: E402
     CodexResponse,
@@ -24,7 +22,6 @@ from tests.deepeval.utils.summary_oral_cache import (  # noqa: E402
     save_cache,
 )
 
-CREATE_NOTE_MARKER = "skills/add-card/scripts/create_note.py"
 DEFAULT_TIMEOUT = 60.0
 DEFAULT_WORKING_DIR = REPO_ROOT / "codex_tmp"
 DEFAULT_SANDBOX = "workspace-write"
@@ -71,35 +68,13 @@ def load_codex_response(prompt: str) -> CodexResponse:
     return result
 
 
-def extract_card_summary(events: Iterable[dict]) -> str:
-    """Parse aggregated_output of the create_note command and return summary."""
-    for event in events:
-        if event.get("type") != "item.completed":
-            continue
-        item = event.get("item") or {}
-        if item.get("type") != "command_execution":
-            continue
-        command = item.get("command", "")
-        if CREATE_NOTE_MARKER not in command:
-            continue
-        body = item.get("aggregated_output") or ""
-        summary = parse_summary_from_aggregated_output(body)
-        if summary:
-            return summary
-    raise ValueError("No create_note command output with summary found.")
-
-
-def parse_summary_from_aggregated_output(output: str) -> str:
-    """Extract card_json block from aggregated output and return its summary."""
-    match = re.search(r"```card_json\s*(\{.*?\})\s*```", output, re.DOTALL)
-    if not match:
-        return ""
-    try:
-        card = json.loads(match.group(1))
-    except json.JSONDecodeError:
-        return ""
-    summary = card.get("summary")
-    return summary or ""
+def extract_card_summary(response: CodexResponse) -> str:
+    """Return the summary from the create_note card_json, via the run digest."""
+    digest = response.get("digest") or digest_events(response.get("events", []))
+    summary = card_summary(digest)
+    if not summary:
+        raise ValueError("No create_note command output with summary found.")
+    return summary
 
 
 dataset = EvaluationDataset(goldens)
@@ -107,7 +82,7 @@ test_cases = []
 
 for golden in dataset.goldens:
     response = load_codex_response(golden.input)
-    summary = extract_card_summary(response.get("events", []))
+    summary = extract_card_summary(response)
     test_cases.append(LLMTestCase(input=golden.input, actual_output=summary))
 
 evaluate(
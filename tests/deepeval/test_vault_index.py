@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+SCRIPTS_DIR = REPO_ROOT / "skills" / "add-card" / "scripts"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+import create_note  # noqa: E402
+from vault_index import INDEX_FILENAME, LOCK_FILENAME, VaultIndex  # noqa: E402
+
+
+def test_index_is_rebuilt_from_existing_notes(tmp_path: Path) -> None:
+    (tmp_path / "Alpha.md").write_text("a", encoding="utf-8")
+    (tmp_path / "notes.txt").write_text("ignored", encoding="utf-8")
+
+    index = VaultIndex(tmp_path)
+
+    assert "Alpha" in index
+    assert "alpha" in index
+    assert "notes" not in index
+    assert (tmp_path / INDEX_FILENAME).exists()
+
+
+def test_reserve_picks_deterministic_suffix(tmp_path: Path) -> None:
+    index = VaultIndex(tmp_path)
+
+    assert index.reserve("Idea") == "Idea"
+    assert index.reserve("Idea") == "Idea 2"
+    assert index.reserve("idea") == "idea 3"
+    assert VaultIndex(tmp_path).reserve("Idea") == "Idea 4"
+
+
+def test_reserve_sees_appends_from_other_instances(tmp_path: Path) -> None:
+    first = VaultIndex(tmp_path)
+    second = VaultIndex(tmp_path)
+
+    assert first.reserve("Shared") == "Shared"
+    assert second.reserve("Shared") == "Shared 2"
+
+
+def test_partial_trailing_line_is_ignored_until_complete(tmp_path: Path) -> None:
+    index = VaultIndex(tmp_path)
+    with (tmp_path / INDEX_FILENAME).open("a", encoding="utf-8") as fh:
+        fh.write('{"name": "Half')
+
+    assert index.reserve("Other") == "Other"
+    assert "Half" not in index
+
+
+def test_rebuild_drops_deleted_notes(tmp_path: Path) -> None:
+    index = VaultIndex(tmp_path)
+    index.reserve("Gone")
+    index.rebuild()
+
+    assert "Gone" not in index
+    lines = (tmp_path / INDEX_FILENAME).read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == []
+
+
+def test_create_note_does_not_overwrite_same_title(tmp_path: Path) -> None:
+    first_path, first_title, *_ = create_note.create_note(tmp_path, "复盘:站会", "第一条", ["fleeting"])
+    second_path, second_title, *_ = create_note.create_note(tmp_path, "复盘站会", "第二条", ["fleeting"])
+
+    assert (first_title, second_title) == ("复盘站会", "复盘站会 2")
+    assert "第一条" in first_path.read_text(encoding="utf-8")
+    assert "第二条" in second_path.read_text(encoding="utf-8")
+
+
+def test_create_note_keeps_notes_made_outside_the_index(tmp_path: Path) -> None:
+    create_note.create_note(tmp_path, "Seed", "seed", ["fleeting"])
+    outside = tmp_path / "Idea.md"
+    outside.write_text("written in Obsidian", encoding="utf-8")
+    same = create_note.build_content("same", ["fleeting"])
+    (tmp_path / "Copy.md").write_text(same, encoding="utf-8")
+
+    result = create_note.create_note(tmp_path, "Idea", "new card", ["fleeting"])
+
+    assert (result.title, result.status) == ("Idea 2", create_note.STATUS_CREATED)
+    assert outside.read_text(encoding="utf-8") == "written in Obsidian"
+    assert create_note.create_note(tmp_path, "Copy", "same", ["fleeting"]).status == create_note.STATUS_UNCHANGED
+    assert "Idea" in VaultIndex(tmp_path)
+
+
+def test_reserve_skips_names_taken_on_disk(tmp_path: Path) -> None:
+    index = VaultIndex(tmp_path)
+
+    assert index.reserve("Idea", lambda name: name == "Idea") == "Idea 2"
+
+
+def test_rebuild_holds_the_index_lock(tmp_path: Path, monkeypatch) -> None:
+    fcntl = pytest.importorskip("fcntl")
+    index = VaultIndex(tmp_path)
+    rebuild = VaultIndex._rebuild
+    seen = []
+
+    def probing(self) -> None:
+        with (tmp_path / LOCK_FILENAME).open("ab") as fh:
+            try:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                seen.append("locked")
+        rebuild(self)
+
+    monkeypatch.setattr(VaultIndex, "_rebuild", probing)
+    index.rebuild()
+
+    assert seen == ["locked"]
+
+
+def test_rewritten_log_is_reloaded_even_when_longer(tmp_path: Path) -> None:
+    reader = VaultIndex(tmp_path)
+    reader.reserve("Old")
+    writer = VaultIndex(tmp_path)
+    (tmp_path / "Old.md").write_text("old", encoding="utf-8")
+    for idx in range(20):
+        (tmp_path / f"Rebuilt {idx:02d}.md").write_text("new", encoding="utf-8")
+    writer.rebuild()
+
+    assert reader.reserve("Fresh") == "Fresh"
+    assert len(reader) == 22
+    assert "Rebuilt 19" in reader and "Old" in reader
+
+
+def test_log_is_compacted_when_stale_lines_dominate(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr("vault_index.COMPACT_MIN_LINES", 10)
+    index = VaultIndex(tmp_path)
+    other = VaultIndex(tmp_path)
+    index.reserve("Kept")
+    for size in range(30):
+        index.update("Kept", size=size)
+
+    lines = (tmp_path / INDEX_FILENAME).read_text(encoding="utf-8").splitlines()
+    assert len(lines) < 10
+    other.refresh()
+    assert other.get("Kept") == {"name": "Kept", "size": 29}
+    assert VaultIndex(tmp_path).get("Kept") == {"name": "Kept", "size": 29}
@@ -0,0 +1,127 @@
+"""Scripted stand-in for the `codex` CLI used by the run_codex tests.
+
+`install(bin_dir, script)` writes a `codex` executable into ``bin_dir`` that reads
+the prompt from stdin and then replays ``script``: a list of steps, each either
+``{"event": {...}}`` (printed as one JSON line), ``{"raw": "text"}``,
+``{"stderr": "text"}``, ``{"sleep": seconds}``, ``{"exit": code}``,
+``{"touch": "relative/path"}`` (create a file in the ``--cd`` directory) or
+``{"ls": true}`` (print a ``{"type": "ls", "cwd": ..., "files": [...]}`` event
+listing that directory). ``{"if_arg": "arg", "steps": [...]}`` and
+``{"if_skill": ["skill", "text"], "steps": [...]}`` replay their steps only when
+``arg`` was passed or ``$CODEX_HOME/skills/<skill>/SKILL.md`` contains ``text``. The prompt
+it received is saved next to the script as ``prompt.txt`` and its process id as
+``pid.txt``.
+
+`install_loaded(bin_dir, ...)` instead simulates a backend whose latency grows with
+the number of codex processes running at the same time and which answers with a
+rate-limit error above ``capacity`` concurrent runs.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+
+RUNNER = """\
+import json, os, sys, time
+from pathlib import Path
+
+script_path = Path({script_path!r})
+cd = Path(sys.argv[sys.argv.index("--cd") + 1]) if "--cd" in sys.argv else Path.cwd()
+script_path.with_name("pid.txt").write_text(str(os.getpid()), encoding="utf-8")
+script_path.with_name("prompt.txt").write_text(sys.stdin.read(), encoding="utf-8")
+
+
+def matches(step):
+    if "if_arg" in step:
+        return step["if_arg"] in sys.argv[1:]
+    home = Path(os.environ.get("CODEX_HOME") or Path.home() / ".codex")
+    skill_md = home / "skills" / step["if_skill"][0] / "SKILL.md"
+    return skill_md.exists() and step["if_skill"][1] in skill_md.read_text(encoding="utf-8")
+
+
+def run(steps):
+    for step in steps:
+        if "event" in step:
+            print(json.dumps(step["event"], ensure_ascii=False), flush=True)
+        elif "raw" in step:
+            print(step["raw"], flush=True)
+        elif "stderr" in step:
+            print(step["stderr"], file=sys.stderr, flush=True)
+        elif "sleep" in step:
+            time.sleep(step["sleep"])
+        elif "exit" in step:
+            sys.exit(step["exit"])
+        elif "touch" in step:
+            (cd / step["touch"]).parent.mkdir(parents=True, exist_ok=True)
+            (cd / step["touch"]).write_text(str(os.getpid()), encoding="utf-8")
+        elif "ls" in step:
+            files = sorted(p.relative_to(cd).as_posix() for p in cd.rglob("*") if p.is_file())
+            print(json.dumps({{"type": "ls", "cwd": str(cd), "files": files}}), flush=True)
+        elif matches(step):
+            run(step["steps"])
+
+
+run(json.loads(script_path.read_text(encoding="utf-8")))
+"""
+
+
+def install(bin_dir: Path, script: List[Dict[str, Any]]) -> Path:
+    """Create ``bin_dir/codex`` replaying ``script``; returns the executable path."""
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    script_path = bin_dir / "codex_script.json"
+    script_path.write_text(json.dumps(script, ensure_ascii=False), encoding="utf-8")
+    executable = bin_dir / "codex"
+    executable.write_text(
+        f"#!{sys.executable}\n" + RUNNER.format(script_path=str(script_path)),
+        encoding="utf-8",
+    )
+    executable.chmod(0o755)
+    return executable
+
+
+def command_event(command: str, item_type: str = "command_execution", kind: str = "item.started") -> Dict[str, Any]:
+    return {"type": kind, "item": {"id": "item_0", "type": item_type, "command": command}}
+
+
+LOADED_RUNNER = """\
+import json, os, sys, time
+from pathlib import Path
+
+active = Path({active_dir!r})
+active.mkdir(exist_ok=True)
+marker = active / str(os.getpid())
+marker.touch()
+try:
+    sys.stdin.read()
+    load = len(list(active.iterdir()))
+    with open(active.parent / "load.log", "a", encoding="utf-8") as fh:
+        fh.write(f"{{load}}\\n")
+    if load > {capacity}:
+        time.sleep({base})
+        print("429 Too Many Requests: rate limit reached", file=sys.stderr, flush=True)
+        sys.exit(1)
+    time.sleep({base} + {per_load} * (load - 1))
+    print(json.dumps({{"type": "turn.completed", "usage": {{"load": load}}}}), flush=True)
+finally:
+    marker.unlink()
+"""
+
+
+def install_loaded(bin_dir: Path, base: float, per_load: float, capacity: int) -> Path:
+    """Create ``bin_dir/codex`` whose latency is ``base + per_load * (concurrent - 1)``.
+
+    Runs beyond ``capacity`` concurrent processes fail with a 429 on stderr. The load
+    each run saw is appended to ``bin_dir/load.log``.
+    """
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    executable = bin_dir / "codex"
+    runner = LOADED_RUNNER.format(
+        active_dir=str(bin_dir / "active"), capacity=capacity, base=base, per_load=per_load
+    )
+    executable.write_text(f"#!{sys.executable}\n" + runner, encoding="utf-8")
+    executable.chmod(0o755)
+    return executable
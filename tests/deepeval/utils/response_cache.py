@@ -0,0 +1,147 @@
+"""Record/replay layer for Responses API calls made by the summary harness.
+
+A request's key is the sha256 of its parameters in canonical JSON (sorted keys,
+no whitespace): model, input messages (which carry the loaded SKILL.md text),
+tools and tool_choice. Editing a prompt, the skill or the tool schema therefore
+changes the key, and anything else reuses the stored response.
+
+Responses are stored one file per key, ``<root>/<key[:2]>/<key>.json``, holding
+the request next to the response so a recording can be reviewed in a diff.
+
+Modes (``SUMMARY_HARNESS_CACHE``):
+
+- ``replay`` (default): only stored responses; a missing one raises `ResponseNotRecorded`
+  (the summary tests skip with its message), so a plain test run never makes a
+  paid API call;
+- ``record``: replay stored responses, call the API for the rest and store them;
+- ``refresh``: call the API for every request and overwrite what is stored.
+
+Recordings are committed with the tests; after changing a prompt, the skill or
+the tool schema, record once and commit the new files.
+
+The real client is only created on the first call that needs the API, so a
+replay run neither imports ``openai`` nor needs an API key.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+
+MODES = ("replay", "record", "refresh")
+MODE_ENV = "SUMMARY_HARNESS_CACHE"
+
+
+class ResponseNotRecorded(LookupError):
+    """Raised in replay mode for a request that has no stored response."""
+
+
+def request_key(params: Dict[str, Any]) -> str:
+    """Stable hash of the request parameters."""
+    canonical = json.dumps(params, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def describe_request(params: Dict[str, Any]) -> str:
+    """Short human-readable label of a request: model and the start of the last user message."""
+    text = ""
+    messages = params.get("input")
+    if isinstance(messages, list):
+        for message in reversed(messages):
+            if isinstance(message, dict) and message.get("role") == "user":
+                text = str(message.get("content", ""))
+                break
+    elif isinstance(messages, str):
+        text = messages
+    text = " ".join(text.split())
+    return f"{params.get('model', '?')} request {text[:40]!r}" + ("..." if len(text) > 40 else "")
+
+
+def response_dict(response: Any) -> Dict[str, Any]:
+    """JSON-ready form of an SDK response object (or an already plain dict)."""
+    if isinstance(response, dict):
+        return response
+    return response.model_dump(mode="json")
+
+
+class ResponseStore:
+    def __init__(self, root: Path):
+        self.root = root
+
+    def path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Dict[str, Any] | None:
+        try:
+            return json.loads(self.path(key).read_text(encoding="utf-8"))["response"]
+        except (OSError, json.JSONDecodeError, KeyError):
+            return None
+
+    def put(self, key: str, params: Dict[str, Any], response: Dict[str, Any]) -> None:
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(
+            json.dumps({"request": params, "response": response}, ensure_ascii=False, indent=2),
+            encoding="utf-8",
+        )
+        os.replace(tmp_path, path)
+
+
+class _Responses:
+    def __init__(self, owner: RecordReplayClient):
+        self._owner = owner
+
+    def create(self, **params: Any) -> Dict[str, Any]:
+        return self._owner.create(params)
+
+
+class RecordReplayClient:
+    """Stands in for ``OpenAI()`` where only ``client.responses.create()`` is used.
+
+    ``factory`` builds the real client on first use. Responses come back as plain
+    dicts in every mode, so recorded and live runs look the same to callers.
+    """
+
+    def __init__(self, store: ResponseStore, mode: str | None = None, factory: Callable[[], Any] | None = None):
+        mode = mode or os.environ.get(MODE_ENV) or "replay"
+        if mode not in MODES:
+            raise ValueError(f"unknown {MODE_ENV} mode {mode!r} (expected one of {', '.join(MODES)})")
+        self.store = store
+        self.mode = mode
+        self.responses = _Responses(self)
+        self.hits = 0
+        self.recorded = 0
+        self._factory = factory
+        self._client: Any = None
+
+    def create(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        key = request_key(params)
+        if self.mode != "refresh":
+            cached = self.store.get(key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            if self.mode == "replay":
+                raise ResponseNotRecorded(
+                    f"no recorded response for {describe_request(params)} "
+                    f"(expected {self.store.path(key)}); record it with {MODE_ENV}=record "
+                    "and an OPENAI_API_KEY, then commit the new file"
+                )
+        response = response_dict(self._real_client().responses.create(**params))
+        self.store.put(key, params, response)
+        self.recorded += 1
+        return response
+
+    def _real_client(self) -> Any:
+        if self._client is None:
+            if self._factory is None:
+                from openai import OpenAI
+
+                self._factory = OpenAI
+            self._client = self._factory()
+        return self._client
@@ -12,6 +12,7 @@ class CodexResponse(TypedDict, total=False):
     success: bool
     exit_code: int | None
     events: list[dict]
+    digest: dict
     stderr: str
 
 